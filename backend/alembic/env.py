@@ -11,6 +11,9 @@ from libs.common.database import engine as async_engine
 # IMPORTANT: import modules that define Base subclasses (services/*/models)
 from services.auth.models import user as auth_user
 from services.baggage.models import bag as bag_model
+from services.baggage.models import tracker_device as tracker_device_model
+from services.baggage.models import baggage_position as baggage_position_model
+from services.baggage.models import event_outbox as event_outbox_model
 from services.weather.models import prediction as pred_model
 
 from libs.common.base import Base
@@ -0,0 +1,30 @@
+"""tracker_devices : registre des trackers GPS associés aux bagages
+
+Revision ID: 1a7d3e9c5b42
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "1a7d3e9c5b42"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE tracker_devices (
+            id UUID PRIMARY KEY,
+            device_id VARCHAR(100) NOT NULL,
+            baggage_id UUID NOT NULL REFERENCES baggages (id),
+            paired_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    # Un tracker n'est associé qu'à un seul bagage à la fois
+    op.execute("CREATE UNIQUE INDEX ux_tracker_devices_device_id ON tracker_devices (device_id)")
+    op.execute("CREATE INDEX ix_tracker_devices_baggage_id ON tracker_devices (baggage_id)")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS tracker_devices")
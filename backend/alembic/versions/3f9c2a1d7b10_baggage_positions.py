@@ -0,0 +1,44 @@
+"""baggage_positions : historique GPS partitionné par jour
+
+Revision ID: 3f9c2a1d7b10
+Revises: 1a7d3e9c5b42
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+
+revision = "3f9c2a1d7b10"
+down_revision = "1a7d3e9c5b42"
+branch_labels = None
+depends_on = None
+
+# Partitions créées d'avance ; la suite est gérée par worker/positions_maintenance.py
+INITIAL_DAYS = 7
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE baggage_positions (
+            baggage_id UUID NOT NULL,
+            recorded_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (baggage_id, recorded_at)
+        ) PARTITION BY RANGE (recorded_at)
+    """)
+
+    # Filet de sécurité : reçoit les fixes hors des partitions journalières
+    op.execute("CREATE TABLE baggage_positions_default PARTITION OF baggage_positions DEFAULT")
+
+    today = datetime.utcnow().date()
+    for offset in range(INITIAL_DAYS + 1):
+        day = today + timedelta(days=offset)
+        op.execute(
+            f"CREATE TABLE baggage_positions_p{day:%Y%m%d} PARTITION OF baggage_positions "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS baggage_positions CASCADE")
@@ -0,0 +1,30 @@
+"""event_outbox : outbox transactionnelle des événements bagages
+
+Revision ID: 8b41d0c5e2a7
+Revises: 3f9c2a1d7b10
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "8b41d0c5e2a7"
+down_revision = "3f9c2a1d7b10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE event_outbox (
+            id BIGSERIAL PRIMARY KEY,
+            event_type VARCHAR(50) NOT NULL,
+            payload JSON NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            sent_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    # Index partiel : le relais ne parcourt que les événements en attente
+    op.execute("CREATE INDEX ix_event_outbox_pending ON event_outbox (id) WHERE sent_at IS NULL")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS event_outbox")
@@ -0,0 +1,21 @@
+"""event_outbox : payload stocké sous forme d'événement encodé
+
+Revision ID: c5e81f3a9d24
+Revises: 8b41d0c5e2a7
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "c5e81f3a9d24"
+down_revision = "8b41d0c5e2a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Le relais publie le texte tel quel : plus de décodage / ré-encodage JSON
+    op.execute("ALTER TABLE event_outbox ALTER COLUMN payload TYPE TEXT USING payload::text")
+
+
+def downgrade():
+    op.execute("ALTER TABLE event_outbox ALTER COLUMN payload TYPE JSON USING payload::json")
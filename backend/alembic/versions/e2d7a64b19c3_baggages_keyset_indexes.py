@@ -0,0 +1,48 @@
+"""baggages : index composites pour la pagination par curseur (created_at, id)
+
+Revision ID: e2d7a64b19c3
+Revises: c5e81f3a9d24
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "e2d7a64b19c3"
+down_revision = "c5e81f3a9d24"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_baggages_created_at_id": "(created_at, id)",
+    "ix_baggages_company_created_at_id": "(company_id, created_at, id)",
+    "ix_baggages_status_created_at_id": "(status, created_at, id)",
+}
+
+
+NOT_NULL_CHECK = "ck_baggages_created_at_not_null"
+
+
+def upgrade():
+    # Le curseur suppose created_at renseigné
+    op.execute("UPDATE baggages SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL")
+    # Chaque instruction dans sa propre transaction : aucun verrou fort n'est
+    # gardé pendant un parcours de la table de plusieurs millions de lignes.
+    with op.get_context().autocommit_block():
+        # NOT VALID : verrou bref, sans parcours ; VALIDATE parcourt la table
+        # sous SHARE UPDATE EXCLUSIVE (lectures et écritures non bloquées)
+        op.execute(
+            f"ALTER TABLE baggages ADD CONSTRAINT {NOT_NULL_CHECK} CHECK (created_at IS NOT NULL) NOT VALID"
+        )
+        op.execute(f"ALTER TABLE baggages VALIDATE CONSTRAINT {NOT_NULL_CHECK}")
+        # PostgreSQL >= 12 s'appuie sur la contrainte validée : pas de second parcours
+        op.execute("ALTER TABLE baggages ALTER COLUMN created_at SET NOT NULL")
+        op.execute(f"ALTER TABLE baggages DROP CONSTRAINT {NOT_NULL_CHECK}")
+        # CONCURRENTLY : pas de verrou d'écriture pendant la construction des index
+        for name, columns in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON baggages {columns}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute("ALTER TABLE baggages ALTER COLUMN created_at DROP NOT NULL")
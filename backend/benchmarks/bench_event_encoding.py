@@ -0,0 +1,95 @@
+"""
+Coût de sérialisation par événement le long du pipeline : dicts ad hoc et
+`json` de la bibliothèque standard vs événements typés (`core/event_schema.py`)
+encodés une fois avec orjson.
+
+    python -m benchmarks.bench_event_encoding [--events 10000]
+
+Chemins comparés, pour un événement GPS puis un statut :
+
+- avant : dict -> json.dumps (publication) -> json.loads + json.dumps
+  (consommateur / outbox) -> json.loads (hub)
+- après : Event -> encode (orjson, une fois) -> octets transmis tels quels
+  -> orjson.loads (hub, nécessaire au filtrage)
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+import time
+import uuid
+
+import orjson
+
+from services.baggage.core.event_schema import GpsEvent, StatusEvent
+
+
+def gps_fields(i: int, company_id: uuid.UUID, start: datetime) -> dict:
+    return {
+        "tag": f"TG{i % 50:06d}",
+        "company_id": company_id,
+        "latitude": round(6.13 + random.uniform(-0.01, 0.01), 7),
+        "longitude": round(1.22 + random.uniform(-0.01, 0.01), 7),
+        "timestamp": start + timedelta(seconds=i),
+        "device_id": f"70B3D57ED00{i % 50:05X}",
+        "battery": random.randint(5, 100),
+    }
+
+
+def legacy_dict(fields: dict) -> dict:
+    # Construction historique : conversions en chaîne faites à la main
+    payload = dict(fields)
+    payload["company_id"] = str(payload["company_id"])
+    payload["timestamp"] = payload["timestamp"].isoformat()
+    return payload
+
+
+def legacy_path(fields: dict) -> None:
+    body = json.dumps(legacy_dict(fields)).encode()
+    relayed = json.dumps(json.loads(body))
+    json.loads(relayed)
+
+
+def typed_path(cls, fields: dict) -> None:
+    body = cls(**fields).encode()
+    orjson.loads(body)
+
+
+def measure(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=10_000)
+    args = parser.parse_args()
+
+    start = datetime(2026, 10, 18, 10, 0, 0)
+    company_id = uuid.uuid4()
+    gps = [gps_fields(i, company_id, start) for i in range(args.events)]
+    statuses = [
+        {"tag": f"TG{i % 50:06d}", "company_id": company_id, "status": "LOADED", "location": "Ramp1",
+         "timestamp": start + timedelta(seconds=i)}
+        for i in range(args.events)
+    ]
+
+    print(f"{args.events} événements, µs par événement")
+    print(f"{'':<22} {'GPS':>8} {'statut':>8}")
+    rows = [
+        ("encodage json", lambda f: json.dumps(legacy_dict(f)).encode(), lambda f: json.dumps(legacy_dict(f)).encode()),
+        ("encodage Event", lambda f: GpsEvent(**f).encode(), lambda f: StatusEvent(**f).encode()),
+        ("chemin complet avant", legacy_path, legacy_path),
+        ("chemin complet après", lambda f: typed_path(GpsEvent, f), lambda f: typed_path(StatusEvent, f)),
+    ]
+    for label, gps_fn, status_fn in rows:
+        print(f"{label:<22} {measure(gps_fn, gps):>8.2f} {measure(status_fn, statuses):>8.2f}")
+
+    sample = GpsEvent(**gps[0]).encode()
+    print(f"taille GPS : json {len(json.dumps(legacy_dict(gps[0])))} o, Event {len(sample)} o")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Pipeline temps réel de bout en bout, sur une seule machine :
+
+- N trackers (trame binaire UDP) -> ingestion -> flux -> hub -> M clients WebSocket
+- statuts publiés -> broker -> consommateur -> flux -> hub -> M clients WebSocket
+
+    python -m benchmarks.bench_pipeline [--trackers 200] [--rate 1] [--clients 20] [--duration 10]
+    python -m benchmarks.bench_pipeline --status-rate 200 --batch-ms 100
+
+Redis et RabbitMQ sont remplacés par les transports en mémoire
+(`BAGGAGE_TRANSPORT=memory`) ; l'API tourne sous uvicorn et les clients sont
+de vrais WebSocket sur la boucle locale. La base n'est pas sollicitée :
+registre des trackers préchargé dans le cache, positions en write-behind
+(flusher non démarré), filtre GPS et limiteur désactivés.
+
+Rapporte la latence émission -> réception client (p50/p90/p99/max) par canal
+et le débit (événements émis/s, trames livrées/s). Trackers, serveur et
+clients partagent un processus et une boucle : à utiliser pour comparer
+deux versions du pipeline, pas comme capacité absolue.
+"""
+import os
+
+os.environ.setdefault("BAGGAGE_TRANSPORT", "memory")
+os.environ.setdefault("GPS_WRITE_BEHIND", "true")
+os.environ.setdefault("GPS_FILTER_ENABLED", "false")
+os.environ.setdefault("INGEST_RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("OTEL_EXPORTER_OTLP_ENABLED", "false")
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timezone
+
+import uvicorn
+import websockets
+
+from services.baggage.main import app
+from services.baggage.core.device_cache import KEY_PREFIX
+from services.baggage.core.event import publisher
+from services.baggage.core.hub import hub
+from services.baggage.core.ingest import ingest_fixes
+from services.baggage.core.tracker_frame import encode_frame
+from services.baggage.core.udp_ingest import UdpIngestServer
+from services.baggage.redis.redis_c import redis_client
+from services.baggage.worker.consumer import EventConsumer
+
+# Les fixes portent un horodatage synthétique : BASE_TS + numéro d'émission.
+# BASE_TS est pris une heure avant le lancement : l'ingestion rejette les fixes
+# plus anciens que INGEST_MAX_FIX_AGE_SECONDS et ramène à l'heure de réception
+# ceux trop en avance, ce qui fausserait l'appariement émission / réception.
+BASE_TS = int(time.time()) - 3600
+
+
+class Recorder:
+    def __init__(self):
+        self.sent: dict = {}
+        self.latencies = {"gps": [], "status": []}
+        self.frames = 0
+
+    def observe(self, event: dict, now: float) -> None:
+        if "device_id" in event:
+            ts = int(datetime.fromisoformat(event["timestamp"]).replace(tzinfo=timezone.utc).timestamp())
+            key, channel = (event["device_id"], ts - BASE_TS), "gps"
+        elif "bench_seq" in event:
+            key, channel = ("status", event["bench_seq"]), "status"
+        else:
+            return
+        sent_at = self.sent.get(key)
+        if sent_at is not None:
+            self.latencies[channel].append(now - sent_at)
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def tracker(device_id: str, rate: float, stop_at: float, sock, address, recorder: Recorder) -> int:
+    await asyncio.sleep(random.random() / rate)
+    seq = 0
+    while time.perf_counter() < stop_at:
+        seq += 1
+        payload = encode_frame(device_id, [(6.13 + seq * 1e-4, 1.22, BASE_TS + seq, 80)])
+        recorder.sent[(device_id, seq)] = time.perf_counter()
+        sock.sendto(payload, address)
+        await asyncio.sleep(1 / rate)
+    return seq
+
+
+async def status_producer(rate: float, stop_at: float, recorder: Recorder) -> int:
+    seq = 0
+    while time.perf_counter() < stop_at:
+        seq += 1
+        recorder.sent[("status", seq)] = time.perf_counter()
+        await publisher.publish("status", {"tag": f"BENCH-{seq % 100}", "status": "LOADED", "bench_seq": seq})
+        await asyncio.sleep(1 / rate)
+    return seq
+
+
+async def client(url: str, recorder: Recorder, connected: list, expected: int, ready: asyncio.Event) -> None:
+    async with websockets.connect(url, max_size=None) as ws:
+        connected.append(ws)
+        if len(connected) == expected:
+            ready.set()
+        async for raw in ws:
+            now = time.perf_counter()
+            recorder.frames += 1
+            payload = json.loads(raw)
+            for event in payload if isinstance(payload, list) else [payload]:
+                recorder.observe(event, now)
+
+
+async def run(args) -> None:
+    company_id = uuid.uuid4()
+    devices = [f"bench-{i:05d}" for i in range(args.trackers)]
+    for index, device_id in enumerate(devices):
+        await redis_client.set(KEY_PREFIX + device_id, f"{uuid.uuid4()}|BENCH-{index:05d}|{company_id}")
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    hub.start()
+    publisher.start()
+    consumer = asyncio.create_task(EventConsumer(redis_client).run())
+
+    async def handler(fixes):
+        await ingest_fixes(None, fixes, source="udp", rate_limit=False)
+
+    udp = UdpIngestServer(handler=handler)
+    address = await udp.start("127.0.0.1", 0)
+
+    recorder = Recorder()
+    query = f"?batch_ms={args.batch_ms}" if args.batch_ms else ""
+    url = f"ws://127.0.0.1:{port}/ws/baggages/stream{query}"
+    ready = asyncio.Event()
+    connected = []
+    clients = [asyncio.create_task(client(url, recorder, connected, args.clients, ready)) for _ in range(args.clients)]
+    await asyncio.wait_for(ready.wait(), 10)
+    await asyncio.sleep(0.2)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    producers = [tracker(device_id, args.rate, stop_at, sock, address, recorder) for device_id in devices]
+    if args.status_rate:
+        producers.append(status_producer(args.status_rate, stop_at, recorder))
+    await asyncio.gather(*producers)
+
+    # Vidange : on attend les derniers événements (au plus 5 s)
+    expected = len(recorder.sent) * args.clients
+    deadline = time.perf_counter() + 5
+    while sum(map(len, recorder.latencies.values())) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+
+    sent_gps = sum(1 for key in recorder.sent if key[0] != "status")
+    sent_status = len(recorder.sent) - sent_gps
+    print(f"{args.trackers} trackers x {args.rate}/s, {args.status_rate} statuts/s, {args.clients} clients, {args.duration}s"
+          + (f", batch {args.batch_ms} ms" if args.batch_ms else ""))
+    print(f"{'canal':<8} {'émis':>8} {'reçus':>10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for channel, sent in (("gps", sent_gps), ("status", sent_status)):
+        if not sent:
+            continue
+        values = recorder.latencies[channel]
+        # Canal émis mais jamais livré : affiché, pas masqué
+        if not values:
+            print(f"{channel:<8} {sent:>8} {0:>10} " + " ".join(f"{'-':>8}" for _ in range(4)))
+            continue
+        print(
+            f"{channel:<8} {sent:>8} {len(values):>10} "
+            + " ".join(f"{percentile(values, p) * 1000:>8.1f}" for p in (0.5, 0.9, 0.99))
+            + f" {max(values) * 1000:>8.1f}"
+        )
+    delivered = sum(map(len, recorder.latencies.values()))
+    print(f"débit : {len(recorder.sent) / args.duration:.0f} événements/s émis, "
+          f"{delivered / elapsed:.0f} livraisons/s, {recorder.frames / elapsed:.0f} trames/s "
+          f"({delivered}/{expected} livraisons attendues)")
+
+    sock.close()
+    for ws in connected:
+        await ws.close()
+    await asyncio.gather(*clients, return_exceptions=True)
+    await udp.stop()
+    consumer.cancel()
+    await asyncio.gather(consumer, return_exceptions=True)
+    await publisher.stop()
+    await hub.stop()
+    server.should_exit = True
+    await server_task
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trackers", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=1.0, help="fixes par seconde et par tracker")
+    parser.add_argument("--status-rate", type=float, default=20.0, help="statuts publiés par seconde (0 : aucun)")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch-ms", type=int, default=0, help="trames regroupées côté serveur (?batch_ms=)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
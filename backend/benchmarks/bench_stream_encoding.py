@@ -0,0 +1,91 @@
+"""
+Taille des trames et coût d'encodage du flux temps réel : JSON vs MessagePack,
+avec et sans compression deflate, et encodage par client vs partagé par le hub.
+
+    python -m benchmarks.bench_stream_encoding [--events 200] [--clients 500]
+
+La compression reproduit permessage-deflate (zlib brut, fenêtre 15 bits,
+contexte conservé entre les trames d'une même connexion).
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+import timeit
+import uuid
+import zlib
+
+import msgpack
+
+from services.baggage.core.hub import build_message, MSGPACK
+from services.baggage.core.coalesce import Coalescer
+
+
+def build_events(count: int) -> list[str]:
+    start = datetime(2025, 1, 1, 10, 0, 0)
+    company_id = str(uuid.uuid4())
+    events = []
+    for i in range(count):
+        events.append(json.dumps({
+            "tag": f"TG{i % 50:06d}",
+            "company_id": company_id,
+            "device_id": f"70B3D57ED00{i % 50:05X}",
+            "latitude": round(6.13 + random.uniform(-0.01, 0.01), 7),
+            "longitude": round(1.22 + random.uniform(-0.01, 0.01), 7),
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "battery": random.randint(5, 100),
+        }))
+    return events
+
+
+def deflated_size(frames) -> int:
+    compressor = zlib.compressobj(wbits=-15)
+    return sum(len(compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)) for frame in frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = build_events(args.events)
+    messages = [build_message("baggage.gps", data, f"{i + 1}-0") for i, data in enumerate(raw)]
+
+    json_frames = [message.data.encode() for message in messages]
+    msgpack_frames = [message.packed for message in messages]
+    batch = Coalescer()
+    for i, data in enumerate(raw):
+        # Canal non GPS : on mesure l'encodage, pas la fusion par tag
+        batch.add(build_message("baggage.scan", data, f"{i + 1}-0"))
+    json_batch = batch.frame().encode()
+    msgpack_batch = batch.frame(MSGPACK)
+
+    print(f"{args.events} événements GPS")
+    rows = {
+        "JSON, 1 trame/événement": json_frames,
+        "MessagePack, 1 trame/événement": msgpack_frames,
+        "JSON, trame regroupée": [json_batch],
+        "MessagePack, trame regroupée": [msgpack_batch],
+    }
+    for name, frames in rows.items():
+        size = sum(map(len, frames))
+        print(f"  {name:<32}: {size:>8} B brut  {deflated_size(frames):>8} B deflate  ({size / args.events:.1f} B/évt brut)")
+
+    events = [message.event for message in messages]
+    per_client = lambda: [msgpack.packb(event) for _ in range(args.clients) for event in events]
+
+    def shared():
+        fresh = [build_message("baggage.gps", data, f"{i + 1}-0") for i, data in enumerate(raw)]
+        for _ in range(args.clients):
+            for message in fresh:
+                message.packed
+
+    for name, fn in {"msgpack par client": per_client, "msgpack partagé (hub)": shared}.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"  {name:<24}: {best * 1e3:>8.2f} ms pour {args.clients} clients")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Coût de décodage et taille de payload : JSON vs trame binaire des trackers.
+
+    python -m benchmarks.bench_tracker_frame [--devices 50] [--fixes 10]
+
+Le chemin JSON mesuré est celui de `/trackers/ingest/batch`
+(`json.loads` puis validation Pydantic de `list[TrackerFix]`).
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+import timeit
+
+from pydantic import TypeAdapter
+
+from services.baggage.schemas.tracker import TrackerFix
+from services.baggage.core.tracker_frame import encode_frame, decode_frames
+
+
+def build_payloads(devices: int, fixes_per_device: int):
+    start = datetime(2025, 1, 1, 10, 0, 0)
+    items = []
+    frames = bytearray()
+    for d in range(devices):
+        device_id = f"70B3D57ED00{d:05X}"
+        fixes = []
+        for i in range(fixes_per_device):
+            lat = round(6.13 + random.uniform(-0.01, 0.01), 7)
+            lon = round(1.22 + random.uniform(-0.01, 0.01), 7)
+            ts = start + timedelta(seconds=30 * i)
+            battery = random.randint(5, 100)
+            fixes.append((lat, lon, ts, battery))
+            items.append({"device_id": device_id, "lat": lat, "lon": lon, "ts": ts.isoformat() + "Z", "battery": battery})
+        frames += encode_frame(device_id, fixes)
+    return json.dumps(items).encode(), bytes(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--fixes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    json_body, frame_body = build_payloads(args.devices, args.fixes)
+    total = args.devices * args.fixes
+    adapter = TypeAdapter(list[TrackerFix])
+
+    cases = {
+        "json.loads + pydantic": lambda: adapter.validate_python(json.loads(json_body)),
+        "binary frame": lambda: decode_frames(frame_body),
+    }
+
+    print(f"{total} fixes ({args.devices} devices x {args.fixes})")
+    print(f"  payload JSON   : {len(json_body):>8} bytes ({len(json_body) / total:.1f} B/fix)")
+    print(f"  payload binary : {len(frame_body):>8} bytes ({len(frame_body) / total:.1f} B/fix)")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=5)) / args.repeat
+        print(f"  {name:<24}: {best * 1e6:>9.1f} us/batch  {best / total * 1e9:>8.0f} ns/fix")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Coût CPU par fix de la couche transport : UDP vs HTTP (FastAPI).
+
+    python -m benchmarks.bench_udp_ingest [--fixes 5000]
+
+Le pipeline commun (`ingest_fixes` : base, Redis) est remplacé par un
+compteur dans les deux cas : seule la réception, le décodage et la
+validation sont mesurés (limitation de débit désactivée). Le client tourne
+dans le même processus, son coût est donc inclus des deux côtés. Un fix par
+requête / datagramme.
+"""
+import os
+
+os.environ.setdefault("INGEST_RATE_LIMIT_ENABLED", "false")
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+from unittest.mock import patch
+
+from httpx import AsyncClient, ASGITransport
+
+from libs.common.database import get_db
+from services.baggage.main import app
+from services.baggage.core.udp_ingest import UdpIngestServer
+from services.baggage.core.tracker_frame import encode_frame
+
+
+async def bench_udp(n: int, binary: bool) -> tuple[float, int]:
+    done = asyncio.Event()
+    count = 0
+
+    async def handler(fixes):
+        nonlocal count
+        count += len(fixes)
+        if count >= n:
+            done.set()
+
+    server = UdpIngestServer(handler=handler, queue_size=n, batch_size=500)
+    host, port = await server.start("127.0.0.1", 0)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    payloads = [
+        encode_frame(f"dev-{i % 100}", [(6.13, 1.22, 1735725600 + i, 80)]) if binary
+        else json.dumps({"device_id": f"dev-{i % 100}", "lat": 6.13, "lon": 1.22}).encode()
+        for i in range(n)
+    ]
+
+    start = time.process_time()
+    for payload in payloads:
+        sock.sendto(payload, (host, port))
+        # asyncio lit un datagramme par itération de boucle : on cède la main
+        # à chaque envoi pour ne pas faire déborder le buffer noyau
+        await asyncio.sleep(0)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=10)
+    except asyncio.TimeoutError:
+        pass
+    cpu = time.process_time() - start
+
+    sock.close()
+    await server.stop()
+    return cpu, count
+
+
+async def bench_http(n: int) -> tuple[float, int]:
+    count = 0
+
+    async def stub(db, fixes, source="tracker", client_ip=None):
+        nonlocal count
+        count += len(fixes)
+        return [{"index": 0, "device_id": f.device_id, "status": "ok", "baggage_tag": "BG-BENCH"} for f in fixes]
+
+    app.dependency_overrides[get_db] = lambda: None
+    with patch("services.baggage.routers.trackers.ingest_fixes", stub):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            start = time.process_time()
+            for i in range(n):
+                await client.post("/trackers/ingest", json={"device_id": f"dev-{i % 100}", "lat": 6.13, "lon": 1.22})
+            cpu = time.process_time() - start
+    app.dependency_overrides.clear()
+    return cpu, count
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixes", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = {
+        "HTTP JSON": await bench_http(args.fixes),
+        "UDP JSON": await bench_udp(args.fixes, binary=False),
+        "UDP binary": await bench_udp(args.fixes, binary=True),
+    }
+    for name, (cpu, count) in results.items():
+        per_fix = cpu / count * 1e6 if count else float("nan")
+        print(f"{name:<12}: {count:>6}/{args.fixes} fixes  {per_fix:>8.1f} us CPU/fix")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,5 +15,6 @@ echo "Launching Uvicorn server..."
 exec uvicorn "$SERVICE_NAME.main:app" \
     --host 0.0.0.0 \
     --port 8000 \
+    --ws-per-message-deflate true \
     --proxy-headers \
     --forwarded-allow-ips="*"
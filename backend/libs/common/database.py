@@ -12,12 +12,19 @@ else:
         f"{settings.DATABASE_PORT}/{settings.DATABASE_NAME}"
     )
 
+# Pool borné (QueuePool) ; SQLite utilise son propre pool, sans ces réglages
+pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": settings.DATABASE_POOL_SIZE,
+    "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+}
+
 # Engine
 engine = create_async_engine(
     DATABASE_URL,
     future=True,
     echo=False,
     pool_pre_ping=True,
+    **pool_options,
 )
 
 # Session factory
@@ -1,33 +1,94 @@
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, insert, values, column, bindparam, or_, Float, DateTime
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from libs.common.config import settings
 from .models.bag import Baggage
 from .models.baggage_event import BaggageEvent
 from .core.enums import BaggageStatus
 import uuid
 
 from .models.scan_log import ScanLog
-from .core.utils import generate_qr_code
+from .models.tracker_device import TrackerDevice
+from .models.baggage_position import BaggagePosition
+from .core.outbox import enqueue_event
+from .core.event_schema import StatusEvent
+from .core.counters import record_created, record_scan, record_status_change
 
 
-async def create_baggage(db: AsyncSession, payload):
-    tag = f"BG-{uuid.uuid4().hex[:10].upper()}"
-    qr = generate_qr_code(tag)
+def new_tag() -> str:
+    return f"BG-{uuid.uuid4().hex[:10].upper()}"
+
 
+async def create_baggage(db: AsyncSession, payload):
+    # QR code rendu au premier téléchargement (`core/qr.py`), pas à l'enregistrement
     baggage = Baggage(
-        tag=tag,
+        tag=new_tag(),
         owner_id=payload.owner_id,
         company_id=payload.company_id,
         description=payload.description,
         weight=payload.weight,
         status=BaggageStatus.CHECKED_IN,
-        qr_code_path=qr
     )
     db.add(baggage)
     await db.commit()
     await db.refresh(baggage)
+    await record_created(1, baggage.status, baggage.created_at)
     return baggage
 
 
+# Colonnes écrites par l'enregistrement groupé (ordre des enregistrements COPY)
+BULK_COLUMNS = ("id", "tag", "owner_id", "company_id", "description", "weight", "status", "created_at")
+
+
+async def create_baggages_bulk(db: AsyncSession, payloads) -> list[dict]:
+    """
+    Enregistre plusieurs bagages en un aller-retour et un commit.
+
+    Identifiants et tags sont attribués côté application en une passe ; les
+    QR codes sont rendus au premier téléchargement.
+    Sous PostgreSQL, au-delà de `CHECKIN_COPY_MIN_ROWS` lignes, insertion par
+    `COPY` (asyncpg `copy_records_to_table`) ; sinon un INSERT multi-lignes.
+    Retourne les lignes insérées (dicts compatibles `BaggageOut`).
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "tag": new_tag(),
+            "owner_id": payload.owner_id,
+            "company_id": payload.company_id,
+            "description": payload.description,
+            "weight": payload.weight,
+            "status": BaggageStatus.CHECKED_IN,
+            "created_at": now,
+        }
+        for payload in payloads
+    ]
+
+    if db.bind.dialect.name == "postgresql" and len(rows) >= settings.CHECKIN_COPY_MIN_ROWS:
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Baggage.__tablename__,
+            columns=BULK_COLUMNS,
+            # L'enum PostgreSQL stocke le nom du membre
+            records=[
+                tuple(row[c].name if c == "status" else row[c] for c in BULK_COLUMNS)
+                for row in rows
+            ],
+        )
+    else:
+        await db.execute(insert(Baggage), rows)
+    await db.commit()
+    await record_created(len(rows), BaggageStatus.CHECKED_IN, now)
+
+    for row in rows:
+        row["qr_code_path"] = None
+    return rows
+
+
 async def log_scan(db: AsyncSession, baggage_id: str, user_id: str, location: str, device_info: str | None):
     scan = ScanLog(
         baggage_id=baggage_id,
@@ -38,19 +99,31 @@ async def log_scan(db: AsyncSession, baggage_id: str, user_id: str, location: st
     db.add(scan)
     await db.commit()
     await db.refresh(scan)
+    await record_scan(scan.timestamp)
     return scan
 
 
 async def update_baggage_status(db: AsyncSession, baggage: Baggage, status: BaggageStatus, location: str):
+    previous = baggage.status
     baggage.status = status
     event = BaggageEvent(
         baggage_id=baggage.id,
         status=status,
-        location=location
+        location=location,
+        timestamp=datetime.utcnow(),
     )
     db.add(event)
+    # Publication via l'outbox : validée ou annulée avec le changement de statut
+    enqueue_event(db, StatusEvent(
+        tag=baggage.tag,
+        company_id=baggage.company_id,
+        status=status,
+        location=location,
+        timestamp=event.timestamp,
+    ))
     await db.commit()
     await db.refresh(baggage)
+    await record_status_change(previous, status)
     return baggage
 
 async def get_baggage(db: AsyncSession, tag: str) -> Baggage | None:
@@ -64,6 +137,117 @@ async def list_baggages_for_user(db: AsyncSession, user_id: str):
 
 async def get_baggage_by_device(db, device_id: str):
     result = await db.execute(
-        select(Baggage).where(Baggage.tracker_device_id == device_id)
+        select(Baggage)
+        .join(TrackerDevice, TrackerDevice.baggage_id == Baggage.id)
+        .where(TrackerDevice.device_id == device_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_baggages_by_devices(db: AsyncSession, device_ids) -> dict:
+    """
+    Résout plusieurs trackers en une seule requête sur le registre.
+    Retourne un dict device_id -> (baggage_id, tag, company_id) ; les devices inconnus sont absents.
+    """
+    if not device_ids:
+        return {}
+    result = await db.execute(
+        select(TrackerDevice.device_id, TrackerDevice.baggage_id, Baggage.tag, Baggage.company_id)
+        .join(Baggage, Baggage.id == TrackerDevice.baggage_id)
+        .where(TrackerDevice.device_id.in_(set(device_ids)))
+    )
+    return {device_id: (baggage_id, tag, company_id) for device_id, baggage_id, tag, company_id in result.all()}
+
+
+async def get_tracker_device(db: AsyncSession, device_id: str) -> TrackerDevice | None:
+    q = await db.execute(select(TrackerDevice).where(TrackerDevice.device_id == device_id))
+    return q.scalars().first()
+
+
+async def pair_device(db: AsyncSession, device_id: str, baggage: Baggage) -> TrackerDevice:
+    device = TrackerDevice(device_id=device_id, baggage_id=baggage.id)
+    db.add(device)
+    await db.commit()
+    await db.refresh(device)
+    return device
+
+
+async def unpair_device(db: AsyncSession, device: TrackerDevice) -> None:
+    await db.delete(device)
+    await db.commit()
+
+
+async def bulk_update_positions(db: AsyncSession, positions) -> None:
+    """
+    Applique plusieurs positions GPS en un seul aller-retour.
+
+    `positions` est une liste de tuples (baggage_id, latitude, longitude, seen_at),
+    au plus un par bagage. Sous PostgreSQL : un seul `UPDATE ... FROM (VALUES ...)`.
+    Les autres dialectes (SQLite des tests) passent par un UPDATE exécuté par lot.
+    Une position plus ancienne que `last_seen_at` (fix arrivé dans le désordre,
+    position bufferisée) n'écrase pas la plus récente.
+    Ne commit pas : l'appelant décide de la transaction.
+    """
+    if not positions:
+        return
+
+    if db.bind.dialect.name == "postgresql":
+        rows = values(
+            column("id", UUID(as_uuid=True)),
+            column("lat", Float),
+            column("lon", Float),
+            column("seen_at", DateTime),
+            name="v",
+        ).data(positions)
+        await db.execute(
+            update(Baggage)
+            .where(
+                Baggage.id == rows.c.id,
+                or_(Baggage.last_seen_at.is_(None), Baggage.last_seen_at < rows.c.seen_at),
+            )
+            .values(
+                last_latitude=rows.c.lat,
+                last_longitude=rows.c.lon,
+                last_seen_at=rows.c.seen_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # Table (et non entité) : UPDATE exécuté par lot avec sa propre clause WHERE
+        baggages = Baggage.__table__
+        await db.execute(
+            update(baggages)
+            .where(
+                baggages.c.id == bindparam("b_id"),
+                or_(baggages.c.last_seen_at.is_(None), baggages.c.last_seen_at < bindparam("b_seen_at")),
+            )
+            .values(
+                last_latitude=bindparam("b_lat"),
+                last_longitude=bindparam("b_lon"),
+                last_seen_at=bindparam("b_seen_at"),
+            ),
+            [
+                {"b_id": baggage_id, "b_lat": lat, "b_lon": lon, "b_seen_at": seen_at}
+                for baggage_id, lat, lon, seen_at in positions
+            ],
+        )
+
+
+async def append_position_history(db: AsyncSession, rows) -> None:
+    """
+    Ajoute les fixes (tuples baggage_id, latitude, longitude, recorded_at)
+    à l'historique `baggage_positions` en une seule instruction multi-lignes.
+    Les doublons exacts (même bagage, même horodatage) sont ignorés.
+    Ne commit pas : l'appelant décide de la transaction.
+    """
+    if not rows:
+        return
+
+    dialect_insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    await db.execute(
+        dialect_insert(BaggagePosition).on_conflict_do_nothing(),
+        [
+            {"baggage_id": baggage_id, "latitude": lat, "longitude": lon, "recorded_at": recorded_at}
+            for baggage_id, lat, lon, recorded_at in rows
+        ],
     )
-    return result.scalar_one_or_none()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import struct
+
+from .hub import HubMessage, MSGPACK
+from .event_schema import GpsEvent
+
+GPS_CHANNEL = GpsEvent.channel
+
+
+class Coalescer:
+    """
+    Lot d'événements en attente d'envoi pour une connexion.
+
+    Les événements GPS d'un même tag se remplacent : seule la dernière position
+    de la fenêtre est conservée, à la place de son arrivée la plus récente.
+    Tous les autres événements (scans, statuts) sont conservés dans l'ordre.
+    """
+
+    def __init__(self):
+        self._items: dict[object, HubMessage] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, message: HubMessage) -> None:
+        event = message.event
+        if message.channel == GPS_CHANNEL and isinstance(event, dict) and isinstance(event.get("tag"), str):
+            key = ("gps", event["tag"])
+            # Réinsertion en fin de dict : l'ordre suit la position la plus récente
+            self._items.pop(key, None)
+        else:
+            key = self._seq
+            self._seq += 1
+        self._items[key] = message
+
+    def frame(self, fmt: str = "json") -> str | bytes:
+        """
+        Tableau des événements du lot. Les encodages partagés de chaque message
+        sont concaténés sans re-sérialisation (JSON ou MessagePack).
+        """
+        messages = self._items.values()
+        if fmt == MSGPACK:
+            return msgpack_array_header(len(messages)) + b"".join(message.packed for message in messages)
+        return "[" + ",".join(
+            message.data if message.event is not None else json.dumps(message.data) for message in messages
+        ) + "]"
+
+
+def msgpack_array_header(size: int) -> bytes:
+    # En-tête de tableau MessagePack (fixarray, array 16 ou array 32)
+    if size < 16:
+        return bytes((0x90 | size,))
+    if size < 0x10000:
+        return struct.pack(">BH", 0xDC, size)
+    return struct.pack(">BI", 0xDD, size)
+
+
+async def next_batch(subscription, window: float, max_events: int) -> Coalescer:
+    """
+    Attend un premier événement puis regroupe ceux qui arrivent pendant
+    `window` secondes, dans la limite de `max_events` entrées.
+    """
+    queue = subscription.queue
+    batch = Coalescer()
+    batch.add(await queue.get())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + window
+    while len(batch) < max_events:
+        try:
+            batch.add(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.add(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
@@ -0,0 +1,252 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+import asyncio
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from libs.common.config import settings
+from ..redis.redis_c import redis_client
+from ..models.bag import Baggage
+from ..models.scan_log import ScanLog
+
+logger = logging.getLogger("baggage-counters")
+
+# statut -> nombre de bagages (hash)
+STATUS_KEY = "baggage:counters:status"
+# un compteur par minute (clé préfixe + index de minute epoch), expirant après la fenêtre
+CREATED_PREFIX = "baggage:counters:created:"
+SCANS_PREFIX = "baggage:counters:scans:"
+# cumul par heure (préfixe + index d'heure epoch), incrémenté avec la minute
+CREATED_HOUR_PREFIX = "baggage:counters:created:hour:"
+SCANS_HOUR_PREFIX = "baggage:counters:scans:hour:"
+
+WINDOW_MINUTES = 24 * 60
+
+
+def minute_index(at: datetime) -> int:
+    """
+    Index de minute epoch d'un horodatage (naïf = UTC, comme en base).
+    """
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return int(at.timestamp()) // 60
+
+
+def _bucket_ttl() -> int:
+    # La fenêtre plus une marge : une minute n'expire qu'une fois sortie de la fenêtre
+    return (WINDOW_MINUTES + settings.COUNTERS_BUCKET_GRACE_MINUTES) * 60
+
+
+def _hour_ttl() -> int:
+    # Une heure sort de la fenêtre une heure après sa première minute
+    return _bucket_ttl() + 3600
+
+
+def _window(current: int) -> tuple[range, list[int], range]:
+    """
+    Découpe la fenêtre de 24 h finissant à la minute `current` :
+    (minutes de la fenêtre, minutes lues une à une, heures lues en cumul).
+    Seules les heures entièrement dans la fenêtre sont lues en cumul ;
+    l'heure de début (partielle) et l'heure courante le sont par minute.
+    """
+    minutes = range(current - WINDOW_MINUTES + 1, current + 1)
+    first_hour = -(-minutes[0] // 60)
+    current_hour = current // 60
+    edges = [*range(minutes[0], first_hour * 60), *range(current_hour * 60, current + 1)]
+    return minutes, edges, range(first_hour, current_hour)
+
+
+def _status_name(status) -> str:
+    return getattr(status, "value", status)
+
+
+# -------------------------------
+# MISE À JOUR INCRÉMENTALE
+# -------------------------------
+async def _apply(queue) -> None:
+    """
+    Exécute les incréments dans un pipeline. Appelé après le commit : une
+    erreur Redis (ou plus de `COUNTERS_UPDATE_TIMEOUT_SECONDS`) est
+    journalisée sans faire échouer ni ralentir la requête ; l'écart est
+    corrigé par la réconciliation (`reconcile_counters`).
+    """
+    async def execute():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            queue(pipe)
+            await pipe.execute()
+
+    try:
+        await asyncio.wait_for(execute(), settings.COUNTERS_UPDATE_TIMEOUT_SECONDS)
+    except Exception:
+        logger.warning("Baggage counters not updated", exc_info=True)
+
+
+def _increment(pipe, minute_prefix: str, hour_prefix: str, minute: int, count: int) -> None:
+    minute_key, hour_key = f"{minute_prefix}{minute}", f"{hour_prefix}{minute // 60}"
+    pipe.incrby(minute_key, count)
+    pipe.expire(minute_key, _bucket_ttl())
+    pipe.incrby(hour_key, count)
+    pipe.expire(hour_key, _hour_ttl())
+
+
+async def record_created(count: int, status, at: datetime) -> None:
+    minute = minute_index(at)
+
+    def queue(pipe):
+        pipe.hincrby(STATUS_KEY, _status_name(status), count)
+        _increment(pipe, CREATED_PREFIX, CREATED_HOUR_PREFIX, minute, count)
+    await _apply(queue)
+
+
+async def record_status_change(old, new) -> None:
+    if _status_name(old) == _status_name(new):
+        return
+
+    def queue(pipe):
+        if old is not None:
+            pipe.hincrby(STATUS_KEY, _status_name(old), -1)
+        pipe.hincrby(STATUS_KEY, _status_name(new), 1)
+    await _apply(queue)
+
+
+async def record_scan(at: datetime) -> None:
+    minute = minute_index(at)
+
+    def queue(pipe):
+        _increment(pipe, SCANS_PREFIX, SCANS_HOUR_PREFIX, minute, 1)
+    await _apply(queue)
+
+
+# -------------------------------
+# LECTURE
+# -------------------------------
+async def _snapshot(minutes, hours) -> tuple[dict, dict, dict]:
+    """
+    Valeurs brutes en un aller-retour : hash des statuts, puis pour les
+    créations et les scans les compteurs des `minutes` et les cumuls des
+    `hours` demandées ({"minutes": {index: n}, "hours": {index: n}}).
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(STATUS_KEY)
+        for minute_prefix, hour_prefix in ((CREATED_PREFIX, CREATED_HOUR_PREFIX), (SCANS_PREFIX, SCANS_HOUR_PREFIX)):
+            pipe.mget([f"{minute_prefix}{m}" for m in minutes] + [f"{hour_prefix}{h}" for h in hours])
+        by_status, *buckets = await pipe.execute()
+
+    def split(values) -> dict:
+        return {
+            "minutes": {m: int(v) for m, v in zip(minutes, values[:len(minutes)]) if v},
+            "hours": {h: int(v) for h, v in zip(hours, values[len(minutes):]) if v},
+        }
+    created, scans = (split(values) for values in buckets)
+    return {status: int(count) for status, count in by_status.items()}, created, scans
+
+
+def _total(counts: dict) -> int:
+    return sum(counts["minutes"].values()) + sum(counts["hours"].values())
+
+
+async def read_counters(now: datetime | None = None) -> dict:
+    """
+    Métriques du tableau de bord admin en un aller-retour Redis : compte par
+    statut et créations / scans des 24 dernières heures, sommés depuis les
+    cumuls horaires complets et les minutes des deux heures partielles
+    (environ 140 clés par compteur au lieu de 1440).
+    Coût constant, indépendant de la taille des tables.
+    """
+    _, edges, hours = _window(minute_index(now or datetime.utcnow()))
+    by_status, created, scans = await _snapshot(edges, hours)
+    return {
+        "created_last_24h": _total(created),
+        "scans_last_24h": _total(scans),
+        "by_status": {status: count for status, count in by_status.items() if count},
+    }
+
+
+# -------------------------------
+# RÉCONCILIATION
+# -------------------------------
+def _truncate_minute(column, dialect: str):
+    # date_trunc sous PostgreSQL ; équivalent texte pour SQLite (tests)
+    if dialect == "postgresql":
+        return func.date_trunc("minute", column)
+    return func.strftime("%Y-%m-%d %H:%M:00", column)
+
+
+async def _minute_counts(db: AsyncSession, column, since: datetime) -> dict[int, int]:
+    """
+    Nombre de lignes par minute depuis `since`, agrégé en SQL (une ligne
+    par minute renvoyée, au plus 1440).
+    """
+    minute = _truncate_minute(column, db.bind.dialect.name).label("minute")
+    rows = await db.execute(select(minute, func.count()).where(column >= since).group_by(minute))
+    return {
+        minute_index(datetime.fromisoformat(at) if isinstance(at, str) else at): count
+        for at, count in rows.all()
+    }
+
+
+async def reconcile_counters(db: AsyncSession, now: datetime | None = None) -> dict:
+    """
+    Recalcule les compteurs depuis les tables sources : compte par statut et
+    créations / scans par minute de la fenêtre de 24 h (`GROUP BY` en SQL),
+    dont sont déduits les cumuls horaires des heures entièrement couvertes.
+
+    Redis n'est pas réécrit : l'écart (valeur source - valeur lue avant la
+    requête SQL) est ajouté par `HINCRBY` / `INCRBY` dans une transaction
+    (MULTI). Les incréments arrivés pendant la réconciliation sont donc
+    conservés au lieu d'être écrasés ; une ligne validée entre la lecture
+    Redis et la requête SQL peut être comptée deux fois, écart corrigé à la
+    réconciliation suivante.
+
+    Retourne l'écart corrigé par compteur, journalisé : un écart non nul
+    signale des incréments perdus.
+    """
+    now = now or datetime.utcnow()
+    current = minute_index(now)
+    minutes, _, full_hours = _window(current)
+    # Cumuls relus par `read_counters` maintenant ou plus tard (heure courante comprise)
+    hours = range(full_hours.start, current // 60 + 1)
+    since = datetime.fromtimestamp(minutes[0] * 60, timezone.utc).replace(tzinfo=None)
+
+    before_status, before_created, before_scans = await _snapshot(minutes, hours)
+
+    rows = await db.execute(select(Baggage.status, func.count()).group_by(Baggage.status))
+    by_status = {_status_name(status): count for status, count in rows.all() if status is not None}
+    created = await _minute_counts(db, Baggage.created_at, since)
+    scans = await _minute_counts(db, ScanLog.timestamp, since)
+
+    drift = {
+        "created_last_24h": sum(created.values()) - sum(before_created["minutes"].values()),
+        "scans_last_24h": sum(scans.values()) - sum(before_scans["minutes"].values()),
+    }
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for status in set(by_status) | set(before_status):
+            delta = by_status.get(status, 0) - before_status.get(status, 0)
+            if delta:
+                pipe.hincrby(STATUS_KEY, status, delta)
+                drift[f"status:{status}"] = delta
+        for minute_prefix, hour_prefix, counts, before in (
+            (CREATED_PREFIX, CREATED_HOUR_PREFIX, created, before_created),
+            (SCANS_PREFIX, SCANS_HOUR_PREFIX, scans, before_scans),
+        ):
+            by_hour = defaultdict(int)
+            for m, count in counts.items():
+                by_hour[m // 60] += count
+            for prefix, ttl, source, cached in (
+                (minute_prefix, _bucket_ttl(), counts, before["minutes"]),
+                (hour_prefix, _hour_ttl(), {h: by_hour[h] for h in hours if by_hour[h]}, before["hours"]),
+            ):
+                for index in set(source) | set(cached):
+                    delta = source.get(index, 0) - cached.get(index, 0)
+                    if delta:
+                        pipe.incrby(f"{prefix}{index}", delta)
+                        pipe.expire(f"{prefix}{index}", ttl)
+        await pipe.execute()
+
+    if any(drift.values()):
+        logger.warning("Baggage counters drift corrected: %s", drift)
+    else:
+        logger.info("Baggage counters consistent with source tables")
+    return drift
@@ -0,0 +1,144 @@
+from collections import OrderedDict
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from libs.common.config import settings
+from ..redis.redis_c import redis_client
+from ..baggage_service import get_baggages_by_devices
+
+# Format v2 ("baggage_id|tag|company_id") : préfixe changé pour ignorer les anciennes entrées
+KEY_PREFIX = "tracker:device:v2:"
+# Génération par device, incrémentée à chaque invalidation
+GENERATION_PREFIX = "tracker:device:gen:"
+# Marqueur de device inconnu (cache négatif), pour ne pas relire la base à chaque fix
+UNKNOWN = ""
+UNKNOWN_TTL_SECONDS = 30
+
+# Réécriture du cache après lecture en base, seulement si le device n'a pas été
+# invalidé entre-temps. Pour chaque device i : KEYS[2i-1] = entrée du cache,
+# KEYS[2i] = génération ; ARGV[3i-2] = génération lue avant la requête ("" si
+# absente), ARGV[3i-1] = valeur, ARGV[3i] = TTL en secondes.
+# Retourne 1 (écrit) ou 0 (invalidé pendant la requête) par device.
+FILL_LUA = """
+-- baggage:device-cache-fill
+local result = {}
+for i = 1, #KEYS / 2 do
+    local generation = redis.call('GET', KEYS[i * 2]) or ''
+    if generation == ARGV[i * 3 - 2] then
+        redis.call('SET', KEYS[i * 2 - 1], ARGV[i * 3 - 1], 'EX', ARGV[i * 3])
+        result[i] = 1
+    else
+        result[i] = 0
+    end
+end
+return result
+"""
+
+
+class DeviceCache:
+    """
+    Cache device_id -> (baggage_id, tag, company_id) devant le registre `tracker_devices`.
+
+    Niveau 1 : LRU en process, borné en taille et en durée de vie
+    (les autres workers voient donc une (dés)association au plus après
+    `TRACKER_CACHE_LOCAL_TTL_SECONDS`).
+    Niveau 2 : Redis, partagé entre workers, invalidé à l'association/dissociation.
+    Seuls les devices absents des deux niveaux déclenchent une requête en base.
+
+    Une lecture en base commencée avant une invalidation ne réécrit pas sa
+    valeur (devenue périmée) : l'invalidation incrémente une génération par
+    device dans Redis (et un compteur local au process), comparées avant
+    d'écrire dans chaque niveau.
+    """
+
+    def __init__(self, maxsize: int | None = None, local_ttl: float | None = None, redis_ttl: int | None = None):
+        self.maxsize = maxsize or settings.TRACKER_CACHE_SIZE
+        self.local_ttl = local_ttl if local_ttl is not None else settings.TRACKER_CACHE_LOCAL_TTL_SECONDS
+        self.redis_ttl = redis_ttl or settings.TRACKER_CACHE_REDIS_TTL_SECONDS
+        self._local: OrderedDict[str, tuple[float, tuple | None]] = OrderedDict()
+        # Invalidations faites par ce process (rares : association/dissociation)
+        self._invalidations = 0
+        self._fill = redis_client.register_script(FILL_LUA)
+
+    def _get_local(self, device_id: str, now: float):
+        entry = self._local.get(device_id)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < now:
+            del self._local[device_id]
+            return False, None
+        self._local.move_to_end(device_id)
+        return True, value
+
+    def _set_local(self, device_id: str, value, now: float) -> None:
+        self._local[device_id] = (now + self.local_ttl, value)
+        self._local.move_to_end(device_id)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def resolve(self, db: AsyncSession, device_ids) -> dict:
+        """
+        Retourne un dict device_id -> (baggage_id, tag, company_id) ; les devices inconnus sont absents.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = []
+        for device_id in dict.fromkeys(device_ids):
+            hit, value = self._get_local(device_id, now)
+            if not hit:
+                missing.append(device_id)
+            elif value is not None:
+                found[device_id] = value
+        if not missing:
+            return found
+
+        invalidations = self._invalidations
+        keys = [KEY_PREFIX + device_id for device_id in missing]
+        replies = await redis_client.mget(keys + [GENERATION_PREFIX + device_id for device_id in missing])
+        cached, generations = replies[:len(missing)], replies[len(missing):]
+        still_missing = []
+        for device_id, raw, generation in zip(missing, cached, generations):
+            if raw is None:
+                still_missing.append((device_id, generation or ""))
+                continue
+            value = None
+            if raw != UNKNOWN:
+                baggage_id, tag, company_id = raw.split("|", 2)
+                value = (uuid.UUID(baggage_id), tag, uuid.UUID(company_id))
+                found[device_id] = value
+            if invalidations == self._invalidations:
+                self._set_local(device_id, value, now)
+        if not still_missing:
+            return found
+
+        resolved = await get_baggages_by_devices(db, [device_id for device_id, _ in still_missing])
+        keys, args = [], []
+        for device_id, generation in still_missing:
+            value = resolved.get(device_id)
+            if value is None:
+                args += [generation, UNKNOWN, UNKNOWN_TTL_SECONDS]
+            else:
+                args += [generation, "|".join(map(str, value)), self.redis_ttl]
+                found[device_id] = value
+            keys += [KEY_PREFIX + device_id, GENERATION_PREFIX + device_id]
+        written = await self._fill(keys=keys, args=args, client=redis_client)
+        if invalidations == self._invalidations:
+            for (device_id, _), ok in zip(still_missing, written):
+                if ok:
+                    self._set_local(device_id, resolved.get(device_id), now)
+        return found
+
+    async def invalidate(self, device_id: str) -> None:
+        self._invalidations += 1
+        self._local.pop(device_id, None)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.incr(GENERATION_PREFIX + device_id)
+            pipe.expire(GENERATION_PREFIX + device_id, self.redis_ttl)
+            pipe.delete(KEY_PREFIX + device_id)
+            await pipe.execute()
+
+
+device_cache = DeviceCache()
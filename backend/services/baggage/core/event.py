@@ -1,27 +1,238 @@
+from datetime import datetime, timezone
+import asyncio
+import logging
+
 import aio_pika
-import json
-from libs.common.config import settings  
+
+from libs.common.config import settings
+from ..metrics import EVENTS_PUBLISHED, PUBLISH_BUFFER_DEPTH
+from .transport import connect_broker
+from .event_schema import encode_payload
 
 EXCHANGE_NAME = "baggage.events"
+RECONNECT_DELAY_SECONDS = 1.0
+MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+logger = logging.getLogger("baggage-event-publisher")
 
 
-async def publish_event(event_type: str, payload: dict):
+class PublishTimeout(Exception):
     """
-    Publish event to RabbitMQ topic exchange.
+    Le buffer local est plein depuis trop longtemps (broker indisponible).
+    """
+
+
+class PublisherStopped(Exception):
     """
-    connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+    Le publisher a été arrêté avant la confirmation du message.
+    """
+
+
+class EventPublisher:
+    """
+    Publisher RabbitMQ de longue durée, possédé par le lifespan du service.
+
+    - une connexion robuste (reconnexion automatique) ouverte au démarrage ;
+    - l'exchange `baggage.events` déclaré une seule fois ;
+    - un petit pool de canaux en mode publisher confirms, chacun servi par
+      un worker qui publie des lots : les messages d'un lot partent ensemble
+      et leurs confirmations sont attendues ensemble (un aller-retour par lot) ;
+    - un buffer local borné : pendant une reconnexion les messages y attendent,
+      et `publish` n'applique de contre-pression qu'une fois le buffer plein.
+
+    Un lot dont la publication échoue (connexion perdue, nack) est republié :
+    la livraison au broker est « au moins une fois ». Un message dont l'appelant
+    a annulé la confirmation (délai dépassé) n'est plus publié ni réessayé.
+
+    Avec `ordered=True` (relais de l'outbox), un seul canal et un seul worker
+    publient les messages dans l'ordre d'appel à `publish` ; en cas d'échec,
+    tout le lot à partir du premier message non confirmé est republié, dans
+    l'ordre (les suivants déjà confirmés sont dupliqués).
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        pool_size: int | None = None,
+        batch_size: int | None = None,
+        buffer_size: int | None = None,
+        publish_timeout: float | None = None,
+        ordered: bool = False,
+    ):
+        self.url = url or settings.RABBITMQ_URL
+        self.ordered = ordered
+        self.pool_size = 1 if ordered else pool_size or settings.RABBITMQ_CHANNEL_POOL_SIZE
+        self.batch_size = batch_size or settings.RABBITMQ_CONFIRM_BATCH_SIZE
+        self.publish_timeout = publish_timeout or settings.RABBITMQ_PUBLISH_TIMEOUT_SECONDS
+        self._buffer: asyncio.Queue = asyncio.Queue(maxsize=buffer_size or settings.RABBITMQ_PUBLISH_BUFFER_SIZE)
+        self._connection = None
+        self._exchanges: list = []
+        self._ready = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._unconfirmed: set[asyncio.Future] = set()
+
+    @property
+    def pending(self) -> int:
+        return self._buffer.qsize()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._connect())]
+            self._tasks += [asyncio.create_task(self._worker(index)) for index in range(self.pool_size)]
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """
+        Laisse `drain_timeout` secondes aux workers pour vider le buffer,
+        puis ferme la connexion. Les confirmations encore en attente (buffer ou
+        lot en cours) échouent avec `PublisherStopped`.
+        """
+        if not self._tasks:
+            return
+        if self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._buffer.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Stopping publisher with {self.pending} unpublished events")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._buffer.empty():
+            self._buffer.get_nowait()
+            self._buffer.task_done()
+        PUBLISH_BUFFER_DEPTH.set(0)
+        for confirmed in list(self._unconfirmed):
+            if not confirmed.done():
+                confirmed.set_exception(PublisherStopped("Publisher stopped before broker confirmation"))
+                # Marque l'exception comme lue : les appels sans `wait` ignorent souvent la future
+                confirmed.exception()
+        self._unconfirmed.clear()
+        self._ready.clear()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def _connect(self) -> None:
+        # Premier établissement de la connexion ; ensuite `connect_robust`
+        # rétablit seul la connexion et les canaux.
+        delay = RECONNECT_DELAY_SECONDS
+        while True:
+            try:
+                self._connection = await connect_broker(self.url)
+                channels = [await self._connection.channel(publisher_confirms=True) for _ in range(self.pool_size)]
+                exchange = await channels[0].declare_exchange(EXCHANGE_NAME, type=aio_pika.ExchangeType.TOPIC, durable=True)
+                self._exchanges = [exchange] + [
+                    await channel.get_exchange(EXCHANGE_NAME, ensure=False) for channel in channels[1:]
+                ]
+                self._ready.set()
+                return
+            except Exception as e:
+                logger.warning(f"RabbitMQ unavailable ({e}), retrying in {delay}s")
+                if self._connection is not None:
+                    await self._connection.close()
+                    self._connection = None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    # -------------------------------
+    # Publication
+    # -------------------------------
+    async def publish(self, event_type: str, payload, wait: bool = False, message_id: str | None = None) -> asyncio.Future:
+        """
+        Met un événement en file pour `baggage.<event_type>`.
+
+        `payload` : événement typé (`core/event_schema.py`), octets déjà encodés
+        (publiés tels quels) ou dict. `message_id` permet la déduplication côté
+        consommateur (identifiant de l'outbox).
 
-    async with connection:
-        channel = await connection.channel()
-        exchange = await channel.declare_exchange(
-            EXCHANGE_NAME, type=aio_pika.ExchangeType.TOPIC, durable=True
-        )
+        Retourne dès la mise en buffer ; avec `wait=True`, attend la confirmation
+        du broker. Lève `PublishTimeout` si le buffer reste plein plus de
+        `RABBITMQ_PUBLISH_TIMEOUT_SECONDS` ; la confirmation échoue avec
+        `PublisherStopped` si le publisher est arrêté avant.
+        """
+        self.start()
+        body = encode_payload(payload)
+        confirmed = asyncio.get_running_loop().create_future()
+        self._unconfirmed.add(confirmed)
+        confirmed.add_done_callback(self._unconfirmed.discard)
+        try:
+            await asyncio.wait_for(
+                self._buffer.put((f"baggage.{event_type}", body, message_id, confirmed)), self.publish_timeout
+            )
+        except asyncio.TimeoutError:
+            self._unconfirmed.discard(confirmed)
+            EVENTS_PUBLISHED.labels("buffer_full").inc()
+            raise PublishTimeout(f"Publish buffer full ({self._buffer.maxsize} events)")
+        PUBLISH_BUFFER_DEPTH.set(self._buffer.qsize())
+        if wait:
+            await confirmed
+        return confirmed
 
-        message = aio_pika.Message(
-            body=json.dumps(payload).encode(),
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT
-        )
+    async def _take_batch(self) -> list:
+        batch = [await self._buffer.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._buffer.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
 
-        routing_key = f"baggage.{event_type}"
+    def _drop_abandoned(self, batch: list) -> list:
+        """
+        Retire du lot les messages dont la confirmation a été annulée.
+        """
+        kept = []
+        for item in batch:
+            if item[3].cancelled():
+                EVENTS_PUBLISHED.labels("abandoned").inc()
+                self._buffer.task_done()
+            else:
+                kept.append(item)
+        return kept
 
-        await exchange.publish(message, routing_key=routing_key)
+    async def _worker(self, index: int) -> None:
+        await self._ready.wait()
+        exchange = self._exchanges[index]
+        while True:
+            batch = await self._take_batch()
+            delay = RECONNECT_DELAY_SECONDS
+            while batch := self._drop_abandoned(batch):
+                # Horodatage de publication : le consommateur en déduit le retard de traitement
+                now = datetime.now(timezone.utc)
+                results = await asyncio.gather(
+                    *(
+                        exchange.publish(
+                            aio_pika.Message(
+                                body,
+                                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                                content_type="application/json",
+                                timestamp=now,
+                                message_id=message_id,
+                            ),
+                            routing_key=routing_key,
+                            mandatory=False,
+                        )
+                        for routing_key, body, message_id, _ in batch
+                    ),
+                    return_exceptions=True,
+                )
+                errors = [i for i, result in enumerate(results) if isinstance(result, Exception)]
+                # Mode ordonné : rien n'est tenu pour confirmé après le premier échec
+                retry_from = errors[0] if errors and self.ordered else len(batch)
+                failed = []
+                for i, (item, result) in enumerate(zip(batch, results)):
+                    if isinstance(result, Exception) or i >= retry_from:
+                        failed.append(item)
+                        continue
+                    if not item[3].done():
+                        item[3].set_result(None)
+                    self._buffer.task_done()
+                EVENTS_PUBLISHED.labels("confirmed").inc(len(batch) - len(failed))
+                if failed:
+                    EVENTS_PUBLISHED.labels("retried").inc(len(failed))
+                    error = next(result for result in results if isinstance(result, Exception))
+                    logger.warning(f"{len(failed)} events not confirmed ({error!r}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+                batch = failed
+            PUBLISH_BUFFER_DEPTH.set(self._buffer.qsize())
@@ -0,0 +1,149 @@
+from datetime import datetime
+import uuid
+
+import orjson
+
+# Version du schéma des événements : incrémentée à chaque changement
+# incompatible (champ renommé ou retiré, type modifié). Un champ optionnel
+# ajouté ne change pas la version ; les décodeurs ignorent les champs inconnus.
+SCHEMA_VERSION = 1
+
+
+class Event:
+    """
+    Base des événements bagages diffusés en temps réel.
+
+    Chaque sous-classe déclare son canal (`channel`), son type (`type`, clé
+    `type` du JSON) et ses champs (`FIELDS`, dans l'ordre de sérialisation).
+    L'événement est sérialisé une seule fois (orjson) : les octets produits
+    traversent ensuite outbox, RabbitMQ, consommateur et flux Redis tels quels,
+    jusqu'aux clients.
+    """
+    __slots__ = ("_encoded",)
+
+    channel: str = ""
+    type: str = ""
+    FIELDS: tuple[str, ...] = ()
+    REQUIRED: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict:
+        data = {"type": self.type, "v": SCHEMA_VERSION}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def encode(self) -> bytes:
+        """
+        JSON compact ; datetime (ISO 8601, sans fuseau = UTC) et UUID sont
+        sérialisés nativement par orjson. Le résultat est mis en cache.
+        """
+        if self._encoded is None:
+            self._encoded = orjson.dumps(self.to_dict())
+        return self._encoded
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Event":
+        missing = [name for name in cls.REQUIRED if name not in data]
+        if missing:
+            raise ValueError(f"{cls.type} event missing fields: {', '.join(missing)}")
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+
+class GpsEvent(Event):
+    """
+    Position d'un bagage (`baggage.gps`) : tracker, API GPS ou scan géolocalisé.
+    """
+    __slots__ = ("tag", "company_id", "latitude", "longitude", "timestamp", "device_id", "battery")
+
+    channel = "baggage.gps"
+    type = "gps"
+    FIELDS = ("tag", "company_id", "latitude", "longitude", "timestamp", "device_id", "battery")
+    REQUIRED = ("tag", "latitude", "longitude", "timestamp")
+
+    def __init__(
+        self,
+        tag: str,
+        latitude: float,
+        longitude: float,
+        timestamp: datetime | str,
+        company_id: uuid.UUID | str | None = None,
+        device_id: str | None = None,
+        battery: int | None = None,
+    ):
+        self.tag = tag
+        self.company_id = company_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.timestamp = timestamp
+        self.device_id = device_id
+        self.battery = battery
+        self._encoded = None
+
+
+class StatusEvent(Event):
+    """
+    Changement de statut d'un bagage (`baggage.status`), publié via l'outbox.
+    """
+    __slots__ = ("tag", "company_id", "status", "location", "timestamp")
+
+    channel = "baggage.status"
+    type = "status"
+    FIELDS = ("tag", "company_id", "status", "location", "timestamp")
+    REQUIRED = ("tag", "status", "timestamp")
+
+    def __init__(
+        self,
+        tag: str,
+        status: str,
+        timestamp: datetime | str,
+        company_id: uuid.UUID | str | None = None,
+        location: str | None = None,
+    ):
+        self.tag = tag
+        self.company_id = company_id
+        # BaggageStatus est un enum str : on garde la valeur brute
+        self.status = getattr(status, "value", status)
+        self.location = location
+        self.timestamp = timestamp
+        self._encoded = None
+
+
+EVENT_TYPES: dict[str, type[Event]] = {cls.type: cls for cls in (GpsEvent, StatusEvent)}
+
+
+def decode_event(data: bytes | str) -> Event:
+    """
+    Reconstruit un événement typé depuis sa forme encodée. Lève ValueError
+    si le type est inconnu ou la version plus récente que celle du code.
+    """
+    payload = orjson.loads(data)
+    cls = EVENT_TYPES.get(payload.get("type")) if isinstance(payload, dict) else None
+    if cls is None:
+        raise ValueError("Unknown event type")
+    if payload.get("v", 1) > SCHEMA_VERSION:
+        raise ValueError(f"Unsupported event version {payload['v']}")
+    event = cls.from_dict(payload)
+    if isinstance(data, bytes):
+        event._encoded = data
+    return event
+
+
+def encode_payload(payload) -> bytes:
+    """
+    Corps d'un message : événement typé, octets déjà encodés (outbox) ou
+    dict ad hoc.
+    """
+    if isinstance(payload, Event):
+        return payload.encode()
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    return orjson.dumps(payload)
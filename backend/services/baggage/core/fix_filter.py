@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+import math
+
+from libs.common.config import settings
+from ..redis.redis_c import redis_client
+from ..metrics import GPS_FIXES
+
+STATE_PREFIX = "baggage:fix-filter:"
+EARTH_RADIUS_M = 6_371_000
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Distance haversine en mètres.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _epoch(ts: datetime) -> float:
+    # Horodatages naïfs en UTC, comme les colonnes du modèle
+    return ts.replace(tzinfo=timezone.utc).timestamp() if ts.tzinfo is None else ts.timestamp()
+
+
+class MovementFilter:
+    """
+    Filtre les fixes GPS redondants avant toute persistance.
+
+    Un fix est supprimé si le bagage a bougé de moins de `min_distance_m`
+    ET que moins de `min_interval_s` se sont écoulées depuis le dernier fix
+    accepté pour ce bagage. Un fix accepté ne devient la nouvelle référence
+    qu'une fois persisté (`remember`) : si l'écriture échoue, le renvoi du
+    même fix par la passerelle est de nouveau accepté.
+
+    L'état (dernier fix accepté par tag) est gardé en mémoire (LRU borné, par
+    worker) ou dans Redis, partagé entre workers (`backend="redis"`) : une clé
+    par tag, expirée une fois la référence trop ancienne pour supprimer un fix.
+    """
+
+    def __init__(
+        self,
+        min_distance_m: float | None = None,
+        min_interval_s: float | None = None,
+        backend: str | None = None,
+        max_tracked: int | None = None,
+        enabled: bool | None = None,
+    ):
+        self.min_distance_m = min_distance_m if min_distance_m is not None else settings.GPS_FILTER_MIN_DISTANCE_M
+        self.min_interval_s = min_interval_s if min_interval_s is not None else settings.GPS_FILTER_MIN_INTERVAL_SECONDS
+        self.backend = backend or settings.GPS_FILTER_BACKEND
+        self.max_tracked = max_tracked or settings.GPS_FILTER_MAX_TRACKED
+        self.enabled = enabled if enabled is not None else settings.GPS_FILTER_ENABLED
+        self._state: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+
+    @property
+    def state_ttl(self) -> int:
+        # Au-delà de min_interval_s la référence ne supprime plus rien ; marge
+        # pour les fixes horodatés en retard par les passerelles
+        return max(1, math.ceil(self.min_interval_s * 2))
+
+    async def _load(self, tags) -> dict:
+        if self.backend == "redis":
+            raw = await redis_client.mget([STATE_PREFIX + tag for tag in tags])
+            return {
+                tag: tuple(float(x) for x in value.split("|"))
+                for tag, value in zip(tags, raw) if value is not None
+            }
+        return {tag: self._state[tag] for tag in tags if tag in self._state}
+
+    async def _save(self, accepted: dict) -> None:
+        if self.backend == "redis":
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for tag, (lat, lon, ts) in accepted.items():
+                    pipe.set(STATE_PREFIX + tag, f"{lat}|{lon}|{ts}", ex=self.state_ttl)
+                await pipe.execute()
+            return
+        for tag, state in accepted.items():
+            self._state[tag] = state
+            self._state.move_to_end(tag)
+        while len(self._state) > self.max_tracked:
+            self._state.popitem(last=False)
+
+    async def apply(self, fixes, source: str) -> list[bool]:
+        """
+        `fixes` : tuples (tag, latitude, longitude, seen_at), dans l'ordre de réception.
+        Retourne une décision par fix (True = à persister et diffuser).
+        L'état n'est pas modifié : appeler `remember` après la persistance.
+        """
+        if not self.enabled or not fixes:
+            GPS_FIXES.labels(source=source, outcome="accepted").inc(len(fixes))
+            return [True] * len(fixes)
+
+        last = await self._load(list(dict.fromkeys(tag for tag, _, _, _ in fixes)))
+        accepted = {}
+        decisions = []
+        for tag, lat, lon, seen_at in fixes:
+            ts = _epoch(seen_at)
+            previous = accepted.get(tag) or last.get(tag)
+            keep = (
+                previous is None
+                or ts - previous[2] >= self.min_interval_s
+                or distance_m(previous[0], previous[1], lat, lon) >= self.min_distance_m
+            )
+            if keep:
+                accepted[tag] = (lat, lon, ts)
+            decisions.append(keep)
+
+        kept = sum(decisions)
+        GPS_FIXES.labels(source=source, outcome="accepted").inc(kept)
+        GPS_FIXES.labels(source=source, outcome="suppressed").inc(len(decisions) - kept)
+        return decisions
+
+    async def remember(self, fixes, decisions: list[bool]) -> None:
+        """
+        Enregistre comme référence le dernier fix accepté de chaque tag, une
+        fois les fixes retenus par `apply` persistés.
+        """
+        if not self.enabled:
+            return
+        accepted = {
+            tag: (lat, lon, _epoch(seen_at))
+            for (tag, lat, lon, seen_at), keep in zip(fixes, decisions) if keep
+        }
+        if accepted:
+            await self._save(accepted)
+
+
+movement_filter = MovementFilter()
@@ -0,0 +1,421 @@
+from collections import defaultdict, deque
+import asyncio
+import logging
+import uuid
+
+import msgpack
+import orjson
+
+from libs.common.config import settings
+from ..redis.redis_c import redis_client
+from .stream import STREAM_KEY, read_since, stream_id_key
+from ..metrics import STREAM_QUEUE_DEPTH, STREAM_DROPPED, STREAM_SLOW_DISCONNECTS
+
+logger = logging.getLogger("baggage-event-hub")
+
+RECONNECT_DELAY_SECONDS = 1.0
+READ_BLOCK_MS = 5000
+READ_COUNT = 500
+
+# Formats de trame négociables par les clients
+JSON = "json"
+MSGPACK = "msgpack"
+FORMATS = (JSON, MSGPACK)
+# Format du point d'accès Server-Sent Events (non négociable en WebSocket)
+SSE = "sse"
+
+# Événement de contrôle envoyé quand la reprise est impossible (flux tronqué)
+RESYNC_CHANNEL = "baggage.resync"
+RESYNC_DATA = '{"type": "resync"}'
+
+# Politiques de débordement des files sortantes
+DROP_GPS = "drop_gps"
+DISCONNECT = "disconnect"
+GPS_CHANNEL = "baggage.gps"
+
+# Dimensions de filtrage, de la plus sélective à la moins sélective :
+# (champ de l'événement, attribut de la Subscription)
+FILTER_FIELDS = (("tag", "tags"), ("company_id", "company_ids"), ("status", "statuses"))
+
+
+class HubMessage:
+    """
+    Message remis aux abonnés : données JSON envoyées aux clients, leur décodage
+    (fait une seule fois par le hub, None si invalide) et l'identifiant de
+    l'entrée du flux Redis.
+
+    Le même objet est partagé par toutes les connexions : les encodages
+    MessagePack et SSE sont calculés au premier besoin puis réutilisés.
+    """
+    __slots__ = ("channel", "data", "event", "id", "_packed", "_sse")
+
+    def __init__(self, channel: str, data: str, event: object, id: str | None = None):
+        self.channel = channel
+        self.data = data
+        self.event = event
+        self.id = id
+        self._packed: bytes | None = None
+        self._sse: str | None = None
+
+    @property
+    def packed(self) -> bytes:
+        if self._packed is None:
+            self._packed = msgpack.packb(self.event if self.event is not None else self.data)
+        return self._packed
+
+    @property
+    def sse(self) -> str:
+        # Bloc Server-Sent Events : `id` permet la reprise via Last-Event-ID
+        if self._sse is None:
+            head = f"id: {self.id}\n" if self.id is not None else ""
+            self._sse = f"{head}event: {self.channel}\ndata: {self.data}\n\n"
+        return self._sse
+
+    def encode(self, fmt: str) -> str | bytes:
+        if fmt == MSGPACK:
+            return self.packed
+        if fmt == SSE:
+            return self.sse
+        return self.data
+
+
+def build_message(channel: str, data: str, entry_id: str | None = None) -> HubMessage:
+    """
+    Décode un événement et y ajoute `event_id` (identifiant de flux à renvoyer
+    en `last_id` pour reprendre après une coupure), puis le ré-encode une fois
+    pour toutes les connexions.
+    """
+    try:
+        event = orjson.loads(data)
+    except ValueError:
+        event = None
+    if entry_id is not None and isinstance(event, dict):
+        # Remplace un éventuel `event_id` de l'émetteur
+        event.pop("event_id", None)
+        event = {"event_id": entry_id, **event}
+        data = orjson.dumps(event).decode()
+    return HubMessage(channel, data, event, entry_id)
+
+
+class SlowConsumer(Exception):
+    """
+    Levée à la lecture d'une file fermée : le client ne suit plus le débit
+    des événements et doit être déconnecté.
+    """
+
+
+class OutboundQueue:
+    """
+    File sortante bornée d'une connexion (un seul lecteur).
+
+    Quand elle atteint `maxsize` :
+    - `drop_gps` : la plus ancienne position GPS en attente est écartée (une plus
+      récente suivra) ; les scans et statuts ne sont jamais écartés. Si la file
+      ne contient plus que des événements non GPS, elle est fermée.
+    - `disconnect` : la file est fermée.
+
+    Une file fermée lève `SlowConsumer` à la lecture et déclenche `closed`.
+    """
+
+    def __init__(self, maxsize: int, policy: str, on_drop=None):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.closed = asyncio.Event()
+        self._items: deque = deque()
+        self._waiter: asyncio.Future | None = None
+        self._on_drop = on_drop
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def _wakeup(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def close(self) -> None:
+        if not self.closed.is_set():
+            self.closed.set()
+            self._wakeup()
+
+    def _drop_oldest_gps(self, incoming) -> bool:
+        for index, message in enumerate(self._items):
+            if message.channel == GPS_CHANNEL:
+                del self._items[index]
+                break
+        else:
+            if incoming.channel != GPS_CHANNEL:
+                return False
+            # File pleine d'événements prioritaires : la position entrante est écartée
+            incoming = None
+        self.dropped += 1
+        if self._on_drop is not None:
+            self._on_drop()
+        if incoming is not None:
+            self._items.append(incoming)
+        return True
+
+    def put_nowait(self, message) -> None:
+        if self.closed.is_set():
+            return
+        if len(self._items) >= self.maxsize:
+            if self.policy != DROP_GPS or not self._drop_oldest_gps(message):
+                self.close()
+            self._wakeup()
+            return
+        self._items.append(message)
+        self._wakeup()
+
+    def get_nowait(self):
+        if self.closed.is_set():
+            raise SlowConsumer()
+        if not self._items:
+            raise asyncio.QueueEmpty()
+        return self._items.popleft()
+
+    async def get(self):
+        while not self._items and not self.closed.is_set():
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self.get_nowait()
+
+
+class Subscription:
+    """
+    Abonnement d'une connexion cliente au hub : une file sortante bornée
+    alimentée par le lecteur Redis partagé, et des filtres optionnels.
+
+    Les valeurs d'une même dimension sont combinées en OU, les dimensions en ET.
+    Un événement sans le champ filtré (ex. `status` sur un événement GPS) ne
+    correspond pas à cette dimension.
+    """
+
+    def __init__(self, transport: str = "ws", maxsize: int | None = None, policy: str | None = None):
+        self.transport = transport
+        self.connection_id = uuid.uuid4().hex[:12]
+        dropped = STREAM_DROPPED.labels(transport, self.connection_id)
+        self.queue = OutboundQueue(
+            maxsize or settings.STREAM_QUEUE_SIZE,
+            policy or settings.STREAM_OVERFLOW_POLICY,
+            on_drop=dropped.inc,
+        )
+        STREAM_QUEUE_DEPTH.labels(transport, self.connection_id).set_function(self.queue.qsize)
+        self.tags: frozenset[str] = frozenset()
+        self.company_ids: frozenset[str] = frozenset()
+        self.statuses: frozenset[str] = frozenset()
+
+    @property
+    def filters(self) -> dict:
+        return {"tags": sorted(self.tags), "company_ids": sorted(self.company_ids), "statuses": sorted(self.statuses)}
+
+    def matches(self, event: dict) -> bool:
+        for field, attr in FILTER_FIELDS:
+            values = getattr(self, attr)
+            if values and event.get(field) not in values:
+                return False
+        return True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def release(self) -> None:
+        # Retire les séries Prometheus propres à la connexion
+        for metric in (STREAM_QUEUE_DEPTH, STREAM_DROPPED):
+            try:
+                metric.remove(self.transport, self.connection_id)
+            except KeyError:
+                pass
+        if self.queue.closed.is_set():
+            STREAM_SLOW_DISCONNECTS.labels(self.transport).inc()
+
+
+class EventHub:
+    """
+    Hub de diffusion par processus.
+
+    Le flux Redis `STREAM_KEY` est lu en bloquant (XREAD BLOCK) par une seule
+    tâche de fond ; chaque entrée est recopiée dans la file des abonnés
+    intéressés. Connecter ou déconnecter un client ne touche jamais Redis
+    (seule une reprise `last_id` relit le flux).
+
+    Routage : chaque abonnement filtré est indexé sous sa dimension la plus
+    sélective (tag, puis compagnie, puis statut). Un événement n'est donc
+    examiné que pour les abonnés sans filtre et ceux indexés sous ses valeurs,
+    pas pour toutes les connexions.
+    """
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._wildcard: set[Subscription] = set()
+        self._indexes: dict[str, defaultdict[str, set[Subscription]]] = {
+            field: defaultdict(set) for field, _ in FILTER_FIELDS
+        }
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # -------------------------------
+    # Abonnements et index inversés
+    # -------------------------------
+    @staticmethod
+    def _index_key(subscription: Subscription):
+        for field, attr in FILTER_FIELDS:
+            values = getattr(subscription, attr)
+            if values:
+                return field, values
+        return None
+
+    def _index(self, subscription: Subscription) -> None:
+        key = self._index_key(subscription)
+        if key is None:
+            self._wildcard.add(subscription)
+            return
+        field, values = key
+        for value in values:
+            self._indexes[field][value].add(subscription)
+
+    def _unindex(self, subscription: Subscription) -> None:
+        key = self._index_key(subscription)
+        if key is None:
+            self._wildcard.discard(subscription)
+            return
+        field, values = key
+        index = self._indexes[field]
+        for value in values:
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.discard(subscription)
+                if not bucket:
+                    del index[value]
+
+    def subscribe(self, tags=(), company_ids=(), statuses=(), transport: str = "ws") -> Subscription:
+        # Démarrage paresseux si le lifespan n'a pas lancé le hub
+        self.start()
+        subscription = Subscription(transport)
+        self._subscribers.add(subscription)
+        self.update(subscription, tags, company_ids, statuses)
+        return subscription
+
+    def update(self, subscription: Subscription, tags=(), company_ids=(), statuses=()) -> None:
+        """
+        Remplace les filtres d'un abonnement, sans reconnexion ni perte de sa file.
+        """
+        if subscription not in self._subscribers:
+            return
+        self._unindex(subscription)
+        subscription.tags = frozenset(map(str, tags))
+        subscription.company_ids = frozenset(map(str, company_ids))
+        subscription.statuses = frozenset(getattr(status, "value", str(status)) for status in statuses)
+        self._index(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._unindex(subscription)
+            self._subscribers.discard(subscription)
+            subscription.release()
+
+    # -------------------------------
+    # Routage
+    # -------------------------------
+    def route(self, event) -> list[Subscription]:
+        """
+        Retourne les abonnés concernés par un événement décodé.
+        Un message qui n'est pas un objet JSON n'est remis qu'aux abonnés sans filtre.
+        """
+        targets = list(self._wildcard)
+        if not isinstance(event, dict):
+            return targets
+        for field, index in self._indexes.items():
+            value = event.get(field)
+            if not isinstance(value, str):
+                continue
+            for subscription in index.get(value, ()):
+                if subscription.matches(event):
+                    targets.append(subscription)
+        return targets
+
+    def dispatch(self, channel: str, data: str, entry_id: str | None = None) -> None:
+        if not self._subscribers:
+            return
+        message = build_message(channel, data, entry_id)
+        for subscription in self.route(message.event):
+            subscription.queue.put_nowait(message)
+
+    # -------------------------------
+    # Reprise après coupure
+    # -------------------------------
+    async def resume(self, subscription: Subscription, last_id: str) -> bool:
+        """
+        Rejoue dans la file d'un abonnement (déjà inscrit) les entrées du flux
+        postérieures à `last_id` qui correspondent à ses filtres.
+
+        Les événements reçus en direct pendant la relecture sont conservés après
+        les entrées rejouées, sans doublon. Si la reprise est incomplète (flux
+        tronqué ou trop d'entrées manquées), un événement `{"type": "resync"}`
+        est mis en tête pour que le client recharge son état. Retourne False dans ce cas.
+        """
+        queue = subscription.queue
+        # Au-delà de la taille de la file, une relecture déborderait : resync
+        limit = min(settings.STREAM_REPLAY_MAX, queue.maxsize)
+        entries, complete = await read_since(redis_client, last_id, limit)
+
+        live = []
+        while not queue.empty():
+            live.append(queue.get_nowait())
+
+        if not complete:
+            queue.put_nowait(build_message(RESYNC_CHANNEL, RESYNC_DATA))
+        replayed_until = stream_id_key(last_id)
+        for entry_id, fields in entries:
+            message = build_message(fields["channel"], fields["data"], entry_id)
+            replayed_until = stream_id_key(entry_id)
+            if isinstance(message.event, dict) and subscription.matches(message.event):
+                queue.put_nowait(message)
+        for message in live:
+            if message.id is None or stream_id_key(message.id) > replayed_until:
+                queue.put_nowait(message)
+        return complete
+
+    async def _run(self) -> None:
+        # Position de départ résolue une fois : relancer XREAD avec "$" perdrait
+        # les entrées ajoutées entre deux lectures
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    tail = await redis_client.xrevrange(STREAM_KEY, count=1)
+                    last_id = tail[0][0] if tail else "0-0"
+                response = await redis_client.xread({STREAM_KEY: last_id}, count=READ_COUNT, block=READ_BLOCK_MS)
+                for _, entries in response or ():
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        self.dispatch(fields.get("channel"), fields.get("data", ""), entry_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Redis stream read failed, retrying in {RECONNECT_DELAY_SECONDS}s")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+
+hub = EventHub()
@@ -0,0 +1,162 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from libs.common.config import settings
+from ..redis.redis_c import redis_client
+from ..baggage_service import bulk_update_positions, append_position_history
+from ..metrics import INGEST_TIMESTAMPS
+from .device_cache import device_cache
+from .fix_filter import movement_filter
+from .rate_limit import rate_limiter
+from .position_buffer import queue_positions, position_flusher, DIRTY_KEY
+from .stream import append_event
+from .event_schema import GpsEvent
+
+GPS_CHANNEL = GpsEvent.channel
+
+
+def _to_utc_naive(ts: datetime) -> datetime:
+    # Les colonnes DateTime du modèle sont naïves et exprimées en UTC
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _fix_time(ts: datetime | None, received_at: datetime) -> datetime | None:
+    """
+    Horodatage enregistré pour un fix, borné à la fenêtre couverte par les
+    partitions journalières de `baggage_positions` (sinon la ligne finit dans
+    la partition par défaut) :
+    - sans `ts` : l'heure de réception
+    - `ts` dans le futur au-delà de `INGEST_MAX_CLOCK_SKEW_SECONDS` (horloge
+      du tracker en avance) : ramené à l'heure de réception
+    - `ts` plus ancien que `INGEST_MAX_FIX_AGE_SECONDS` (horloge remise à
+      zéro, fix périmé) : None, le fix est rejeté
+    """
+    if ts is None:
+        return received_at
+    seen_at = _to_utc_naive(ts)
+    max_skew = min(settings.INGEST_MAX_CLOCK_SKEW_SECONDS, settings.POSITIONS_PARTITIONS_AHEAD_DAYS * 86_400)
+    max_age = min(settings.INGEST_MAX_FIX_AGE_SECONDS, settings.POSITIONS_RETENTION_DAYS * 86_400)
+    if seen_at > received_at + timedelta(seconds=max_skew):
+        INGEST_TIMESTAMPS.labels(outcome="clamped").inc()
+        return received_at
+    if seen_at < received_at - timedelta(seconds=max_age):
+        INGEST_TIMESTAMPS.labels(outcome="stale").inc()
+        return None
+    return seen_at
+
+
+async def store_positions(db: AsyncSession, fixes, events) -> None:
+    """
+    Persiste les fixes acceptés (tuples baggage_id, tag, latitude, longitude, seen_at)
+    et diffuse les événements GPS (`GpsEvent`, ajoutés au flux sous forme encodée).
+
+    Seule la position la plus récente de chaque bagage met à jour `baggages` ;
+    tous les fixes sont ajoutés à l'historique `baggage_positions`.
+
+    - mode synchrone : UPDATE groupé + insertion d'historique + commit, puis un pipeline Redis
+    - mode write-behind (`GPS_WRITE_BEHIND`) : uniquement le pipeline Redis,
+      la base est mise à jour par le `PositionFlusher`
+    """
+    latest = {}
+    for fix in fixes:
+        current = latest.get(fix[0])
+        if current is None or fix[4] >= current[4]:
+            latest[fix[0]] = fix
+    positions = list(latest.values())
+    history = [(baggage_id, lat, lon, seen_at) for baggage_id, _, lat, lon, seen_at in fixes]
+
+    if positions and not settings.GPS_WRITE_BEHIND:
+        await bulk_update_positions(
+            db, [(baggage_id, lat, lon, seen_at) for baggage_id, _, lat, lon, seen_at in positions]
+        )
+        await append_position_history(db, history)
+        await db.commit()
+
+    if not positions and not events:
+        return
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        queue_positions(pipe, positions, history)
+        for event in events:
+            append_event(pipe, GPS_CHANNEL, event.encode())
+        if settings.GPS_WRITE_BEHIND:
+            pipe.hlen(DIRTY_KEY)
+        replies = await pipe.execute()
+
+    if settings.GPS_WRITE_BEHIND and replies:
+        position_flusher.notify(replies[-1])
+
+
+async def ingest_fixes(
+    db: AsyncSession, fixes, source: str = "tracker", client_ip: str | None = None, rate_limit: bool = True
+) -> list[dict]:
+    """
+    Pipeline d'ingestion groupée des fixes GPS envoyés par les trackers.
+    Accepte tout objet exposant `device_id`, `lat`, `lon`, `ts` et `battery`
+    (`TrackerFix` pour le JSON, `FrameFix` pour la trame binaire).
+
+    0. Limite le débit par device (et par IP source si fournie) avant tout accès base,
+       sauf si l'appelant l'a déjà fait (`rate_limit=False` : UDP, limité par datagramme)
+    1. Résout les `device_id` via le cache du registre (une requête au plus pour les absents)
+       et borne les horodatages (`_fix_time`)
+    2. Écarte les fixes redondants (`movement_filter`)
+    3. Persiste les fixes via `store_positions` (synchrone ou write-behind),
+       puis seulement met à jour les références du filtre
+    4. Diffuse les fixes retenus sur `baggage.gps` (flux `baggage:events`) dans le même pipeline Redis
+
+    Retourne un résultat par fix, dans l'ordre reçu (`ok`, `suppressed`,
+    `throttled`, `unknown_device` ou `stale`) : un device inconnu ne fait pas échouer le lot.
+    Lève `IngestThrottled` si l'IP source dépasse sa limite.
+    """
+    received_at = datetime.utcnow()
+    throttled = await rate_limiter.check(Counter(fix.device_id for fix in fixes), client_ip) if rate_limit else set()
+    known = await device_cache.resolve(db, [fix.device_id for fix in fixes if fix.device_id not in throttled])
+
+    results = []
+    candidates = []
+    for index, fix in enumerate(fixes):
+        if fix.device_id in throttled:
+            results.append({"index": index, "device_id": fix.device_id, "status": "throttled"})
+            continue
+        match = known.get(fix.device_id)
+        if match is None:
+            results.append({"index": index, "device_id": fix.device_id, "status": "unknown_device"})
+            continue
+
+        baggage_id, tag, company_id = match
+        seen_at = _fix_time(fix.ts, received_at)
+        if seen_at is None:
+            results.append({"index": index, "device_id": fix.device_id, "status": "stale", "baggage_tag": tag})
+            continue
+        result = {"index": index, "device_id": fix.device_id, "status": "ok", "baggage_tag": tag}
+        results.append(result)
+        candidates.append((fix, baggage_id, tag, company_id, seen_at, result))
+
+    filtered = [(tag, fix.lat, fix.lon, seen_at) for fix, _, tag, _, seen_at, _ in candidates]
+    decisions = await movement_filter.apply(filtered, source)
+
+    accepted = []
+    events = []
+    for (fix, baggage_id, tag, company_id, seen_at, result), keep in zip(candidates, decisions):
+        if not keep:
+            result["status"] = "suppressed"
+            continue
+        accepted.append((baggage_id, tag, fix.lat, fix.lon, seen_at))
+        events.append(GpsEvent(
+            tag=tag,
+            company_id=company_id,
+            latitude=fix.lat,
+            longitude=fix.lon,
+            timestamp=seen_at,
+            device_id=fix.device_id,
+            battery=fix.battery,
+        ))
+
+    await store_positions(db, accepted, events)
+    await movement_filter.remember(filtered, decisions)
+
+    return results
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+import asyncio
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from libs.common.config import settings
+from libs.common.database import AsyncSessionLocal
+from ..models.event_outbox import EventOutbox
+from .event import PublishTimeout
+from .event_schema import Event
+from ..metrics import OUTBOX_RELAYED, OUTBOX_PENDING_AGE
+
+
+def enqueue_event(db: AsyncSession, event: Event) -> EventOutbox:
+    """
+    Ajoute un événement à l'outbox dans la transaction courante (sans commit) :
+    il n'existe que si le changement d'état qui l'accompagne est validé.
+    L'événement est stocké encodé ; le relais le publie sans le re-sérialiser.
+    """
+    row = EventOutbox(event_type=event.type, payload=event.encode().decode())
+    db.add(row)
+    return row
+
+
+async def relay_once(
+    publisher, session_factory=AsyncSessionLocal, batch_size: int = 500, publish_timeout: float | None = None
+) -> int:
+    """
+    Publie un lot d'événements en attente puis les marque envoyés.
+
+    Les lignes sont verrouillées avec `FOR UPDATE SKIP LOCKED` : plusieurs relais
+    peuvent tourner en parallèle sans se partager un événement. Le lot est mis
+    en file dans l'ordre des `id` et ses confirmations attendues ensemble : avec
+    un publisher `ordered=True` (canal unique), l'ordre de l'outbox est conservé
+    sur le broker.
+
+    La transaction n'est validée qu'après confirmation du broker : la livraison
+    est « au moins une fois », pas « exactement une fois ». Un échec ou un arrêt
+    entre la confirmation et le commit republie le lot au tour suivant ; chaque
+    message porte l'`outbox_id` en `message_id` AMQP, mais le consommateur
+    garde les doublons (voir `worker/consumer.py`).
+
+    Les confirmations sont attendues au plus `publish_timeout` secondes
+    (`OUTBOX_PUBLISH_TIMEOUT_SECONDS`) : au-delà, les messages non partis sont
+    abandonnés par le publisher, la transaction est annulée (verrous relâchés)
+    et `PublishTimeout` est levée.
+
+    Retourne le nombre d'événements publiés.
+    """
+    timeout = publish_timeout or settings.OUTBOX_PUBLISH_TIMEOUT_SECONDS
+    async with session_factory() as db:
+        async with db.begin():
+            rows = (await db.execute(
+                select(EventOutbox.id, EventOutbox.event_type, EventOutbox.payload, EventOutbox.created_at)
+                .where(EventOutbox.sent_at.is_(None))
+                .order_by(EventOutbox.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                OUTBOX_PENDING_AGE.set(0)
+                return 0
+
+            confirmations = [
+                await publisher.publish(event_type, payload.encode(), message_id=str(outbox_id))
+                for outbox_id, event_type, payload, _ in rows
+            ]
+            try:
+                await asyncio.wait_for(asyncio.gather(*confirmations), timeout)
+            except asyncio.TimeoutError:
+                # Annule les confirmations : le publisher ne réessaie plus ces messages
+                for confirmed in confirmations:
+                    confirmed.cancel()
+                raise PublishTimeout(f"{len(rows)} outbox events not confirmed within {timeout}s")
+
+            now = datetime.utcnow()
+            await db.execute(
+                update(EventOutbox)
+                .where(EventOutbox.id.in_([row.id for row in rows]))
+                .values(sent_at=now)
+            )
+        OUTBOX_RELAYED.inc(len(rows))
+        OUTBOX_PENDING_AGE.set((now - rows[0].created_at).total_seconds())
+        return len(rows)
+
+
+async def purge_sent(session_factory=AsyncSessionLocal, older_than: timedelta = timedelta(hours=24)) -> int:
+    """
+    Supprime les événements envoyés depuis plus de `older_than`.
+    """
+    async with session_factory() as db:
+        result = await db.execute(
+            delete(EventOutbox)
+            .where(EventOutbox.sent_at.is_not(None))
+            .where(EventOutbox.sent_at < datetime.utcnow() - older_than)
+        )
+        await db.commit()
+        return result.rowcount
@@ -0,0 +1,75 @@
+from datetime import datetime
+import base64
+import json
+import uuid
+
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import Select, TextClause
+
+
+# -------------------------------
+# CURSEUR OPAQUE (created_at, id)
+# -------------------------------
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """
+    Position après la dernière ligne renvoyée. Opaque pour le client :
+    base64 url-safe de `created_at|id`.
+    """
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Inverse de `encode_cursor` ; lève ValueError si le curseur est invalide.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# -------------------------------
+# COMPTAGE ESTIMÉ
+# -------------------------------
+def explain(statement: Select) -> TextClause:
+    """
+    `EXPLAIN (FORMAT JSON) <requête>` avec les paramètres liés de la requête
+    (noms et types conservés : aucune valeur n'est insérée dans le SQL).
+    """
+    compiled = statement.compile(dialect=postgresql.dialect(paramstyle="named"))
+    return text(f"EXPLAIN (FORMAT JSON) {compiled}").bindparams(*(
+        bindparam(name, value, type_=compiled.binds[name].type) for name, value in compiled.params.items()
+    ))
+
+
+async def exact_count(db: AsyncSession, query: Select) -> int:
+    return (await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))).scalar() or 0
+
+
+async def estimate_count(db: AsyncSession, query: Select, table_name: str, filtered: bool) -> tuple[int, bool]:
+    """
+    Nombre de lignes de `query`, sans parcourir la table.
+
+    PostgreSQL : `pg_class.reltuples` (statistiques d'ANALYZE) sans filtre,
+    estimation du planificateur (`EXPLAIN`) avec filtres. Autres bases (tests
+    SQLite) ou table jamais analysée : comptage exact.
+    Retourne (total, exact).
+    """
+    if db.bind.dialect.name == "postgresql":
+        if not filtered:
+            reltuples = (await db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+            )).scalar()
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples), False
+        else:
+            plan = (await db.execute(explain(query.order_by(None)))).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), False
+    return await exact_count(db, query), True
@@ -0,0 +1,264 @@
+import asyncio
+from datetime import datetime, timezone
+import json
+import logging
+import time
+import uuid
+
+from redis.exceptions import ResponseError
+
+from libs.common.config import settings
+from libs.common.database import AsyncSessionLocal
+from ..redis.redis_c import redis_client
+from ..baggage_service import bulk_update_positions, append_position_history
+from ..metrics import GPS_FLUSH_LAG, GPS_PENDING_POSITIONS, GPS_FLUSHED_POSITIONS
+
+logger = logging.getLogger("baggage-position-buffer")
+
+# tag -> dernière position connue (lecture immédiate)
+POSITIONS_KEY = "baggage:positions"
+# tag -> horodatage (epoch) de cette position : garde de fraîcheur et expiration
+POSITIONS_SEEN_KEY = "baggage:positions:seen"
+# baggage_id -> dernière position pas encore persistée (coalescée par bagage)
+DIRTY_KEY = "baggage:positions:dirty"
+# champ de `DIRTY_KEY` : date (epoch) de la plus ancienne position du lot, suit le lot au renommage
+SINCE_FIELD = "queued_since"
+# lot en cours de flush ; conservé si la base échoue, repris au cycle suivant
+FLUSHING_KEY = "baggage:positions:flushing"
+# fixes bruts destinés à l'historique `baggage_positions` (liste, non coalescés)
+HISTORY_KEY = "baggage:positions:history"
+HISTORY_FLUSHING_KEY = "baggage:positions:history:flushing"
+FLUSH_LOCK_KEY = "baggage:positions:flush-lock"
+
+# Écrit les positions plus récentes que celles connues (fixes arrivés dans le
+# désordre, ou écrits en parallèle par deux workers).
+# KEYS : POSITIONS_KEY, POSITIONS_SEEN_KEY, DIRTY_KEY ;
+# ARGV[1] = 1 en write-behind, ARGV[2] = heure d'écriture (epoch), puis par
+# position : tag, baggage_id, horodatage du fix (epoch), valeur JSON.
+# Retourne le nombre de positions écrites.
+WRITE_POSITIONS_LUA = """
+-- baggage:positions-write
+local written = 0
+for i = 3, #ARGV, 4 do
+    local seen = redis.call('ZSCORE', KEYS[2], ARGV[i])
+    if not seen or tonumber(seen) <= tonumber(ARGV[i + 2]) then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 3])
+        redis.call('ZADD', KEYS[2], ARGV[i + 2], ARGV[i])
+        if ARGV[1] == '1' then
+            redis.call('HSET', KEYS[3], ARGV[i + 1], ARGV[i + 3])
+            redis.call('HSETNX', KEYS[3], 'queued_since', ARGV[2])
+        end
+        written = written + 1
+    end
+end
+return written
+"""
+
+# Retire au plus ARGV[2] positions dont le fix est antérieur à ARGV[1] (epoch).
+# KEYS : POSITIONS_KEY, POSITIONS_SEEN_KEY. Retourne le nombre de tags retirés.
+EXPIRE_POSITIONS_LUA = """
+-- baggage:positions-expire
+local tags = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #tags > 0 then
+    redis.call('HDEL', KEYS[1], unpack(tags))
+    redis.call('ZREM', KEYS[2], unpack(tags))
+end
+return #tags
+"""
+EXPIRE_BATCH_SIZE = 1000
+
+
+def _epoch(moment: datetime) -> float:
+    # Horodatages de l'ingestion : UTC naïf
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+def queue_positions(pipe, positions, history=()) -> None:
+    """
+    Ajoute au pipeline Redis l'écriture des positions
+    (tuples baggage_id, tag, latitude, longitude, seen_at ; une par bagage).
+
+    La position est toujours lisible dans `POSITIONS_KEY` ; en mode write-behind
+    elle est aussi marquée à persister dans `DIRTY_KEY`, et les fixes d'historique
+    (tuples baggage_id, latitude, longitude, recorded_at) sont empilés dans `HISTORY_KEY`.
+    Une position plus ancienne que celle déjà connue pour le tag n'est pas écrite
+    (comparaison atomique côté Redis) ; son fix reste dans l'historique.
+    """
+    args = []
+    for baggage_id, tag, lat, lon, seen_at in positions:
+        value = json.dumps({
+            "baggage_id": str(baggage_id),
+            "tag": tag,
+            "latitude": lat,
+            "longitude": lon,
+            "timestamp": seen_at.isoformat(),
+        })
+        args += [tag, str(baggage_id), _epoch(seen_at), value]
+
+    if args:
+        pipe.eval(
+            WRITE_POSITIONS_LUA, 3, POSITIONS_KEY, POSITIONS_SEEN_KEY, DIRTY_KEY,
+            int(settings.GPS_WRITE_BEHIND), time.time(), *args,
+        )
+
+    if history and settings.GPS_WRITE_BEHIND:
+        pipe.rpush(HISTORY_KEY, *(
+            json.dumps([str(baggage_id), lat, lon, recorded_at.isoformat()])
+            for baggage_id, lat, lon, recorded_at in history
+        ))
+
+
+async def expire_latest_positions(max_age_seconds: float) -> int:
+    """
+    Retire de `POSITIONS_KEY` les bagages sans fix depuis `max_age_seconds`
+    (livrés, trackers retirés) ; leur position reste lisible en base.
+    Retourne le nombre de tags retirés.
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    while True:
+        count = await redis_client.eval(
+            EXPIRE_POSITIONS_LUA, 2, POSITIONS_KEY, POSITIONS_SEEN_KEY, cutoff, EXPIRE_BATCH_SIZE
+        )
+        removed += count
+        if count < EXPIRE_BATCH_SIZE:
+            return removed
+
+
+async def _take(key: str, flushing_key: str) -> bool:
+    """
+    Bascule atomiquement `key` vers `flushing_key`, sauf si un lot précédent
+    n'a pas pu être persisté (il est alors repris tel quel).
+    """
+    if await redis_client.exists(flushing_key):
+        return True
+    try:
+        await redis_client.rename(key, flushing_key)
+        return True
+    except ResponseError:
+        return False
+
+
+async def get_latest_position(tag: str) -> dict | None:
+    raw = await redis_client.hget(POSITIONS_KEY, tag)
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+
+class PositionFlusher:
+    """
+    Tâche de fond qui persiste les positions en attente dans `baggages`.
+
+    Toutes les `interval` secondes (ou plus tôt si `max_pending` positions
+    attendent), les lots `DIRTY_KEY` et `HISTORY_KEY` sont renommés atomiquement
+    puis appliqués en un UPDATE groupé et une insertion d'historique, dans une
+    même transaction. `stop()` vide le buffer avant l'arrêt.
+
+    À chaque cycle, même sans flush (lock pris par un autre worker, base en
+    erreur), `baggage_gps_flush_lag_seconds` donne l'âge de la plus ancienne
+    position non persistée.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, interval: float | None = None, max_pending: int | None = None):
+        self.session_factory = session_factory
+        self.interval = interval or settings.GPS_FLUSH_INTERVAL_SECONDS
+        self.max_pending = max_pending or settings.GPS_FLUSH_MAX_PENDING
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self, pending: int) -> None:
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.drain()
+
+    async def drain(self, max_rounds: int = 10) -> None:
+        for _ in range(max_rounds):
+            if not await self.flush_once():
+                break
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush_once()
+            except Exception:
+                logger.exception("GPS flush failed, will retry")
+            try:
+                await self.update_metrics()
+            except Exception:
+                logger.exception("GPS flush metrics unavailable")
+
+    async def update_metrics(self) -> None:
+        """
+        Âge de la plus ancienne position en attente (lot en cours de flush
+        compris) et nombre de positions en attente.
+        """
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hget(FLUSHING_KEY, SINCE_FIELD)
+            pipe.hget(DIRTY_KEY, SINCE_FIELD)
+            pipe.hlen(DIRTY_KEY)
+            flushing_since, dirty_since, pending = await pipe.execute()
+        since = [float(value) for value in (flushing_since, dirty_since) if value is not None]
+        GPS_FLUSH_LAG.set(time.time() - min(since) if since else 0)
+        GPS_PENDING_POSITIONS.set(max(pending - 1, 0))
+
+    async def flush_once(self) -> int:
+        """
+        Persiste un lot de positions en attente.
+        Retourne le nombre de lignes écrites (positions + historique).
+        """
+        token = uuid.uuid4().hex
+        if not await redis_client.set(FLUSH_LOCK_KEY, token, nx=True, px=int(max(self.interval, 1) * 10_000)):
+            return 0
+
+        try:
+            rows = []
+            if await _take(DIRTY_KEY, FLUSHING_KEY):
+                for baggage_id, raw in (await redis_client.hgetall(FLUSHING_KEY)).items():
+                    if baggage_id == SINCE_FIELD:
+                        continue
+                    position = json.loads(raw)
+                    rows.append((
+                        uuid.UUID(baggage_id),
+                        position["latitude"],
+                        position["longitude"],
+                        datetime.fromisoformat(position["timestamp"]),
+                    ))
+
+            history = []
+            if await _take(HISTORY_KEY, HISTORY_FLUSHING_KEY):
+                for raw in await redis_client.lrange(HISTORY_FLUSHING_KEY, 0, -1):
+                    baggage_id, lat, lon, recorded_at = json.loads(raw)
+                    history.append((uuid.UUID(baggage_id), lat, lon, datetime.fromisoformat(recorded_at)))
+
+            if rows or history:
+                async with self.session_factory() as db:
+                    await bulk_update_positions(db, rows)
+                    await append_position_history(db, history)
+                    await db.commit()
+                await redis_client.delete(FLUSHING_KEY, HISTORY_FLUSHING_KEY)
+                GPS_FLUSHED_POSITIONS.inc(len(rows))
+            return len(rows) + len(history)
+        finally:
+            if await redis_client.get(FLUSH_LOCK_KEY) == token:
+                await redis_client.delete(FLUSH_LOCK_KEY)
+
+
+position_flusher = PositionFlusher()
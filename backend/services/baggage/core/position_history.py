@@ -0,0 +1,191 @@
+from datetime import date, datetime, timedelta
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger("baggage-position-history")
+
+PARENT_TABLE = "baggage_positions"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+# Reçoit les lignes sans partition journalière (voir `create_partition`)
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+# Commentaire posé sur une partition déjà sous-échantillonnée
+ROLLUP_MARKER = "rollup:1m"
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    """
+    Jour couvert par une partition journalière, None pour les autres
+    (partition par défaut, table temporaire de rollup...).
+    """
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def _bounds(day: date) -> str:
+    return f"FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+
+
+async def list_partitions(conn: AsyncConnection) -> list[tuple[str, date, bool]]:
+    """
+    Retourne les partitions journalières : (nom, jour, déjà sous-échantillonnée).
+    """
+    result = await conn.execute(text("""
+        SELECT c.relname, obj_description(c.oid, 'pg_class')
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+    """), {"parent": PARENT_TABLE})
+
+    partitions = []
+    for name, comment in result.all():
+        day = partition_day(name)
+        if day is not None:
+            partitions.append((name, day, comment == ROLLUP_MARKER))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def default_partition_days(conn: AsyncConnection, since: date) -> set[date]:
+    """
+    Jours (à partir de `since`) ayant des lignes dans la partition par défaut.
+    """
+    result = await conn.execute(text(
+        f"SELECT DISTINCT recorded_at::date FROM {DEFAULT_PARTITION} WHERE recorded_at >= :since"
+    ), {"since": since})
+    return set(result.scalars().all())
+
+
+async def create_partition(conn: AsyncConnection, day: date) -> None:
+    """
+    Crée la partition journalière de `day`.
+
+    Un simple `CREATE TABLE ... PARTITION OF` échoue si la partition par
+    défaut contient déjà des lignes du jour : la table est donc créée à
+    part, ces lignes y sont déplacées, puis elle est attachée.
+    À exécuter dans une transaction.
+    """
+    name = partition_name(day)
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING ALL)"))
+    await conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE recorded_at >= :start AND recorded_at < :end
+            RETURNING baggage_id, recorded_at, latitude, longitude
+        )
+        INSERT INTO {name} (baggage_id, recorded_at, latitude, longitude)
+        SELECT baggage_id, recorded_at, latitude, longitude FROM moved
+    """), {"start": day, "end": day + timedelta(days=1)})
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds(day)}"))
+
+
+async def ensure_partitions(engine, days: list[date]) -> tuple[int, int]:
+    """
+    Crée les partitions journalières de `days`, chacune dans sa propre
+    transaction : un échec est journalisé et n'empêche ni les autres
+    créations ni le reste de la maintenance.
+    Retourne (créées, en échec).
+    """
+    created = failed = 0
+    for day in days:
+        try:
+            async with engine.begin() as conn:
+                await create_partition(conn, day)
+            created += 1
+        except Exception:
+            logger.exception(f"Cannot create partition {partition_name(day)}")
+            failed += 1
+    return created, failed
+
+
+async def purge_default_partition(conn: AsyncConnection, before: date) -> int:
+    """
+    Rétention de la partition par défaut : supprime ses lignes antérieures à `before`.
+    """
+    result = await conn.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at < :before"
+    ), {"before": before})
+    return result.rowcount
+
+
+async def rollup_partition(conn: AsyncConnection, day: date) -> None:
+    """
+    Sous-échantillonne une partition à un point par minute et par bagage
+    (le dernier fix de la minute).
+
+    Les points retenus sont copiés dans une table neuve qui remplace la
+    partition d'origine (DETACH / DROP / ATTACH) : pas de DELETE massif,
+    donc pas de table gonflée à vacuumer. À exécuter dans une transaction.
+    """
+    name = partition_name(day)
+    staging = f"{name}_rollup"
+
+    await conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    await conn.execute(text(f"CREATE TABLE {staging} (LIKE {PARENT_TABLE} INCLUDING ALL)"))
+    await conn.execute(text(f"""
+        INSERT INTO {staging} (baggage_id, recorded_at, latitude, longitude)
+        SELECT DISTINCT ON (baggage_id, date_trunc('minute', recorded_at))
+               baggage_id, recorded_at, latitude, longitude
+        FROM {name}
+        ORDER BY baggage_id, date_trunc('minute', recorded_at), recorded_at DESC
+    """))
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    await conn.execute(text(f"DROP TABLE {name}"))
+    await conn.execute(text(f"ALTER TABLE {staging} RENAME TO {name}"))
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds(day)}"))
+    await conn.execute(text(f"COMMENT ON TABLE {name} IS '{ROLLUP_MARKER}'"))
+
+
+async def drop_partition(conn: AsyncConnection, day: date) -> None:
+    await conn.execute(text(f"DROP TABLE IF EXISTS {partition_name(day)}"))
+
+
+async def run_maintenance(engine, today: date, ahead_days: int, raw_days: int, retention_days: int) -> dict:
+    """
+    Maintenance de l'historique des positions :
+    - purge la partition par défaut des lignes de plus de `retention_days` jours
+    - crée les partitions des `ahead_days` prochains jours, ainsi que celles des
+      jours encore retenus présents dans la partition par défaut (lignes
+      déplacées), qui suivent ensuite le cycle normal
+    - sous-échantillonne à la minute les partitions de plus de `raw_days` jours
+    - supprime les partitions de plus de `retention_days` jours
+
+    Chaque étape, et chaque partition, est traitée dans sa propre transaction.
+    """
+    stats = {"created": 0, "failed": 0, "rolled_up": 0, "dropped": 0, "purged": 0}
+    cutoff = today - timedelta(days=retention_days)
+
+    async with engine.begin() as conn:
+        stats["purged"] = await purge_default_partition(conn, cutoff)
+
+    async with engine.begin() as conn:
+        existing = {day for _, day, _ in await list_partitions(conn)}
+        wanted = {today + timedelta(days=offset) for offset in range(ahead_days + 1)}
+        wanted |= await default_partition_days(conn, cutoff)
+    stats["created"], stats["failed"] = await ensure_partitions(engine, sorted(wanted - existing))
+
+    async with engine.begin() as conn:
+        partitions = await list_partitions(conn)
+
+    for _, day, rolled_up in partitions:
+        age = (today - day).days
+        if age > retention_days:
+            async with engine.begin() as conn:
+                await drop_partition(conn, day)
+            stats["dropped"] += 1
+        elif age > raw_days and not rolled_up:
+            async with engine.begin() as conn:
+                await rollup_partition(conn, day)
+            stats["rolled_up"] += 1
+
+    logger.info(f"Position history maintenance: {stats}")
+    return stats
@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import io
+import logging
+import os
+
+import qrcode
+
+from libs.common.config import settings
+from ..metrics import QR_RENDERS, QR_RENDER_SECONDS
+from ..storage.base import ObjectInfo, Storage
+from ..storage.client import storage as default_storage
+
+logger = logging.getLogger("baggage-qr")
+
+# Incrémentée si le rendu change (taille, marges, correction d'erreur) :
+# les clés, donc le cache et les ETag, changent avec elle.
+RENDER_VERSION = 1
+
+
+def render_qr_png(tag: str) -> bytes:
+    """
+    Rendu PNG du QR code d'un tag. Fonction de module (picklable) exécutée
+    dans les processus du pool.
+    """
+    buffer = io.BytesIO()
+    qrcode.make(tag).save(buffer)
+    return buffer.getvalue()
+
+
+def qr_key(tag: str) -> str:
+    """
+    Clé de contenu du QR code : l'image ne dépend que du tag et de la version
+    du rendu. Sert de nom d'objet dans le stockage et d'ETag.
+    """
+    return hashlib.sha256(f"qr:v{RENDER_VERSION}:{tag}".encode()).hexdigest()
+
+
+def qr_object_key(key: str) -> str:
+    # Préfixe de deux caractères : évite un répertoire géant en stockage local
+    return f"qr/{key[:2]}/{key}.png"
+
+
+class QrRenderer:
+    """
+    Rendu des QR codes hors de la boucle d'événements, à la demande.
+
+    - rendu dans un `ProcessPoolExecutor` (`QR_RENDER_WORKERS`, par défaut un
+      processus par cœur), créé au premier besoin ;
+    - images stockées par contenu (`qr_key`) dans le stockage objet, partagé
+      entre réplicas en S3 : le premier téléchargement rend et écrit l'image,
+      les suivants la relisent ;
+    - rendus concurrents d'un même tag fusionnés (un seul rendu en vol).
+    """
+
+    def __init__(self, storage: Storage | None = None, workers: int | None = None):
+        self.storage = storage or default_storage
+        self.workers = workers or settings.QR_RENDER_WORKERS or os.cpu_count() or 1
+        self._pool: ProcessPoolExecutor | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def render(self, tag: str) -> bytes:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        with QR_RENDER_SECONDS.time():
+            png = await loop.run_in_executor(self._pool, render_qr_png, tag)
+        QR_RENDERS.inc()
+        return png
+
+    async def get(self, tag: str) -> ObjectInfo:
+        """
+        Retourne l'objet stocké du QR code en rendant l'image si besoin.
+        """
+        key = qr_key(tag)
+        info = await self.storage.stat(qr_object_key(key))
+        if info is not None:
+            return info
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = self._inflight[key] = asyncio.ensure_future(self._render_to_storage(tag, key))
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(pending)
+
+    async def _render_to_storage(self, tag: str, key: str) -> ObjectInfo:
+        png = await self.render(tag)
+        return await self.storage.put(qr_object_key(key), png, "image/png")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+qr_renderer = QrRenderer()
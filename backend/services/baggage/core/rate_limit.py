@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from collections import Counter
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from libs.common.config import settings
+from libs.common.database import engine
+from ..redis.redis_c import redis_client
+from ..metrics import INGEST_THROTTLED, INGEST_SHED
+
+logger = logging.getLogger("baggage-rate-limit")
+
+DEVICE_PREFIX = "ratelimit:device:"
+IP_PREFIX = "ratelimit:ip:"
+
+# Token buckets évalués atomiquement côté Redis (valables pour tous les workers).
+# Pour chaque clé i : ARGV[3i-2] = débit (jetons/s), ARGV[3i-1] = capacité, ARGV[3i] = coût
+# (nombre de requêtes ou datagrammes du lot pour ce device ou cette IP).
+# Retourne 1 (accepté) ou 0 (refusé) par clé.
+TOKEN_BUCKET_LUA = """
+-- baggage:token-bucket
+local now = redis.call('TIME')
+local now_ms = now[1] * 1000 + math.floor(now[2] / 1000)
+local result = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 3 - 2])
+    local burst = tonumber(ARGV[i * 3 - 1])
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 't', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now_ms
+    tokens = math.min(burst, tokens + (now_ms - ts) / 1000 * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', key, 't', tostring(tokens), 'ts', now_ms)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+    result[i] = allowed
+end
+return result
+"""
+
+
+class IngestThrottled(Exception):
+    pass
+
+
+class TokenBucketLimiter:
+    """
+    Limiteur par IP source puis par device_id (un appel Redis pour les IP, un
+    pour tous les devices du lot).
+    En cas d'indisponibilité de Redis, l'ingestion n'est pas bloquée (fail open).
+    """
+
+    def __init__(self, redis=None):
+        # None : client partagé du module, résolu à chaque appel
+        self._redis = redis
+        self._script = (redis or redis_client).register_script(TOKEN_BUCKET_LUA)
+
+    async def charge(self, requests: list[tuple[str | None, dict]]) -> list[tuple[bool, set]]:
+        """
+        `requests` : une entrée (IP source ou None, device_id -> nombre de fixes)
+        par requête HTTP ou par datagramme UDP, un lot UDP en regroupant plusieurs.
+        Retourne, par requête, (IP refusée, device_id refusés).
+
+        Une requête coûte un jeton à son IP et un jeton à chaque device présent,
+        quel que soit son nombre de fixes : une trame binaire ou un lot de
+        passerelle (jusqu'à 255 fixes) dépasserait sinon la capacité du bucket
+        et serait refusé indéfiniment. Un device ou une IP présent dans
+        plusieurs requêtes d'un même lot paie autant de jetons, en une fois.
+        Les IP sont vérifiées d'abord : une requête refusée pour son IP ne
+        consomme aucun jeton device.
+        """
+        verdicts = [(False, set()) for _ in requests]
+        if not settings.INGEST_RATE_LIMIT_ENABLED or not requests:
+            return verdicts
+
+        client = self._redis or redis_client
+        try:
+            ip_costs = Counter(ip for ip, _ in requests if ip)
+            refused_ips = set()
+            if ip_costs:
+                ips = list(ip_costs)
+                args = []
+                for ip in ips:
+                    args += [settings.INGEST_IP_RATE_PER_SECOND, settings.INGEST_IP_BURST, ip_costs[ip]]
+                flags = await self._script(keys=[IP_PREFIX + ip for ip in ips], args=args, client=client)
+                refused_ips = {ip for ip, allowed in zip(ips, flags) if not allowed}
+
+            device_costs = Counter(
+                device_id for ip, devices in requests if ip not in refused_ips for device_id in devices
+            )
+            refused_devices = set()
+            if device_costs:
+                devices = list(device_costs)
+                args = []
+                for device_id in devices:
+                    args += [settings.INGEST_DEVICE_RATE_PER_SECOND, settings.INGEST_DEVICE_BURST, device_costs[device_id]]
+                flags = await self._script(
+                    keys=[DEVICE_PREFIX + device_id for device_id in devices], args=args, client=client
+                )
+                refused_devices = {device_id for device_id, allowed in zip(devices, flags) if not allowed}
+        except RedisError as e:
+            logger.warning(f"Rate limiter unavailable, allowing ingest: {e}")
+            return verdicts
+
+        for index, (ip, devices) in enumerate(requests):
+            if ip in refused_ips:
+                INGEST_THROTTLED.labels(scope="ip").inc()
+                verdicts[index] = (True, set(devices))
+                continue
+            throttled = {device_id for device_id in devices if device_id in refused_devices}
+            if throttled:
+                INGEST_THROTTLED.labels(scope="device").inc(sum(devices[d] for d in throttled))
+            verdicts[index] = (False, throttled)
+        return verdicts
+
+    async def check(self, device_counts: dict, client_ip: str | None = None) -> set:
+        """
+        Limite une requête HTTP (`device_counts` : device_id -> nombre de fixes).
+        Retourne l'ensemble des device_id refusés ; lève `IngestThrottled` si
+        c'est l'IP source qui dépasse sa limite.
+        """
+        if not device_counts:
+            return set()
+        ip_refused, throttled = (await self.charge([(client_ip, device_counts)]))[0]
+        if ip_refused:
+            raise IngestThrottled(client_ip)
+        return throttled
+
+
+rate_limiter = TokenBucketLimiter()
+
+
+# -------------------------------
+# Délestage
+# -------------------------------
+_slots = asyncio.Semaphore(settings.INGEST_MAX_CONCURRENCY)
+
+
+def pool_saturated() -> bool:
+    """
+    Vrai si toutes les connexions du pool `libs.common.database` sont prises :
+    le débordement autorisé (`DATABASE_MAX_OVERFLOW`) est atteint et aucune
+    connexion n'est libre.
+    """
+    pool = engine.pool
+    max_overflow = settings.DATABASE_MAX_OVERFLOW
+    if not hasattr(pool, "overflow") or max_overflow < 0:
+        return False
+    return pool.overflow() >= max_overflow and pool.checkedin() == 0
+
+
+async def ingest_slot():
+    """
+    Dépendance des routes d'ingestion : refuse immédiatement (503) plutôt que
+    de faire la queue quand le pool de connexions ou la concurrence
+    d'ingestion est saturé.
+    """
+    if pool_saturated():
+        INGEST_SHED.labels(reason="pool").inc()
+        raise HTTPException(503, detail="Ingest overloaded", headers={"Retry-After": "1"})
+    if _slots.locked():
+        INGEST_SHED.labels(reason="concurrency").inc()
+        raise HTTPException(503, detail="Ingest overloaded", headers={"Retry-After": "1"})
+    async with _slots:
+        yield
@@ -0,0 +1,58 @@
+import re
+
+from libs.common.config import settings
+
+# Flux Redis plafonné portant tous les événements temps réel des bagages.
+# Chaque entrée : {"channel": "baggage.gps" | "baggage.scan" | "baggage.status", "data": <JSON>}
+STREAM_KEY = "baggage:events"
+
+_STREAM_ID = re.compile(r"^\d+(-\d+)?$")
+
+
+def is_stream_id(value: str) -> bool:
+    return bool(_STREAM_ID.match(value))
+
+
+def stream_id_key(entry_id: str) -> tuple[int, int]:
+    """
+    Clé de tri d'un identifiant de flux "<ms>-<seq>" (la comparaison de chaînes
+    ne suffit pas : "9-0" > "10-0").
+    """
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def append_event(client, channel: str, data: str | bytes):
+    """
+    Ajoute un événement au flux (XADD avec MAXLEN approximatif). `data` est
+    l'événement déjà encodé (`Event.encode()` ou corps d'un message RabbitMQ),
+    écrit tel quel.
+    `client` peut être le client Redis ou un pipeline : la commande est alors
+    seulement mise en file.
+    """
+    return client.xadd(
+        STREAM_KEY,
+        {"channel": channel, "data": data},
+        maxlen=settings.STREAM_MAXLEN,
+        approximate=True,
+    )
+
+
+async def read_since(client, last_id: str, limit: int):
+    """
+    Relit les entrées postérieures à `last_id`, au plus `limit`.
+
+    Retourne (entrées, complet) ; `complet` est False si des entrées ont été
+    perdues entre-temps (`last_id` antérieur au début du flux plafonné, ou plus
+    de `limit` entrées manquées) : le client doit alors recharger son état.
+    """
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.xrange(STREAM_KEY, min="-", max="+", count=1)
+        pipe.xrange(STREAM_KEY, min=f"({last_id}", max="+", count=limit + 1)
+        oldest, entries = await pipe.execute()
+
+    if len(entries) > limit:
+        return [], False
+    # Le plus ancien élément conservé est postérieur à `last_id` : le flux a été tronqué
+    complete = not oldest or stream_id_key(oldest[0][0]) <= stream_id_key(last_id)
+    return entries, complete
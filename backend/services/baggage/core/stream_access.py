@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from uuid import UUID
+
+from fastapi import Depends, HTTPException
+from fastapi.requests import HTTPConnection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from libs.common.database import get_db
+from services.auth.core.roles import UserRole
+from services.auth.dependencies.user import get_current_user
+from ..baggage_service import list_baggages_for_user
+from ..schemas.stream import StreamSubscription
+
+# Rôles qui voient tous les bagages (comme `GET /baggages/{tag}`)
+UNRESTRICTED_ROLES = (UserRole.ADMIN, UserRole.ATC)
+
+
+async def stream_user(conn: HTTPConnection, db: AsyncSession = Depends(get_db, scope="function")):
+    """
+    Utilisateur d'un flux temps réel (SSE ou WebSocket).
+
+    Jeton Bearer dans l'en-tête `Authorization`, ou dans `?access_token=`
+    pour `EventSource` et les WebSocket de navigateur, qui ne peuvent pas
+    envoyer d'en-têtes personnalisés.
+    """
+    scheme, _, token = conn.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        token = conn.query_params.get("access_token")
+    if not token:
+        raise HTTPException(401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return await get_current_user(token, db)
+
+
+@dataclass(frozen=True)
+class StreamScope:
+    """
+    Bagages visibles par un utilisateur sur le flux : `None` = pas de
+    restriction sur cette dimension.
+    """
+    company_id: UUID | None = None
+    tags: frozenset[str] | None = None
+
+    def apply(self, filters: StreamSubscription) -> StreamSubscription:
+        """
+        Restreint `filters` au périmètre ; lève 403 s'ils demandent des
+        bagages hors périmètre.
+        """
+        update = {}
+        if self.company_id is not None:
+            if any(c != self.company_id for c in filters.company_ids):
+                raise HTTPException(403, detail="Not allowed")
+            update["company_ids"] = [self.company_id]
+        if self.tags is not None:
+            tags = set(filters.tags) or self.tags
+            # Aucun tag : l'abonnement ne serait pas filtré
+            if not tags or not tags <= self.tags:
+                raise HTTPException(403, detail="Not allowed")
+            update["tags"] = sorted(tags)
+        return filters.model_copy(update=update) if update else filters
+
+
+async def stream_scope(db: AsyncSession, user) -> StreamScope:
+    """
+    Périmètre de `user` :
+
+    - admin, ATC : tous les bagages ;
+    - compagnie : bagages de sa compagnie ;
+    - passager : ses propres bagages (tags résolus à la connexion ; un bagage
+      enregistré ensuite est suivi après reconnexion).
+    """
+    if user.role in UNRESTRICTED_ROLES:
+        return StreamScope()
+    if user.role == UserRole.COMPAGNIE:
+        if user.company_id is None:
+            raise HTTPException(403, detail="Not allowed")
+        return StreamScope(company_id=user.company_id)
+    owned = await list_baggages_for_user(db, user.id)
+    return StreamScope(tags=frozenset(baggage.tag for baggage in owned))
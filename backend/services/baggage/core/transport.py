@@ -0,0 +1,275 @@
+from datetime import datetime, timezone
+import asyncio
+import heapq
+import itertools
+
+import aio_pika
+
+from libs.common.config import settings
+
+# -------------------------------
+# Sélection du transport
+# -------------------------------
+NETWORK = "network"
+MEMORY = "memory"
+
+
+async def connect_broker(url: str):
+    """
+    Connexion au broker d'événements selon `BAGGAGE_TRANSPORT` :
+    RabbitMQ (`aio_pika.connect_robust`) ou broker en process.
+    """
+    if settings.BAGGAGE_TRANSPORT == MEMORY:
+        return await memory_broker.connect_robust(url)
+    return await aio_pika.connect_robust(url)
+
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+    """
+    Correspondance d'une clé de routage avec un motif d'exchange topic
+    (`*` : exactement un mot, `#` : zéro ou plusieurs mots).
+    """
+    def match(words, keys):
+        if not words:
+            return not keys
+        if words[0] == "#":
+            return any(match(words[1:], keys[i:]) for i in range(len(keys) + 1))
+        return bool(keys) and words[0] in ("*", keys[0]) and match(words[1:], keys[1:])
+    return match(pattern.split("."), routing_key.split("."))
+
+
+# -------------------------------
+# Broker en mémoire
+# -------------------------------
+class MemoryMessage:
+    """
+    Message livré à un consommateur (sous-ensemble de `aio_pika.IncomingMessage`).
+    """
+
+    __slots__ = ("body", "routing_key", "timestamp", "delivery_tag", "redelivered", "_queue", "_channel", "_seq")
+
+    def __init__(self, queue, channel, seq: int, body: bytes, routing_key: str, timestamp, delivery_tag: int, redelivered: bool):
+        self.body = body
+        self.routing_key = routing_key
+        self.timestamp = timestamp
+        self.delivery_tag = delivery_tag
+        self.redelivered = redelivered
+        self._queue = queue
+        self._channel = channel
+        self._seq = seq
+
+    async def ack(self, multiple: bool = False) -> None:
+        self._channel._settle(self.delivery_tag, multiple, requeue=False)
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self._channel._settle(self.delivery_tag, multiple, requeue=requeue)
+
+    async def reject(self, requeue: bool = False) -> None:
+        self._channel._settle(self.delivery_tag, False, requeue=requeue)
+
+
+class DeclarationResult:
+    __slots__ = ("message_count", "consumer_count")
+
+    def __init__(self, message_count: int, consumer_count: int):
+        self.message_count = message_count
+        self.consumer_count = consumer_count
+
+
+class MemoryQueue:
+    """
+    File partagée entre les canaux qui la consomment : livraison à tour de
+    rôle, dans la limite du prefetch de chaque canal ; un message non acquitté
+    à la fermeture de son canal (ou nacké avec requeue) reprend sa place.
+    """
+
+    def __init__(self, broker, name: str):
+        self.broker = broker
+        self.name = name
+        self._ready: list = []  # tas (seq, body, routing_key, timestamp, redelivered)
+        self._consumers: list = []  # (canal, callback)
+        self._next = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def declaration_result(self) -> DeclarationResult:
+        return DeclarationResult(len(self._ready), len(self._consumers))
+
+    def _push(self, seq: int, body: bytes, routing_key: str, timestamp, redelivered: bool = False) -> None:
+        heapq.heappush(self._ready, (seq, body, routing_key, timestamp, redelivered))
+        self._wakeup.set()
+
+    async def bind(self, exchange, routing_key: str = "#") -> None:
+        bindings = self.broker.bindings.setdefault(exchange.name, [])
+        if (routing_key, self) not in bindings:
+            bindings.append((routing_key, self))
+
+    async def consume(self, callback, no_ack: bool = False, channel=None) -> str:
+        self._consumers.append((channel, callback))
+        if self._task is None:
+            self._task = asyncio.create_task(self._deliver())
+        return f"ctag-{self.name}-{len(self._consumers)}"
+
+    def _remove_channel(self, channel) -> None:
+        self._consumers = [consumer for consumer in self._consumers if consumer[0] is not channel]
+        if not self._consumers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _pick(self):
+        for offset in range(len(self._consumers)):
+            index = (self._next + offset) % len(self._consumers)
+            channel, callback = self._consumers[index]
+            if channel.has_capacity():
+                self._next = index + 1
+                return channel, callback
+        return None
+
+    async def _deliver(self) -> None:
+        while True:
+            self._wakeup.clear()
+            while self._ready:
+                consumer = self._pick()
+                if consumer is None:
+                    break
+                channel, callback = consumer
+                seq, body, routing_key, timestamp, redelivered = heapq.heappop(self._ready)
+                message = channel._track(self, seq, body, routing_key, timestamp, redelivered)
+                await callback(message)
+            await self._wakeup.wait()
+
+
+class MemoryExchange:
+    def __init__(self, broker, name: str):
+        self.broker = broker
+        self.name = name
+
+    async def publish(self, message, routing_key: str, mandatory: bool = True, timeout=None) -> None:
+        # Confirmation immédiate : le message est routé dès la publication
+        self.broker.route(self.name, routing_key, message.body, message.timestamp)
+
+
+class MemoryChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.prefetch_count = 0
+        self._delivery_tags = itertools.count(1)
+        self._unacked: dict[int, MemoryMessage] = {}
+        self._queues: set = set()
+
+    def has_capacity(self) -> bool:
+        return not self.prefetch_count or len(self._unacked) < self.prefetch_count
+
+    def _track(self, queue, seq, body, routing_key, timestamp, redelivered) -> MemoryMessage:
+        message = MemoryMessage(queue, self, seq, body, routing_key, timestamp, next(self._delivery_tags), redelivered)
+        self._unacked[message.delivery_tag] = message
+        return message
+
+    def _settle(self, delivery_tag: int, multiple: bool, requeue: bool) -> None:
+        tags = [tag for tag in self._unacked if tag <= delivery_tag] if multiple else [delivery_tag]
+        for tag in tags:
+            message = self._unacked.pop(tag, None)
+            if message is None:
+                continue
+            if requeue:
+                message._queue._push(message._seq, message.body, message.routing_key, message.timestamp, True)
+            else:
+                message._queue._wakeup.set()
+
+    async def set_qos(self, prefetch_count: int = 0, **kwargs) -> None:
+        self.prefetch_count = prefetch_count
+
+    async def declare_exchange(self, name: str, type=None, durable: bool = False, **kwargs) -> MemoryExchange:
+        return self.broker.exchanges.setdefault(name, MemoryExchange(self.broker, name))
+
+    async def get_exchange(self, name: str, ensure: bool = True) -> MemoryExchange:
+        if ensure and name not in self.broker.exchanges:
+            raise LookupError(f"Exchange {name} not found")
+        return self.broker.exchanges.setdefault(name, MemoryExchange(self.broker, name))
+
+    async def declare_queue(self, name: str, durable: bool = False, passive: bool = False, **kwargs):
+        if passive and name not in self.broker.queues:
+            raise LookupError(f"Queue {name} not found")
+        queue = self.broker.queues.setdefault(name, MemoryQueue(self.broker, name))
+        return _BoundQueue(queue, self)
+
+    async def close(self) -> None:
+        for queue in self._queues:
+            queue._remove_channel(self)
+        self._settle(max(self._unacked, default=0), multiple=True, requeue=True)
+
+
+class _BoundQueue:
+    # Vue d'une file depuis un canal : `consume` enregistre le canal consommateur
+    def __init__(self, queue: MemoryQueue, channel: MemoryChannel):
+        self._queue = queue
+        self._channel = channel
+        self.name = queue.name
+
+    @property
+    def declaration_result(self) -> DeclarationResult:
+        return self._queue.declaration_result
+
+    async def bind(self, exchange, routing_key: str = "#") -> None:
+        await self._queue.bind(exchange, routing_key)
+
+    async def consume(self, callback, no_ack: bool = False) -> str:
+        self._channel._queues.add(self._queue)
+        return await self._queue.consume(callback, no_ack, channel=self._channel)
+
+
+class MemoryConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self._channels: list[MemoryChannel] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def channel(self, publisher_confirms: bool = True) -> MemoryChannel:
+        channel = MemoryChannel(self)
+        self._channels.append(channel)
+        return channel
+
+    async def close(self) -> None:
+        for channel in self._channels:
+            await channel.close()
+        self._channels = []
+
+
+class MemoryBroker:
+    """
+    Broker d'événements en process, compatible avec l'usage qu'en font
+    `EventPublisher` et `EventConsumer` : exchanges topic, files partagées
+    entre consommateurs, prefetch, ack / nack (`multiple`, `requeue`).
+
+    Les publications sont confirmées immédiatement et rien n'est persisté :
+    sert aux benchmarks de bout en bout et au développement sans RabbitMQ
+    (`BAGGAGE_TRANSPORT=memory`).
+    """
+
+    def __init__(self):
+        self.exchanges: dict[str, MemoryExchange] = {}
+        self.queues: dict[str, MemoryQueue] = {}
+        self.bindings: dict[str, list] = {}
+        self._seq = itertools.count()
+
+    async def connect_robust(self, url: str | None = None, **kwargs) -> MemoryConnection:
+        return MemoryConnection(self)
+
+    def route(self, exchange: str, routing_key: str, body: bytes, timestamp=None) -> int:
+        timestamp = timestamp or datetime.now(timezone.utc)
+        routed = 0
+        for pattern, queue in self.bindings.get(exchange, ()):
+            if topic_matches(pattern, routing_key):
+                queue._push(next(self._seq), body, routing_key, timestamp)
+                routed += 1
+        return routed
+
+
+memory_broker = MemoryBroker()
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+from collections import Counter
+
+from pydantic import ValidationError
+
+from libs.common.config import settings
+from libs.common.database import AsyncSessionLocal
+from ..schemas.tracker import TrackerFix
+from ..metrics import UDP_DATAGRAMS, UDP_QUEUE_DEPTH
+from .tracker_frame import decode_frames, FrameError, MAGIC
+from .ingest import ingest_fixes
+from .rate_limit import rate_limiter
+
+logger = logging.getLogger("baggage-udp-ingest")
+
+# Marqueur d'arrêt empilé par `stop` après le dernier datagramme reçu
+_STOP = object()
+
+
+def decode_datagram(data: bytes) -> list:
+    """
+    Un datagramme contient soit des trames binaires (`core/tracker_frame.py`),
+    soit un JSON `{device_id, lat, lon, ts}` ou un tableau de ces objets.
+    Lève ValueError pour tout autre JSON (`5`, `null`, chaîne…).
+    """
+    if data[:2] == MAGIC:
+        return decode_frames(data)
+    payload = json.loads(data)
+    if isinstance(payload, dict):
+        payload = [payload]
+    elif not isinstance(payload, list):
+        raise ValueError("UDP payload must be a JSON object or array")
+    return [TrackerFix.model_validate(item) for item in payload]
+
+
+class TrackerDatagramProtocol(asyncio.DatagramProtocol):
+    """
+    Réception brute : le callback ne fait qu'empiler le datagramme et son IP source.
+    Si la file est pleine, le datagramme est abandonné et compté (backpressure).
+    """
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            self.queue.put_nowait((data, addr[0]))
+        except asyncio.QueueFull:
+            UDP_DATAGRAMS.labels(outcome="dropped").inc()
+            return
+        UDP_DATAGRAMS.labels(outcome="received").inc()
+
+    def error_received(self, exc: Exception) -> None:
+        logger.warning(f"UDP socket error: {exc}")
+
+
+async def ingest_with_session(fixes) -> None:
+    async with AsyncSessionLocal() as db:
+        await ingest_fixes(db, fixes, source="udp", rate_limit=False)
+
+
+class UdpIngestServer:
+    """
+    Listener UDP des trackers, démarré depuis le lifespan du service.
+
+    Les datagrammes sont décodés et regroupés par lots (jusqu'à `batch_size`,
+    sans attendre) puis passés à `handler` — par défaut le pipeline
+    d'ingestion commun (`ingest_fixes`) avec sa propre session.
+
+    Le débit est limité par datagramme, comme une requête HTTP : chacun coûte
+    un jeton à son IP source et un jeton par device présent (`limiter.charge`,
+    deux appels Redis par lot). Les datagrammes refusés pour leur IP et les
+    fixes des devices refusés ne sont pas transmis à `handler`.
+    """
+
+    def __init__(
+        self, handler=None, queue_size: int | None = None, batch_size: int | None = None, limiter=None
+    ):
+        self.handler = handler or ingest_with_session
+        self.limiter = limiter or rate_limiter
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.TRACKER_UDP_QUEUE_SIZE)
+        self.batch_size = batch_size or settings.TRACKER_UDP_BATCH_SIZE
+        self.transport = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self, host: str | None = None, port: int | None = None):
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: TrackerDatagramProtocol(self.queue),
+            local_addr=(host or settings.TRACKER_UDP_HOST, settings.TRACKER_UDP_PORT if port is None else port),
+        )
+        self._task = asyncio.create_task(self._consume())
+        return self.transport.get_extra_info("sockname")
+
+    async def stop(self) -> None:
+        """
+        Ferme le socket puis empile `_STOP` derrière les datagrammes déjà
+        reçus : le consommateur termine son lot en cours, traite le reste de
+        la file dans l'ordre et s'arrête de lui-même (pas d'annulation en
+        plein milieu d'un commit, jamais deux lots en parallèle).
+        """
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+        if self._task:
+            await self.queue.put(_STOP)
+            await self._task
+            self._task = None
+
+    def _take_batch(self, batch: list) -> tuple[list, bool]:
+        """
+        Complète `batch` sans attendre ; retourne aussi True si `_STOP` a été lu.
+        """
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _consume(self) -> None:
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+            batch, stopping = self._take_batch([item])
+            try:
+                await self._process(batch)
+            except Exception:
+                logger.exception("UDP ingest batch failed")
+            if stopping:
+                return
+
+    async def _process(self, batch: list) -> None:
+        UDP_QUEUE_DEPTH.set(self.queue.qsize())
+        datagrams = []
+        for data, client_ip in batch:
+            try:
+                datagrams.append((client_ip, decode_datagram(data)))
+            except (FrameError, ValueError, ValidationError):
+                UDP_DATAGRAMS.labels(outcome="invalid").inc()
+        if not datagrams:
+            return
+
+        verdicts = await self.limiter.charge([
+            (client_ip, Counter(fix.device_id for fix in fixes)) for client_ip, fixes in datagrams
+        ])
+        fixes = [
+            fix
+            for (_, decoded), (ip_refused, throttled) in zip(datagrams, verdicts)
+            if not ip_refused
+            for fix in decoded
+            if fix.device_id not in throttled
+        ]
+        if fixes:
+            await self.handler(fixes)
+
+
+udp_server = UdpIngestServer()
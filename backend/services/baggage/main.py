@@ -1,17 +1,65 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import logging
 
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+import orjson
+
+from libs.common.config import settings
 from libs.common.database import engine
 from .otel_setup import init_tracing
 
 from .routers.baggages import router as baggage_router
-from .routers.admin import router as admin_router
+from .routers.admin import router as admin_router, router_v2 as admin_router_v2
 from .routers.ws import router as ws_router
+from .routers.sse import router as sse_router
 from .routers.gps import router as gps_router
 from .routers.trackers import router as trackers_router
+from .core.position_buffer import position_flusher
+from .core.udp_ingest import udp_server
+from .core.hub import hub
+from .core.qr import qr_renderer
+from .storage.client import storage
 
 
 from prometheus_fastapi_instrumentator import Instrumentator
 
+logger = logging.getLogger("baggage-service")
+
+# -------------------------------
+# CYCLE DE VIE
+# -------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Démarre les tâches de fond du service et les arrête proprement :
+    stockage objet (bucket, sans bloquer le démarrage), hub temps réel, listener UDP des trackers, puis
+    flusher GPS (les positions en attente sont persistées avant l'arrêt).
+    Les événements de statut passent par l'outbox (`worker/outbox_relay.py`) :
+    l'API n'ouvre pas de connexion RabbitMQ.
+    """
+    try:
+        await storage.ensure_bucket()
+    except Exception as e:
+        # Stockage injoignable : le service démarre, le bucket est revérifié au premier usage
+        logger.warning(f"Object storage unavailable at startup, will retry on first use: {e}")
+    hub.start()
+    if settings.GPS_WRITE_BEHIND:
+        position_flusher.start()
+    if settings.TRACKER_UDP_ENABLED:
+        await udp_server.start()
+    yield
+    if settings.TRACKER_UDP_ENABLED:
+        await udp_server.stop()
+    await hub.stop()
+    if settings.GPS_WRITE_BEHIND:
+        await position_flusher.stop()
+    qr_renderer.shutdown()
+    await storage.close()
+
+
 # -------------------------------
 # INITIALISATION DE L'APPLICATION
 # -------------------------------
@@ -22,10 +70,28 @@ app = FastAPI(
     """,
     version="1.0.0",
     root_path="/api/baggages",
+    lifespan=lifespan,
 )
 
 Instrumentator().instrument(app).expose(app)
 
+
+# -------------------------------
+# ERREURS DE VALIDATION
+# -------------------------------
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """
+    422 standard, mais sérialisé par orjson : une entrée NaN / Infinity
+    (acceptée par le décodeur JSON, refusée par les schémas) est renvoyée
+    comme `null` au lieu de faire échouer la réponse d'erreur (500).
+    """
+    return Response(
+        orjson.dumps({"detail": jsonable_encoder(exc.errors())}),
+        status_code=422,
+        media_type="application/json",
+    )
+
 # -------------------------------
 # INITIALISATION OPENTELEMETRY
 # -------------------------------
@@ -40,18 +106,18 @@ app.include_router(baggage_router)
 
 # Router pour les routes admin
 app.include_router(admin_router)
+app.include_router(admin_router_v2)
 
 # Router pour les WebSocket (temps réel)
 app.include_router(ws_router)
 
+# Router pour les Server-Sent Events (temps réel sans WebSocket)
+app.include_router(sse_router)
+
 app.include_router(gps_router)
 app.include_router(trackers_router)
 
 # -------------------------------
 # POINTS D'EXTENSION
 # -------------------------------
-# Ici, on peut ajouter des événements startup/shutdown, middleware global, etc.
-# Exemple :
-# @app.on_event("startup")
-# async def on_startup():
-#     print("Application démarrée")
+# Les tâches de fond (startup/shutdown) sont gérées dans `lifespan` ci-dessus.
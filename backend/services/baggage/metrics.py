@@ -1,9 +1,50 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from fastapi import APIRouter, Response
 
 REQUESTS = Counter("http_requests_total", "Total HTTP requests", ["path", "method", "status"])
 REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["path"])
 
+# Filtre des fixes GPS
+GPS_FIXES = Counter("baggage_gps_fixes_total", "Fixes GPS reçus par le filtre de mouvement", ["source", "outcome"])
+
+# Limitation de débit / délestage de l'ingestion
+INGEST_THROTTLED = Counter("baggage_ingest_throttled_total", "Fixes ou requêtes refusés par limitation de débit", ["scope"])
+INGEST_SHED = Counter("baggage_ingest_shed_total", "Requêtes d'ingestion délestées", ["reason"])
+INGEST_TIMESTAMPS = Counter("baggage_ingest_timestamp_out_of_window_total", "Fixes dont l'horodatage tracker sort de la fenêtre acceptée", ["outcome"])
+
+# Ingestion UDP des trackers
+UDP_DATAGRAMS = Counter("baggage_udp_datagrams_total", "Datagrammes UDP des trackers", ["outcome"])
+UDP_QUEUE_DEPTH = Gauge("baggage_udp_queue_depth", "Datagrammes UDP en attente de traitement")
+
+# GPS write-behind
+GPS_PENDING_POSITIONS = Gauge("baggage_gps_pending_positions", "Positions GPS en attente de persistance")
+GPS_FLUSH_LAG = Gauge("baggage_gps_flush_lag_seconds", "Age de la plus ancienne position en attente de persistance")
+GPS_FLUSHED_POSITIONS = Counter("baggage_gps_flushed_positions_total", "Positions GPS persistées par le flusher")
+
+# Flux temps réel (WebSocket / SSE) : files sortantes par connexion
+STREAM_QUEUE_DEPTH = Gauge("baggage_stream_queue_depth", "Messages en attente d'envoi par connexion", ["transport", "connection"])
+STREAM_DROPPED = Counter("baggage_stream_dropped_messages_total", "Messages GPS écartés par connexion (file saturée)", ["transport", "connection"])
+STREAM_SLOW_DISCONNECTS = Counter("baggage_stream_slow_consumer_disconnects_total", "Connexions fermées car trop lentes", ["transport"])
+
+# Publication RabbitMQ (exchange baggage.events)
+EVENTS_PUBLISHED = Counter("baggage_events_published_total", "Événements publiés vers RabbitMQ", ["outcome"])
+PUBLISH_BUFFER_DEPTH = Gauge("baggage_event_publish_buffer_depth", "Événements en attente de publication RabbitMQ")
+
+# Consommateur RabbitMQ -> flux Redis (worker/consumer.py)
+CONSUMER_MESSAGES = Counter("baggage_consumer_messages_total", "Messages traités par le consommateur d'événements", ["outcome"])
+CONSUMER_BATCH_SIZE = Histogram("baggage_consumer_batch_size", "Taille des micro-lots écrits dans Redis", buckets=(1, 5, 10, 25, 50, 100, 250, 500))
+CONSUMER_BACKLOG = Gauge("baggage_consumer_backlog", "Messages en attente dans la file RabbitMQ partagée")
+CONSUMER_EVENT_AGE = Histogram("baggage_consumer_event_age_seconds", "Délai entre publication RabbitMQ et écriture dans Redis")
+
+# Outbox transactionnelle (worker/outbox_relay.py)
+OUTBOX_RELAYED = Counter("baggage_outbox_relayed_total", "Événements de l'outbox publiés sur RabbitMQ")
+OUTBOX_PENDING_AGE = Gauge("baggage_outbox_pending_age_seconds", "Age du plus ancien événement du dernier lot relayé")
+
+# QR codes (rendu paresseux dans un pool de processus)
+QR_RENDERS = Counter("baggage_qr_renders_total", "QR codes rendus (absents du cache)")
+QR_RENDER_SECONDS = Histogram("baggage_qr_render_seconds", "Durée d'un rendu de QR code dans le pool")
+QR_DOWNLOADS = Counter("baggage_qr_downloads_total", "Téléchargements de QR codes", ["outcome"])
+
 router = APIRouter()
 
 @router.get("/metrics")
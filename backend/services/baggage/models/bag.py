@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Float
+from sqlalchemy import Column, String, DateTime, Enum, ForeignKey, Float, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -21,7 +21,7 @@ class Baggage(Base):
 
     status = Column(Enum(BaggageStatus), default=BaggageStatus.CHECKED_IN)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     events = relationship("BaggageEvent", back_populates="baggage", lazy="selectin")
     
@@ -32,3 +32,9 @@ class Baggage(Base):
     last_longitude = Column(Float, nullable=True)
     last_seen_at = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Pagination par curseur (admin) : (created_at, id), avec ou sans filtre
+        Index("ix_baggages_created_at_id", "created_at", "id"),
+        Index("ix_baggages_company_created_at_id", "company_id", "created_at", "id"),
+        Index("ix_baggages_status_created_at_id", "status", "created_at", "id"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Float
+from sqlalchemy.dialects.postgresql import UUID
+
+from libs.common.base import Base
+
+class BaggagePosition(Base):
+    """
+    Historique append-only des positions GPS acceptées.
+
+    En production la table est partitionnée par jour sur `recorded_at`
+    (migration Alembic `baggage_positions`), ce qui permet la rétention et le
+    sous-échantillonnage partition par partition (voir `core/position_history.py`).
+    Pas de clé étrangère vers `baggages` : chaque insertion resterait vérifiée.
+    """
+    __tablename__ = "baggage_positions"
+
+    baggage_id = Column(UUID(as_uuid=True), primary_key=True)
+    recorded_at = Column(DateTime, primary_key=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Index
+
+from libs.common.base import Base
+
+class EventOutbox(Base):
+    """
+    Événement à publier sur l'exchange `baggage.events`, écrit dans la même
+    transaction que le changement d'état qui le produit. Publié puis marqué
+    `sent_at` par le relais (worker/outbox_relay.py).
+    """
+    __tablename__ = "event_outbox"
+
+    # Entier croissant : ordre de publication
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    event_type = Column(String(50), nullable=False)
+    # Événement déjà encodé (`Event.encode()`) : publié tel quel par le relais
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Index partiel : le relais ne parcourt que les événements en attente
+        Index("ix_event_outbox_pending", "id", postgresql_where=sent_at.is_(None)),
+    )
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from libs.common.base import Base
+
+class TrackerDevice(Base):
+    __tablename__ = "tracker_devices"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    device_id = Column(String(100), nullable=False)
+    baggage_id = Column(UUID(as_uuid=True), ForeignKey("baggages.id"), nullable=False, index=True)
+    paired_at = Column(DateTime, default=datetime.utcnow)
+
+    baggage = relationship("Baggage", lazy="selectin")
+
+    __table_args__ = (
+        # Un tracker n'est associé qu'à un seul bagage à la fois
+        Index("ux_tracker_devices_device_id", "device_id", unique=True),
+    )
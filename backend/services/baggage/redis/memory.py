@@ -0,0 +1,396 @@
+from collections import deque
+import asyncio
+import hashlib
+import time
+
+from redis.exceptions import NoScriptError, ResponseError
+
+
+class MemoryPipeline:
+    """
+    Pipeline en mémoire : les commandes sont mises en file puis exécutées
+    dans l'ordre par `execute()` (même interface que `redis.asyncio`).
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands = []
+        return False
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+def _token_bucket(redis, keys, args) -> list:
+    """
+    Équivalent Python du token bucket du limiteur (`core/rate_limit.py`) :
+    un bucket par clé, ARGV = (débit, capacité, coût) par clé.
+    """
+    now_ms = time.time() * 1000
+    result = []
+    for i, key in enumerate(keys):
+        rate, burst, cost = (float(x) for x in args[i * 3:i * 3 + 3])
+        state = redis._hash(key)
+        tokens = float(state.get("t", burst))
+        ts = float(state.get("ts", now_ms))
+        tokens = min(burst, tokens + (now_ms - ts) / 1000 * rate)
+        allowed = 0
+        if tokens >= cost:
+            tokens -= cost
+            allowed = 1
+        state["t"], state["ts"] = str(tokens), str(now_ms)
+        result.append(allowed)
+    return result
+
+
+def _device_cache_fill(redis, keys, args) -> list:
+    """
+    Équivalent Python de la réécriture du cache des trackers
+    (`core/device_cache.py`) : écrit chaque entrée si sa génération n'a pas changé.
+    """
+    result = []
+    for i in range(len(keys) // 2):
+        generation, value, ttl = args[i * 3:i * 3 + 3]
+        if (redis._get(keys[i * 2 + 1]) or "") != str(generation):
+            result.append(0)
+            continue
+        redis._data[keys[i * 2]] = str(value)
+        redis._expires[keys[i * 2]] = time.monotonic() + int(ttl)
+        result.append(1)
+    return result
+
+
+def _positions_write(redis, keys, args) -> int:
+    """
+    Équivalent Python de l'écriture des dernières positions
+    (`core/position_buffer.py`) ; l'ensemble trié tag -> horodatage est un dict.
+    """
+    positions_key, seen_key, dirty_key = keys
+    write_behind, now = args[0], args[1]
+    written = 0
+    for i in range(2, len(args), 4):
+        tag, baggage_id, seen_at, value = args[i:i + 4]
+        seen = (redis._get(seen_key) or {}).get(tag)
+        if seen is not None and seen > float(seen_at):
+            continue
+        redis._hash(positions_key)[tag] = value
+        redis._hash(seen_key)[tag] = float(seen_at)
+        if str(write_behind) == "1":
+            dirty = redis._hash(dirty_key)
+            dirty[baggage_id] = value
+            dirty.setdefault("queued_since", str(now))
+        written += 1
+    return written
+
+
+def _positions_expire(redis, keys, args) -> int:
+    positions_key, seen_key = keys
+    cutoff, limit = float(args[0]), int(args[1])
+    seen = redis._get(seen_key) or {}
+    tags = sorted((tag for tag, at in seen.items() if at <= cutoff), key=seen.get)[:limit]
+    for tag in tags:
+        del seen[tag]
+        (redis._get(positions_key) or {}).pop(tag, None)
+    return len(tags)
+
+
+# Scripts Lua du service, reconnus par leur première ligne (`-- <nom>`)
+SCRIPTS = {
+    "baggage:token-bucket": _token_bucket,
+    "baggage:device-cache-fill": _device_cache_fill,
+    "baggage:positions-write": _positions_write,
+    "baggage:positions-expire": _positions_expire,
+}
+
+
+def _script_name(script: str) -> str:
+    first = script.lstrip().split("\n", 1)[0]
+    return first[2:].strip() if first.startswith("--") else ""
+
+
+class MemoryScript:
+    """
+    Script enregistré par `register_script` (même interface que
+    `redis.asyncio` : `await script(keys=..., args=..., client=...)`).
+    """
+
+    def __init__(self, redis, script: str):
+        self.redis = redis
+        self.sha = redis._load(script)
+
+    async def __call__(self, keys=(), args=(), client=None):
+        target = client or self.redis
+        result = target.evalsha(self.sha, len(keys), *keys, *args)
+        # Dans un pipeline, la commande est seulement mise en file
+        return result if isinstance(target, MemoryPipeline) else await result
+
+
+class MemoryRedis:
+    """
+    Stand-in en process de `redis.asyncio.Redis` (decode_responses=True),
+    limité aux commandes du service bagages : chaînes (compteurs compris)
+    avec expiration, hashes, listes, flux (XADD / XRANGE / XREAD bloquant),
+    pipelines et scripts Lua du service (équivalents Python de `SCRIPTS`).
+
+    Sélectionné par `BAGGAGE_TRANSPORT=memory` : ingestion, consommateur et
+    hub partagent alors cette instance, sans serveur Redis (benchmarks de
+    bout en bout, développement hors ligne). Rien n'est persisté.
+    """
+
+    def __init__(self):
+        self._data: dict = {}
+        self._expires: dict[str, float] = {}
+        self._streams: dict[str, deque] = {}
+        self._last_id = (0, 0)
+        self._appended = asyncio.Event()
+        self._scripts: dict[str, object] = {}
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self) -> None:
+        pass
+
+    # -------------------------------
+    # Scripts
+    # -------------------------------
+    def _load(self, script: str) -> str:
+        emulation = SCRIPTS.get(_script_name(script))
+        if emulation is None:
+            raise ResponseError("Script not supported by MemoryRedis")
+        sha = hashlib.sha1(script.encode()).hexdigest()
+        self._scripts[sha] = emulation
+        return sha
+
+    def register_script(self, script: str) -> MemoryScript:
+        return MemoryScript(self, script)
+
+    async def script_load(self, script: str) -> str:
+        return self._load(script)
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args):
+        emulation = self._scripts.get(sha)
+        if emulation is None:
+            raise NoScriptError("No matching script")
+        return emulation(self, keys_and_args[:numkeys], keys_and_args[numkeys:])
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args):
+        return await self.evalsha(self._load(script), numkeys, *keys_and_args)
+
+    # -------------------------------
+    # Clés
+    # -------------------------------
+    def _get(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return self._data.get(key)
+
+    def _hash(self, key) -> dict:
+        value = self._get(key)
+        if value is None:
+            value = self._data[key] = {}
+        return value
+
+    async def get(self, key):
+        return self._get(key)
+
+    async def mget(self, keys):
+        return [self._get(key) for key in keys]
+
+    async def set(self, key, value, nx: bool = False, ex=None, px=None):
+        if nx and self._get(key) is not None:
+            return None
+        self._data[key] = str(value)
+        self._expires.pop(key, None)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        elif px is not None:
+            self._expires[key] = time.monotonic() + px / 1000
+        return True
+
+    async def delete(self, *keys) -> int:
+        deleted = 0
+        for key in keys:
+            if self._get(key) is not None:
+                deleted += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            self._streams.pop(key, None)
+        return deleted
+
+    async def incrby(self, key, amount: int = 1) -> int:
+        value = int(self._get(key) or 0) + amount
+        self._data[key] = str(value)
+        return value
+
+    async def incr(self, key, amount: int = 1) -> int:
+        return await self.incrby(key, amount)
+
+    async def expire(self, key, seconds) -> bool:
+        if self._get(key) is None:
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    async def exists(self, *keys) -> int:
+        return sum(1 for key in keys if self._get(key) is not None)
+
+    async def rename(self, src, dst) -> bool:
+        if self._get(src) is None:
+            raise ResponseError("no such key")
+        self._data[dst] = self._data.pop(src)
+        self._expires.pop(dst, None)
+        if src in self._expires:
+            self._expires[dst] = self._expires.pop(src)
+        return True
+
+    # -------------------------------
+    # Hashes et listes
+    # -------------------------------
+    async def hset(self, key, field=None, value=None, mapping=None) -> int:
+        h = self._hash(key)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for f in items if f not in h)
+        h.update({f: str(v) for f, v in items.items()})
+        return added
+
+    async def hincrby(self, key, field, amount: int = 1) -> int:
+        h = self._hash(key)
+        value = int(h.get(field, 0)) + amount
+        h[field] = str(value)
+        return value
+
+    async def hget(self, key, field):
+        return (self._get(key) or {}).get(field)
+
+    async def hmget(self, key, fields):
+        h = self._get(key) or {}
+        return [h.get(field) for field in fields]
+
+    async def hgetall(self, key) -> dict:
+        return dict(self._get(key) or {})
+
+    async def hdel(self, key, *fields) -> int:
+        h = self._get(key) or {}
+        return sum(1 for f in fields if h.pop(f, None) is not None)
+
+    async def hlen(self, key) -> int:
+        return len(self._get(key) or {})
+
+    async def rpush(self, key, *values) -> int:
+        items = self._get(key)
+        if items is None:
+            items = self._data[key] = []
+        items.extend(str(v) for v in values)
+        return len(items)
+
+    async def lrange(self, key, start: int, end: int) -> list:
+        items = self._get(key) or []
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    # -------------------------------
+    # Flux
+    # -------------------------------
+    @staticmethod
+    def _parse_id(entry_id: str) -> tuple[int, int]:
+        ms, _, seq = entry_id.partition("-")
+        return int(ms), int(seq or 0)
+
+    def _next_id(self) -> tuple[int, int]:
+        ms = int(time.time() * 1000)
+        last_ms, last_seq = self._last_id
+        self._last_id = (ms, 0) if ms > last_ms else (last_ms, last_seq + 1)
+        return self._last_id
+
+    async def xadd(self, name, fields, maxlen=None, approximate: bool = True) -> str:
+        key = self._next_id()
+        entries = self._streams.setdefault(name, deque())
+        # decode_responses=True : les valeurs sont relues comme des chaînes
+        fields = {k: v.decode() if isinstance(v, bytes) else str(v) for k, v in fields.items()}
+        entries.append((key, f"{key[0]}-{key[1]}", fields))
+        if maxlen is not None:
+            while len(entries) > maxlen:
+                entries.popleft()
+        # Réveille les XREAD bloquants
+        self._appended.set()
+        self._appended = asyncio.Event()
+        return entries[-1][1]
+
+    def _range(self, name, low: str, high: str) -> list:
+        entries = self._streams.get(name, ())
+        high_key = None if high == "+" else self._parse_id(high)
+        if low == "-":
+            selected = list(entries)
+        else:
+            # Parcours depuis la fin : les lectures portent sur les entrées récentes
+            exclusive = low.startswith("(")
+            low_key = self._parse_id(low.lstrip("("))
+            selected = []
+            for entry in reversed(entries):
+                if entry[0] < low_key or (exclusive and entry[0] == low_key):
+                    break
+                selected.append(entry)
+            selected.reverse()
+        return [
+            (entry_id, fields) for key, entry_id, fields in selected
+            if high_key is None or key <= high_key
+        ]
+
+    async def xrange(self, name, min: str = "-", max: str = "+", count=None) -> list:
+        entries = self._range(name, min, max)
+        return entries[:count] if count else entries
+
+    async def xrevrange(self, name, max: str = "+", min: str = "-", count=None) -> list:
+        entries = self._range(name, min, max)[::-1]
+        return entries[:count] if count else entries
+
+    async def xlen(self, name) -> int:
+        return len(self._streams.get(name, ()))
+
+    async def xread(self, streams: dict, count=None, block=None) -> list:
+        """
+        `block` en millisecondes (0 : sans limite), comme XREAD BLOCK.
+        Le `$` n'est pas géré : l'appelant passe un identifiant explicite.
+        """
+        deadline = None if not block else time.monotonic() + block / 1000
+        while True:
+            response = []
+            for name, last_id in streams.items():
+                entries = self._range(name, f"({last_id}", "+")
+                if entries:
+                    response.append([name, entries[:count] if count else entries])
+            if response or block is None:
+                return response
+            appended = self._appended
+            if deadline is None:
+                await appended.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return response
+            try:
+                await asyncio.wait_for(appended.wait(), remaining)
+            except asyncio.TimeoutError:
+                return []
@@ -1,7 +1,21 @@
 import redis.asyncio as redis
 
-redis_client = redis.Redis(
-    host="localhost", 
-    port=6379,         
-    decode_responses=True
-)
+from libs.common.config import settings
+from .memory import MemoryRedis
+
+
+def from_settings() -> redis.Redis:
+    """
+    Client Redis de la configuration : `REDIS_URL` si renseignée (docker :
+    `redis://redis:6379/0`), sinon `REDIS_HOST` / `REDIS_PORT`.
+    """
+    if settings.REDIS_URL:
+        return redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
+
+
+if settings.BAGGAGE_TRANSPORT == "memory":
+    # Stand-in en process partagé par l'ingestion, le consommateur et le hub
+    redis_client = MemoryRedis()
+else:
+    redis_client = from_settings()
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from datetime import datetime, timedelta
+from sqlalchemy import select, tuple_
+from datetime import datetime
+import uuid
 from opentelemetry import trace
 from opentelemetry.trace.status import Status, StatusCode
 import logging
@@ -15,11 +16,18 @@ from ..models.baggage_event import BaggageEvent
 from ..models.scan_log import ScanLog
 from ..schemas.bag import BaggageOut as BaggageOutSchema
 from ..core.enums import BaggageStatus
+from ..core.counters import read_counters
+from ..core.pagination import decode_cursor, encode_cursor, estimate_count, exact_count
 
 router = APIRouter(
     prefix="/admin/baggages",
     tags=["Admin - Baggage"]
 )
+# v2 : liste paginée par curseur, total estimé (contrat distinct de la v1)
+router_v2 = APIRouter(
+    prefix="/admin/v2/baggages",
+    tags=["Admin - Baggage"]
+)
 
 tracer = trace.get_tracer(__name__)
 logger = logging.getLogger("admin-baggage-service")
@@ -55,6 +63,29 @@ async def traced_route(span_name: str, func, *args, **kwargs):
 # -------------------------------
 # PAGINATED LIST / FILTERS
 # -------------------------------
+def filtered_baggages(
+    company_id: uuid.UUID | None,
+    status: BaggageStatus | None,
+    from_date: datetime | None,
+    to_date: datetime | None,
+):
+    """
+    Requête des bagages filtrés, du plus récent au plus ancien (index
+    `(created_at, id)`) ; retourne aussi si un filtre est appliqué.
+    """
+    query = select(Baggage)
+    if company_id:
+        query = query.where(Baggage.company_id == company_id)
+    if status:
+        query = query.where(Baggage.status == status)
+    if from_date:
+        query = query.where(Baggage.created_at >= from_date)
+    if to_date:
+        query = query.where(Baggage.created_at <= to_date)
+    filtered = bool(company_id or status or from_date or to_date)
+    return query.order_by(Baggage.created_at.desc(), Baggage.id.desc()), filtered
+
+
 @router.get(
     "/",
     dependencies=[Depends(allow(UserRole.ADMIN))],
@@ -63,15 +94,19 @@ async def traced_route(span_name: str, func, *args, **kwargs):
 )
 async def list_baggages(
     db: AsyncSession = Depends(get_db),
-    company_id: str | None = None,
+    company_id: uuid.UUID | None = None,
     status: BaggageStatus | None = None,
     from_date: datetime | None = None,
     to_date: datetime | None = None,
-    page: int = 1,
-    size: int = 50
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1),
 ):
     """
-    Retourne une liste paginée de bagages.
+    Retourne une liste paginée de bagages (pagination par numéro de page).
+
+    Le coût d'une page croît avec sa profondeur (OFFSET) et le total est un
+    `count(*)` exact : pour les grands volumes, préférer
+    `GET /admin/v2/baggages/` (curseur, total estimé).
 
     **Paramètres :**
     - `company_id` : filtrer par compagnie aérienne
@@ -88,22 +123,10 @@ async def list_baggages(
     - items : liste des bagages (schéma BaggageOut)
     """
     async def _list():
-        query = select(Baggage)
-
-        if company_id:
-            query = query.where(Baggage.company_id == company_id)
-        if status:
-            query = query.where(Baggage.status == status)
-        if from_date:
-            query = query.where(Baggage.created_at >= from_date)
-        if to_date:
-            query = query.where(Baggage.created_at <= to_date)
-
-        total_res = await db.execute(select(func.count()).select_from(query.subquery()))
-        total = total_res.scalar()
-
-        query = query.offset((page - 1) * size).limit(size)
-        res = await db.execute(query)
+        query, _ = filtered_baggages(company_id, status, from_date, to_date)
+        total = await exact_count(db, query)
+
+        res = await db.execute(query.offset((page - 1) * size).limit(size))
         bags = res.scalars().all()
 
         return {
@@ -116,6 +139,103 @@ async def list_baggages(
     return await traced_route("list_baggages", _list)
 
 
+@router_v2.get(
+    "/",
+    dependencies=[Depends(allow(UserRole.ADMIN))],
+    summary="Lister tous les bagages avec filtres et pagination par curseur",
+    response_description="Liste paginée des bagages"
+)
+async def list_baggages_v2(
+    db: AsyncSession = Depends(get_db),
+    company_id: uuid.UUID | None = None,
+    status: BaggageStatus | None = None,
+    from_date: datetime | None = None,
+    to_date: datetime | None = None,
+    cursor: str | None = None,
+    size: int = Query(50, ge=1, le=500),
+    exact_total: bool = False,
+):
+    """
+    Retourne une liste paginée de bagages, du plus récent au plus ancien.
+
+    Pagination par curseur sur `(created_at, id)` : chaque page est une
+    lecture d'index à partir de la position du curseur, quelle que soit sa
+    profondeur (pas d'OFFSET).
+
+    **Paramètres :**
+    - `company_id` : filtrer par compagnie aérienne
+    - `status` : filtrer par statut du bagage
+    - `from_date` : bagages créés après cette date
+    - `to_date` : bagages créés avant cette date
+    - `cursor` : `next_cursor` de la page précédente (absent : première page)
+    - `size` : nombre d'éléments par page (500 au plus)
+    - `exact_total` : total exact (`count(*)`) au lieu de l'estimation
+
+    **Retour :**
+    - total : nombre de bagages correspondant aux filtres, estimé par défaut
+    - total_exact : indique si `total` est exact
+    - size : taille de page
+    - next_cursor : curseur de la page suivante, null sur la dernière page
+    - items : liste des bagages (schéma BaggageOut)
+    """
+    async def _list():
+        query, filtered = filtered_baggages(company_id, status, from_date, to_date)
+
+        if exact_total:
+            total, exact = await exact_count(db, query), True
+        else:
+            total, exact = await estimate_count(db, query, Baggage.__tablename__, filtered)
+
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(400, "Invalid cursor")
+            query = query.where(tuple_(Baggage.created_at, Baggage.id) < tuple_(*position))
+
+        # Une ligne de plus : indique s'il existe une page suivante
+        res = await db.execute(query.limit(size + 1))
+        bags = res.scalars().all()
+        next_cursor = encode_cursor(bags[size - 1].created_at, bags[size - 1].id) if len(bags) > size else None
+
+        return {
+            "total": total,
+            "total_exact": exact,
+            "size": size,
+            "next_cursor": next_cursor,
+            "items": [BaggageOutSchema.model_validate(b) for b in bags[:size]]
+        }
+
+    return await traced_route("list_baggages_v2", _list)
+
+
+# -------------------------------
+# STATISTICS / METRICS
+# -------------------------------
+# Déclarée avant `/{tag}` : sinon "metrics" serait pris pour un tag
+@router.get(
+    "/metrics",
+    dependencies=[Depends(allow(UserRole.ADMIN))],
+    summary="Statistiques des bagages",
+    response_description="Metrics sur les bagages"
+)
+async def baggage_metrics():
+    """
+    Retourne les métriques et statistiques des bagages.
+
+    Lues dans les compteurs incrémentaux (`core/counters.py`) tenus à jour à
+    chaque enregistrement, changement de statut et scan : coût constant, sans
+    agrégat sur `baggages` ni `scan_logs`. Réconciliés chaque nuit avec les
+    tables sources (`worker/counters_reconcile.py`).
+
+    **Retour :**
+    - created_last_24h : nombre de bagages créés au cours des dernières 24 heures
+    - scans_last_24h : nombre de scans enregistrés au cours des dernières 24 heures
+    - by_status : dictionnaire comptant les bagages par statut
+    """
+    return await traced_route("baggage_metrics_route", read_counters)
+
+
 # -------------------------------
 # DETAILS D'UN BAGAGE
 # -------------------------------
@@ -162,54 +282,3 @@ async def baggage_detail(tag: str, db: AsyncSession = Depends(get_db)):
         }
 
     return await traced_route(f"baggage_detail:{tag}", _detail)
-
-
-# -------------------------------
-# STATISTICS / METRICS
-# -------------------------------
-@router.get(
-    "/metrics",
-    dependencies=[Depends(allow(UserRole.ADMIN))],
-    summary="Statistiques des bagages",
-    response_description="Metrics sur les bagages"
-)
-async def baggage_metrics(db: AsyncSession = Depends(get_db)):
-    """
-    Retourne les métriques et statistiques des bagages.
-
-    **Retour :**
-    - created_last_24h : nombre de bagages créés au cours des dernières 24 heures
-    - scans_last_24h : nombre de scans enregistrés au cours des dernières 24 heures
-    - by_status : dictionnaire comptant les bagages par statut
-    """
-    async def _metrics():
-        now = datetime.utcnow()
-        day_start = now - timedelta(days=1)
-
-        # Number of baggages created last 24h
-        q1 = await db.execute(
-            select(func.count()).select_from(
-                select(Baggage).where(Baggage.created_at >= day_start).subquery()
-            )
-        )
-        created_24h = q1.scalar() or 0
-
-        # Number by status
-        q2 = await db.execute(select(Baggage.status, func.count()).group_by(Baggage.status))
-        by_status = {status.value if hasattr(status, "value") else str(status): count for status, count in q2.all()}
-
-        # Scan events last 24h
-        q3 = await db.execute(
-            select(func.count()).select_from(
-                select(ScanLog).where(ScanLog.timestamp >= day_start).subquery()
-            )
-        )
-        scans_24h = q3.scalar() or 0
-
-        return {
-            "created_last_24h": created_24h,
-            "scans_last_24h": scans_24h,
-            "by_status": by_status,
-        }
-
-    return await traced_route("baggage_metrics_route", _metrics)
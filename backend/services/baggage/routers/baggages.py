@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from opentelemetry import trace
 from opentelemetry.trace.status import Status, StatusCode
@@ -10,11 +11,15 @@ from services.auth.dependencies.user import get_current_user
 from services.auth.dependencies.permissions import allow
 from services.auth.core.roles import UserRole
 
-from ..schemas.bag import BaggageCreate, BaggageOut
+from ..schemas.bag import BaggageCreate, BaggageBulkCreate, BaggageOut
 from ..schemas.baggage_event import BaggageEventCreate
 from ..schemas.scan_log import ScanLogCreate, ScanLogOut
+from ..core.qr import qr_key, qr_renderer
+from ..storage.base import ObjectInfo, Storage
+from ..metrics import QR_DOWNLOADS
 from ..baggage_service import (
     create_baggage,
+    create_baggages_bulk,
     update_baggage_status,
     get_baggage,
     list_baggages_for_user,
@@ -22,6 +27,8 @@ from ..baggage_service import (
 )
 
 router = APIRouter(prefix="/baggages", tags=["Baggages"])
+# Image déterminée par le tag : réutilisable sans revalidation
+QR_CACHE_CONTROL = "private, max-age=31536000, immutable"
 tracer = trace.get_tracer(__name__)
 logger = logging.getLogger("baggage-service")
 
@@ -88,6 +95,27 @@ async def add_baggage(
     return await traced_route("add_baggage", create_baggage, db, payload)
 
 
+@router.post(
+    "/bulk",
+    response_model=list[BaggageOut],
+    summary="Enregistrer plusieurs bagages",
+    response_description="Bagages créés, dans l'ordre de la requête"
+)
+async def add_baggages_bulk(
+    payload: BaggageBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    company=Depends(allow(UserRole.COMPAGNIE, UserRole.ADMIN)),
+):
+    """
+    Enregistrement groupé (vague de comptoir, manifeste de correspondance) :
+    jusqu'à `CHECKIN_BULK_MAX_BAGS` bagages insérés en un aller-retour.
+
+    Les QR codes ne sont pas générés ici : ils sont rendus au premier
+    téléchargement (`GET /baggages/{tag}/qr`).
+    """
+    return await traced_route("add_baggages_bulk", create_baggages_bulk, db, payload.bags)
+
+
 @router.post(
     "/{tag}/status",
     response_model=BaggageOut,
@@ -139,6 +167,47 @@ async def get_baggage_info(
     return await traced_route(f"get_baggage_info:{tag}", _get)
 
 
+def object_response(storage: Storage, info: ObjectInfo, etag: str, cache_control: str) -> StreamingResponse:
+    """
+    Relaie un objet du stockage par blocs (jamais chargé en entier), avec
+    les en-têtes de cache HTTP (navigateur, proxy).
+    """
+    headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control, "Content-Length": str(info.size)}
+    return StreamingResponse(storage.stream(info.key), media_type=info.content_type, headers=headers)
+
+
+@router.get(
+    "/{tag}/qr",
+    summary="Télécharger le QR code d'un bagage",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"image/png": {}}}, 304: {"description": "Non modifié (ETag)"}},
+)
+async def download_qr_code(
+    tag: str,
+    request: Request,
+    user=Depends(get_current_user),
+    baggage=Depends(get_existing_baggage),
+):
+    """
+    Retourne le QR code PNG du bagage, rendu au premier appel dans le pool de
+    processus puis relu depuis le stockage objet.
+
+    L'image d'un tag ne change jamais : `ETag` (clé de contenu, calculée sans
+    accès au stockage) et `Cache-Control` immuable permettent au navigateur
+    et au proxy de la garder ; `If-None-Match` renvoie 304 directement.
+    """
+    if user.role == UserRole.PASSAGER and baggage.owner_id != user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    key = qr_key(baggage.tag)
+    if key in request.headers.get("if-none-match", ""):
+        QR_DOWNLOADS.labels("not_modified").inc()
+        return Response(status_code=304, headers={"ETag": f'"{key}"', "Cache-Control": QR_CACHE_CONTROL})
+    info = await qr_renderer.get(baggage.tag)
+    QR_DOWNLOADS.labels("sent").inc()
+    return object_response(qr_renderer.storage, info, key, QR_CACHE_CONTROL)
+
+
 @router.get(
     "/my/list",
     response_model=list[BaggageOut],
@@ -2,18 +2,46 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
-import json
 
 from libs.common.database import get_db
+from services.auth.dependencies.user import get_current_user
+from services.auth.core.roles import UserRole
 
-from ..redis.redis_c import redis_client
 from ..models.bag import Baggage
+from ..core.ingest import store_positions
+from ..core.fix_filter import movement_filter
+from ..core.position_buffer import get_latest_position
+from ..core.event_schema import GpsEvent
 from ..schemas.bag import BaggageGPSUpdate
 from ..schemas.baggage_event import BaggageScanGPS
+from .baggages import get_existing_baggage
 
 router = APIRouter(prefix="/baggages", tags=["GPS Tracking"])
 
 
+async def record_position(db: AsyncSession, baggage: Baggage, latitude: float, longitude: float) -> bool:
+    """
+    Persiste et diffuse une position, sauf si le filtre de mouvement la juge
+    redondante. Retourne False si le fix a été écarté.
+    """
+    seen_at = datetime.utcnow()
+    fixes = [(baggage.tag, latitude, longitude, seen_at)]
+    decisions = await movement_filter.apply(fixes, "gps")
+    if not decisions[0]:
+        return False
+
+    event = GpsEvent(
+        tag=baggage.tag,
+        company_id=baggage.company_id,
+        latitude=latitude,
+        longitude=longitude,
+        timestamp=seen_at,
+    )
+    await store_positions(db, [(baggage.id, baggage.tag, latitude, longitude, seen_at)], [event])
+    await movement_filter.remember(fixes, decisions)
+    return True
+
+
 @router.post("/update-location", summary="Met à jour la position GPS d’un bagage")
 async def update_location(
     data: BaggageGPSUpdate,
@@ -44,24 +72,10 @@ async def update_location(
     if not baggage:
         raise HTTPException(status_code=404, detail="Baggage not found")
 
-    # Mise à jour GPS
-    baggage.last_latitude = data.latitude
-    baggage.last_longitude = data.longitude
-    baggage.last_seen_at = datetime.utcnow()
+    # Mise à jour GPS (en base ou en write-behind) + publication temps réel Redis
+    stored = await record_position(db, baggage, data.latitude, data.longitude)
 
-    db.add(baggage)
-    await db.commit()
-
-    # Publication temps réel via Redis
-    payload = {
-        "tag": baggage.tag,
-        "latitude": data.latitude,
-        "longitude": data.longitude,
-        "timestamp": baggage.last_seen_at.isoformat()
-    }
-    await redis_client.publish("baggage.gps", json.dumps(payload))
-
-    return {"status": "ok", "tag": baggage.tag}
+    return {"status": "ok" if stored else "suppressed", "tag": baggage.tag}
 
 
 
@@ -98,20 +112,40 @@ async def scan_and_send_gps(
     if not baggage:
         raise HTTPException(status_code=404, detail="Baggage not found")
 
-    # Mise à jour GPS
-    baggage.last_latitude = data.latitude
-    baggage.last_longitude = data.longitude
-    baggage.last_seen_at = datetime.utcnow()
-    db.add(baggage)
-    await db.commit()
+    # Mise à jour GPS (en base ou en write-behind) + publication temps réel Redis
+    stored = await record_position(db, baggage, data.latitude, data.longitude)
+
+    return {"status": "ok" if stored else "suppressed", "tag": baggage.tag}
 
-    # Publication temps réel Redis
-    payload = {
+
+@router.get("/{tag}/location", summary="Dernière position GPS connue d’un bagage")
+async def get_location(
+    tag: str,
+    user=Depends(get_current_user),
+    baggage=Depends(get_existing_baggage),
+):
+    """
+    Retourne la dernière position GPS d’un bagage.
+    Un passager ne peut suivre que ses propres bagages ; les compagnies et
+    admins peuvent suivre n'importe quel bagage.
+
+    La position est lue d’abord dans Redis (disponible immédiatement, même en
+    mode write-behind avant le flush), puis en base à défaut.
+    """
+    if user.role == UserRole.PASSAGER and baggage.owner_id != user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    position = await get_latest_position(tag)
+    if position:
+        return position
+
+    if baggage.last_seen_at is None:
+        raise HTTPException(status_code=404, detail="No GPS position for this baggage")
+
+    return {
+        "baggage_id": str(baggage.id),
         "tag": baggage.tag,
-        "latitude": data.latitude,
-        "longitude": data.longitude,
-        "timestamp": baggage.last_seen_at.isoformat()
+        "latitude": baggage.last_latitude,
+        "longitude": baggage.last_longitude,
+        "timestamp": baggage.last_seen_at.isoformat(),
     }
-    await redis_client.publish("baggage.gps", json.dumps(payload))
-
-    return {"status": "ok", "tag": baggage.tag}
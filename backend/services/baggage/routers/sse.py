@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+
+from libs.common.config import settings
+from libs.common.database import get_db
+from ..core.hub import hub, SlowConsumer, SSE
+from ..core.stream import is_stream_id
+from ..core.stream_access import stream_scope, stream_user
+from ..schemas.stream import StreamSubscription
+
+router = APIRouter(prefix="/sse/baggages", tags=["Real-time"])
+
+
+async def sse_events(filters: StreamSubscription, last_id: str | None, keepalive: float):
+    """
+    Générateur du flux `text/event-stream` : abonne le client au hub (puis
+    rejoue depuis `last_id`) et le désabonne à la fin. L'abonnement est pris
+    dans le générateur : un client déconnecté avant le début du flux
+    (générateur jamais démarré) ne laisse pas d'abonnement orphelin, et
+    Starlette annule le générateur à la déconnexion.
+
+    Un commentaire est envoyé sans événement pendant `keepalive` secondes pour
+    que les proxys ne coupent pas la connexion. Le flux se termine si la file
+    du client déborde (client trop lent : il se reconnecte avec Last-Event-ID).
+    """
+    subscription = hub.subscribe(filters.tags, filters.company_ids, filters.statuses, transport="sse")
+    try:
+        if last_id is not None:
+            await hub.resume(subscription, last_id)
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            except SlowConsumer:
+                return
+            yield message.encode(SSE)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get(
+    "/stream",
+    summary="Flux temps réel des bagages (Server-Sent Events)",
+    response_class=StreamingResponse,
+)
+async def baggage_event_stream(
+    request: Request,
+    # Session libérée avant le flux (pas de connexion du pool par client)
+    db: AsyncSession = Depends(get_db, scope="function"),
+    user=Depends(stream_user),
+):
+    """
+    Alternative au WebSocket pour les bornes et proxys qui ne le supportent pas :
+    mêmes événements, poussés en `text/event-stream` depuis le même hub.
+
+    ### Authentification
+    Jeton Bearer (en-tête `Authorization`, ou `?access_token=` depuis
+    `EventSource`). Admins et ATC reçoivent tous les bagages, une compagnie
+    ceux de sa compagnie, un passager les siens ; des filtres hors de ce
+    périmètre sont refusés (403).
+
+    ### Filtres (paramètres répétables)
+    - **tag** : tags de bagages suivis
+    - **company_id** : compagnies suivies
+    - **status** : statuts suivis
+
+    Pour changer de filtres, le client rouvre le flux avec d'autres paramètres.
+
+    ### Format
+    Chaque événement est un bloc `id` / `event` (canal : `baggage.gps`,
+    `baggage.scan`, `baggage.status`) / `data` (JSON). Côté navigateur :
+    `new EventSource(url).addEventListener("baggage.gps", ...)`.
+
+    ### Reprise
+    `EventSource` renvoie automatiquement l'en-tête `Last-Event-ID` à la
+    reconnexion : les événements manqués sont rejoués, ou un événement
+    `baggage.resync` est envoyé si l'historique ne suffit plus.
+    Un client sans EventSource peut passer `?last_id=<id>`.
+    """
+    try:
+        filters = StreamSubscription.from_query(request.query_params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    filters = (await stream_scope(db, user)).apply(filters)
+
+    last_id = request.headers.get("last-event-id") or request.query_params.get("last_id")
+    if last_id is not None and not is_stream_id(last_id):
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    return StreamingResponse(
+        sse_events(filters, last_id, settings.SSE_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,19 +1,44 @@
-from datetime import datetime
-import json
-
 from fastapi import APIRouter, Request, HTTPException, Depends
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from libs.common.database import get_db
-from ..redis.redis_c import redis_client
-from ..baggage_service import get_baggage_by_device
-from ..models.bag import Baggage
+from services.auth.dependencies.permissions import allow
+from services.auth.core.roles import UserRole
+from ..schemas.tracker import TrackerFix, TrackerBatchOut, TrackerPair, TrackerDeviceOut
+from ..baggage_service import get_baggage, get_tracker_device, pair_device, unpair_device
+from ..core.ingest import ingest_fixes
+from ..core.device_cache import device_cache
+from ..core.tracker_frame import decode_frames, FrameError
+from ..core.rate_limit import ingest_slot, IngestThrottled
 
 router = APIRouter(prefix="/trackers", tags=["GPS Trackers"])
 
 
+TOO_MANY_REQUESTS = HTTPException(429, detail="Too many tracker reports", headers={"Retry-After": "1"})
+
+
+async def ingest_or_throttle(db: AsyncSession, fixes, req: Request) -> list[dict]:
+    try:
+        return await ingest_fixes(db, fixes, client_ip=req.client.host if req.client else None)
+    except IngestThrottled:
+        raise TOO_MANY_REQUESTS
+
+
+def summarize(results: list[dict]) -> dict:
+    accepted = sum(1 for r in results if r["status"] == "ok")
+    suppressed = sum(1 for r in results if r["status"] == "suppressed")
+    return {
+        "accepted": accepted,
+        "suppressed": suppressed,
+        "rejected": len(results) - accepted - suppressed,
+        "results": results,
+    }
+
+
 @router.post(
     "/ingest",
+    dependencies=[Depends(ingest_slot)],
     summary="Réception des données envoyées par un tracker GPS",
     description="""
 Réception des données d’un **tracker GPS physique** attaché au bagage.
@@ -29,10 +54,17 @@ Le tracker envoie un JSON contenant :
 - **lat** : latitude GPS
 - **lon** : longitude GPS
 
+ou, avec `Content-Type: application/octet-stream`, une ou plusieurs trames
+binaires compactes (voir `core/tracker_frame.py`) pouvant porter plusieurs fixes.
+La réponse suit alors le format de `/trackers/ingest/batch`.
+
+Un tracker qui dépasse son débit reçoit `429` ; si l’ingestion est saturée
+(pool de connexions ou concurrence), la requête est délestée en `503`.
+
 L’API :
 1. Trouve le bagage associé au tracker (`device_id`)
 2. Met à jour la position GPS du bagage
-3. Sauvegarde en base
+3. Sauvegarde en base (ou dans Redis en mode write-behind)
 4. Diffuse l’événement via Redis sur le canal `baggage.gps`
 """
 )
@@ -44,6 +76,14 @@ async def ingest_tracker(
     Ingestion des données d’un tracker GPS en temps réel.
     """
 
+    # Trame binaire compacte : un ou plusieurs fixes
+    if req.headers.get("content-type", "").startswith("application/octet-stream"):
+        try:
+            fixes = decode_frames(await req.body())
+        except FrameError as e:
+            raise HTTPException(400, detail=f"Invalid tracker frame: {e}")
+        return summarize(await ingest_or_throttle(db, fixes, req))
+
     # Lecture du JSON brut
     payload = await req.json()
 
@@ -56,30 +96,101 @@ async def ingest_tracker(
     if latitude is None or longitude is None:
         raise HTTPException(400, detail="Missing 'lat' or 'lon' fields")
 
-    # 1. Récupération du bagage lié au tracker
-    baggage: Baggage | None = await get_baggage_by_device(db, device_id)
+    try:
+        fix = TrackerFix(device_id=device_id, lat=latitude, lon=longitude)
+    except ValidationError:
+        raise HTTPException(400, detail="Invalid 'lat' or 'lon' fields")
 
-    if not baggage:
+    # 1-3. Résolution du tracker, mise à jour GPS et publication Redis
+    result = (await ingest_or_throttle(db, [fix], req))[0]
+
+    if result["status"] == "throttled":
+        raise TOO_MANY_REQUESTS
+    if result["status"] == "unknown_device":
         raise HTTPException(404, detail="No baggage associated with this device_id")
 
-    # 2. Mise à jour GPS du bagage
-    baggage.last_latitude = latitude
-    baggage.last_longitude = longitude
-    baggage.last_seen_at = datetime.utcnow()
-
-    db.add(baggage)
-    await db.commit()
-
-    # 3. Publication Redis pour les WebSockets en temps réel
-    event_payload = {
-        "tag": baggage.tag,
-        "device_id": device_id,
-        "latitude": latitude,
-        "longitude": longitude,
-        "timestamp": baggage.last_seen_at.isoformat()
-    }
+    # 4. Réponse
+    return {"status": result["status"], "baggage_tag": result["baggage_tag"], "device_id": device_id}
 
-    await redis_client.publish("baggage.gps", json.dumps(event_payload))
 
-    # 4. Réponse
-    return {"status": "ok", "baggage_tag": baggage.tag, "device_id": device_id}
+@router.post(
+    "/ingest/batch",
+    response_model=TrackerBatchOut,
+    dependencies=[Depends(ingest_slot)],
+    summary="Réception groupée des fixes envoyés par une passerelle",
+    description="""
+Réception d’un **lot de fixes GPS** bufferisés par une passerelle LoRaWAN.
+
+Le corps est un tableau JSON de `{device_id, lat, lon, ts}` (`ts` optionnel).
+
+L’API :
+1. Résout tous les trackers en une seule requête
+2. Met à jour les bagages en un seul `UPDATE ... FROM (VALUES ...)`
+3. Diffuse les fixes sur `baggage.gps` via un seul pipeline Redis
+4. Retourne un résultat par fix (`ok`, `suppressed` si le bagage n’a pas bougé,
+   `throttled` si le tracker dépasse son débit, `unknown_device`) :
+   un `device_id` inconnu ne fait pas échouer le lot
+
+Réponses rapides, sans accès base : `429` si l’IP source dépasse sa limite,
+`503` si l’ingestion est saturée (pool de connexions ou concurrence).
+"""
+)
+async def ingest_tracker_batch(
+    fixes: list[TrackerFix],
+    req: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ingestion groupée des données de plusieurs trackers GPS.
+    """
+    return summarize(await ingest_or_throttle(db, fixes, req))
+
+
+# -------------------------------
+# Registre des trackers
+# -------------------------------
+@router.post(
+    "/devices",
+    response_model=TrackerDeviceOut,
+    summary="Associer un tracker GPS à un bagage",
+    dependencies=[Depends(allow(UserRole.COMPAGNIE, UserRole.ADMIN))],
+)
+async def pair_tracker(
+    payload: TrackerPair,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Associe un tracker physique (`device_id`) à un bagage identifié par son tag.
+    Un tracker ne peut être associé qu'à un seul bagage à la fois.
+    """
+    baggage = await get_baggage(db, payload.tag)
+    if not baggage:
+        raise HTTPException(404, detail="Baggage not found")
+    if await get_tracker_device(db, payload.device_id):
+        raise HTTPException(409, detail="Tracker already paired")
+
+    device = await pair_device(db, payload.device_id, baggage)
+    await device_cache.invalidate(payload.device_id)
+    return device
+
+
+@router.delete(
+    "/devices/{device_id}",
+    summary="Dissocier un tracker GPS de son bagage",
+    dependencies=[Depends(allow(UserRole.COMPAGNIE, UserRole.ADMIN))],
+)
+async def unpair_tracker(
+    device_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Dissocie un tracker de son bagage : ses fixes suivants seront rejetés
+    (`unknown_device`) jusqu'à une nouvelle association.
+    """
+    device = await get_tracker_device(db, device_id)
+    if not device:
+        raise HTTPException(404, detail="Tracker not paired")
+
+    await unpair_device(db, device)
+    await device_cache.invalidate(device_id)
+    return {"status": "ok", "device_id": device_id}
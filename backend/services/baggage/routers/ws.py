@@ -1,42 +1,196 @@
-from ..redis.redis_c import redis_client
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 import asyncio
+import logging
+
+from libs.common.config import settings
+from libs.common.database import get_db
+from ..core.hub import hub, SlowConsumer, JSON, FORMATS
+from ..core.coalesce import next_batch
+from ..core.stream import is_stream_id
+from ..core.stream_access import StreamScope, stream_scope, stream_user
+from ..schemas.stream import StreamSubscription
 
 router = APIRouter(prefix="/ws/baggages")
+logger = logging.getLogger("baggage-ws")
+
+# Code de fermeture (plage applicative 4000-4999) d'un client qui ne suit plus le débit
+SLOW_CONSUMER_CLOSE_CODE = 4008
+CLOSE_TIMEOUT_SECONDS = 1.0
+
+
+def batch_window(ws: WebSocket) -> float | None:
+    """
+    Mode regroupé optionnel : `?batch=1` (fenêtre par défaut) ou `?batch_ms=<ms>`.
+    Retourne la fenêtre en secondes, ou None si le client reçoit un message par événement.
+    """
+    params = ws.query_params
+    if "batch_ms" in params:
+        window_ms = int(params["batch_ms"])
+    elif params.get("batch") in ("1", "true"):
+        window_ms = settings.STREAM_BATCH_WINDOW_MS
+    else:
+        return None
+    if window_ms <= 0:
+        return None
+    return min(window_ms, settings.STREAM_BATCH_MAX_WINDOW_MS) / 1000
+
+
+def negotiate_format(ws: WebSocket) -> tuple[str, str | None]:
+    """
+    Format des trames : sous-protocole WebSocket `msgpack` / `json`, ou `?format=`.
+    Retourne (format, sous-protocole à confirmer au client).
+    """
+    for subprotocol in ws.scope.get("subprotocols", []):
+        if subprotocol in FORMATS:
+            return subprotocol, subprotocol
+    fmt = ws.query_params.get("format", JSON)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return fmt, None
+
+
+async def _send(ws: WebSocket, payload: str | bytes) -> None:
+    if isinstance(payload, bytes):
+        await ws.send_bytes(payload)
+    else:
+        await ws.send_text(payload)
+
+
+async def _forward(ws: WebSocket, subscription, fmt: str) -> None:
+    while True:
+        message = await subscription.get()
+        await _send(ws, message.encode(fmt))
+
+
+async def _forward_batched(ws: WebSocket, subscription, fmt: str, window: float) -> None:
+    while True:
+        batch = await next_batch(subscription, window, settings.STREAM_BATCH_MAX_EVENTS)
+        await _send(ws, batch.frame(fmt))
+
+
+async def _listen(ws: WebSocket, subscription, scope: StreamScope) -> None:
+    # Messages entrants : changement de filtres (dans le périmètre de l'utilisateur) ;
+    # sort à la déconnexion du client
+    while True:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        text = message.get("text") or message.get("bytes")
+        if text is None:
+            continue
+        try:
+            filters = scope.apply(StreamSubscription.model_validate_json(text))
+        except ValidationError as e:
+            logger.warning(f"Ignoring invalid subscription message: {e.errors()}")
+            continue
+        except HTTPException:
+            logger.warning("Ignoring subscription outside the user's scope")
+            continue
+        hub.update(subscription, filters.tags, filters.company_ids, filters.statuses)
+
 
 @router.websocket("/stream")
-async def baggage_stream(ws: WebSocket):
+async def baggage_stream(ws: WebSocket, db: AsyncSession = Depends(get_db)):
     """
     WebSocket pour recevoir en temps réel les événements liés aux bagages.
 
-    Événements écoutés depuis Redis :
+    Authentification : jeton Bearer (en-tête `Authorization`, ou
+    `?access_token=` depuis un navigateur). Admins et ATC reçoivent tous les
+    bagages, une compagnie ceux de sa compagnie, un passager les siens ;
+    la connexion est fermée (1008) sans jeton valide ou si les filtres
+    initiaux sortent de ce périmètre, et un changement de filtres hors
+    périmètre est ignoré.
+
+    Événements lus depuis le flux Redis `baggage:events` :
     - "baggage.scan" : lorsqu'un bagage est scanné
     - "baggage.status" : lorsqu'un bagage change de statut
     - "baggage.gps": lorque la position du baggage est envoyé
 
-    Frontend peut se connecter sur : ws://<host>/ws/baggages/stream
-    """
-    await ws.accept()
-    print("WebSocket connection accepted")
+    Les événements proviennent du hub du processus (une seule lecture du flux
+    Redis partagée par toutes les connexions).
+
+    Filtrage côté serveur (optionnel) :
+    - à la connexion : `?tag=...&company_id=...&status=...` (paramètres répétables)
+    - à tout moment, sans reconnexion, en envoyant :
+      `{"action": "subscribe", "tags": [...], "company_ids": [...], "statuses": [...]}`
+      (remplace les filtres courants ; listes vides = tout recevoir)
 
+    Regroupement (optionnel) : `?batch=1` ou `?batch_ms=100` envoie des tableaux
+    JSON d'événements, au plus un par fenêtre (ou tous les `STREAM_BATCH_MAX_EVENTS`),
+    en ne gardant que la dernière position GPS de chaque tag.
 
+    Format des trames : JSON (texte) par défaut, ou MessagePack (binaire) en
+    demandant le sous-protocole `msgpack` ou `?format=msgpack`. Chaque événement
+    n'est encodé qu'une fois par format et par processus. La compression
+    permessage-deflate est négociée par le serveur (uvicorn / websockets).
 
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe("baggage.scan", "baggage.status", "baggage.gps")
-    print("Subscribed to Redis channels: baggage.scan, baggage.status")
+    Reprise après coupure : chaque événement porte un `event_id` ; en se
+    reconnectant avec `?last_id=<event_id>`, le client reçoit d'abord les
+    événements manqués (filtrés), puis le direct. Si l'historique ne suffit
+    pas, il reçoit `{"type": "resync"}` et doit recharger son état.
 
+    Client lent : chaque connexion a une file sortante bornée
+    (`STREAM_QUEUE_SIZE`). Selon `STREAM_OVERFLOW_POLICY`, les plus anciennes
+    positions GPS en attente sont écartées (jamais les scans ni les statuts),
+    ou la connexion est fermée avec le code 4008 ; le client se reconnecte
+    alors avec `last_id`.
+
+    Frontend peut se connecter sur : ws://<host>/ws/baggages/stream?access_token=<jwt>
+    """
+    last_id = ws.query_params.get("last_id")
     try:
-        while True:
-            # Récupération des messages Redis
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message and "data" in message:
-                await ws.send_text(message["data"])
-            await asyncio.sleep(0.01)  # petite pause pour ne pas bloquer la boucle
-    except Exception as e:
-        print(f"WebSocket closed: {e}")
-        await ws.close()
+        filters = StreamSubscription.from_query(ws.query_params)
+        window = batch_window(ws)
+        fmt, subprotocol = negotiate_format(ws)
+    except (ValidationError, ValueError):
+        await ws.close(code=1008)
+        return
+    if last_id is not None and not is_stream_id(last_id):
+        await ws.close(code=1008)
+        return
+    try:
+        user = await stream_user(ws, db)
+        scope = await stream_scope(db, user)
+        filters = scope.apply(filters)
+    except HTTPException:
+        await ws.close(code=1008)
+        return
     finally:
-        # Nettoyage : désabonnement et fermeture du client Redis
-        await pubsub.unsubscribe("baggage.scan", "baggage.status", "baggage.gps")
-        await redis_client.close()
-        print("Redis connection closed and unsubscribed")
+        # Libère la connexion du pool pour la durée du flux
+        await db.close()
+
+    await ws.accept(subprotocol=subprotocol)
+    subscription = hub.subscribe(filters.tags, filters.company_ids, filters.statuses)
+    tasks = []
+    try:
+        if last_id is not None:
+            await hub.resume(subscription, last_id)
+        if window is None:
+            sender = _forward(ws, subscription, fmt)
+        else:
+            sender = _forward_batched(ws, subscription, fmt, window)
+        tasks = [
+            asyncio.create_task(sender),
+            asyncio.create_task(_listen(ws, subscription, scope)),
+            asyncio.create_task(subscription.queue.closed.wait()),
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, (WebSocketDisconnect, SlowConsumer)):
+                logger.warning(f"WebSocket closed: {error}")
+    finally:
+        hub.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if subscription.queue.closed.is_set():
+        # Client trop lent : fermeture explicite, sans attendre un socket saturé
+        logger.info(f"Closing slow WebSocket consumer {subscription.connection_id}")
+        try:
+            await asyncio.wait_for(ws.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="slow consumer"), CLOSE_TIMEOUT_SECONDS)
+        except Exception:
+            pass
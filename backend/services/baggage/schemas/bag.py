@@ -1,6 +1,7 @@
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
+from libs.common.config import settings
 from ..core.enums import BaggageStatus
 
 class BaggageCreate(BaseModel):
@@ -9,6 +10,9 @@ class BaggageCreate(BaseModel):
     description: Optional[str] = None
     weight: Optional[str] = None
 
+class BaggageBulkCreate(BaseModel):
+    bags: list[BaggageCreate] = Field(..., min_length=1, max_length=settings.CHECKIN_BULK_MAX_BAGS)
+
 class BaggageOut(BaseModel):
     id: UUID
     tag: str
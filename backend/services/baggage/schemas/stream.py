@@ -0,0 +1,27 @@
+from uuid import UUID
+from typing import Literal
+from pydantic import BaseModel, Field
+
+from ..core.enums import BaggageStatus
+
+
+class StreamSubscription(BaseModel):
+    """
+    Message envoyé par un client du flux temps réel pour (re)définir ses filtres.
+    Une liste vide signifie « pas de filtre » sur cette dimension.
+    """
+    action: Literal["subscribe"] = "subscribe"
+    tags: list[str] = Field(default_factory=list, description="Tags de bagages suivis")
+    company_ids: list[UUID] = Field(default_factory=list, description="Compagnies suivies")
+    statuses: list[BaggageStatus] = Field(default_factory=list, description="Statuts suivis")
+
+    @classmethod
+    def from_query(cls, params) -> "StreamSubscription":
+        """
+        Filtres passés à la connexion : ?tag=...&company_id=...&status=... (répétables).
+        """
+        return cls(
+            tags=params.getlist("tag"),
+            company_ids=params.getlist("company_id"),
+            statuses=params.getlist("status"),
+        )
@@ -0,0 +1,38 @@
+from datetime import datetime
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class TrackerFix(BaseModel):
+    device_id: str = Field(..., description="ID du tracker physique")
+    lat: float = Field(..., ge=-90, le=90, allow_inf_nan=False, description="Latitude GPS")
+    lon: float = Field(..., ge=-180, le=180, allow_inf_nan=False, description="Longitude GPS")
+    ts: datetime | None = Field(None, description="Horodatage du fix (défaut : réception)")
+    battery: int | None = Field(None, description="Niveau de batterie du tracker (%)")
+
+
+class TrackerIngestResult(BaseModel):
+    index: int
+    device_id: str
+    status: str
+    baggage_tag: str | None = None
+
+
+class TrackerBatchOut(BaseModel):
+    accepted: int
+    suppressed: int = 0
+    rejected: int
+    results: list[TrackerIngestResult]
+
+
+class TrackerPair(BaseModel):
+    device_id: str = Field(..., description="ID du tracker physique")
+    tag: str = Field(..., description="Tag du bagage à associer")
+
+
+class TrackerDeviceOut(BaseModel):
+    device_id: str
+    baggage_id: UUID
+    paired_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
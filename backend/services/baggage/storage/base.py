@@ -0,0 +1,73 @@
+from typing import AsyncIterable, AsyncIterator
+
+# Taille des blocs lus lors d'un téléchargement en flux
+CHUNK_SIZE = 64 * 1024
+
+
+class ObjectNotFound(KeyError):
+    """
+    Objet absent du stockage.
+    """
+
+
+class ObjectInfo:
+    """
+    Métadonnées d'un objet stocké : clé, taille (octets), ETag (sans
+    guillemets) et type MIME.
+    """
+    __slots__ = ("key", "size", "etag", "content_type")
+
+    def __init__(self, key: str, size: int, etag: str, content_type: str):
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.content_type = content_type
+
+    def __repr__(self) -> str:
+        return f"ObjectInfo(key={self.key!r}, size={self.size}, etag={self.etag!r})"
+
+
+class Storage:
+    """
+    Interface commune des backends de stockage objet (QR codes, pièces
+    jointes des bagages).
+
+    Les clés sont des chemins relatifs séparés par `/` (`qr/ab/abcd….png`).
+    Toutes les opérations sont asynchrones : aucune ne bloque la boucle
+    d'événements.
+    """
+
+    async def ensure_bucket(self) -> None:
+        """
+        Prépare le stockage (répertoire racine, bucket) ; idempotent.
+        """
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream") -> ObjectInfo:
+        raise NotImplementedError
+
+    async def upload(
+        self, key: str, chunks: AsyncIterable[bytes], content_type: str = "application/octet-stream"
+    ) -> ObjectInfo:
+        """
+        Écrit un objet fourni par morceaux, sans le charger entièrement en
+        mémoire (envoi multipart côté S3).
+        """
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        """
+        Métadonnées de l'objet, ou None s'il n'existe pas.
+        """
+        raise NotImplementedError
+
+    def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Contenu de l'objet par blocs ; lève ObjectNotFound s'il n'existe pas.
+        """
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
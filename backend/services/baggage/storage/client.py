@@ -0,0 +1,25 @@
+from libs.common.config import settings
+from .base import Storage
+from .local import LocalStorage
+from .s3 import S3Storage
+
+
+def storage_from_settings() -> Storage:
+    """
+    Backend choisi par `STORAGE_BACKEND` : "s3" (MinIO, S3 ; partagé entre
+    réplicas) ou "local" (répertoire `STORAGE_LOCAL_DIR`).
+    """
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            endpoint=settings.S3_ENDPOINT,
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            concurrency=settings.S3_MULTIPART_CONCURRENCY,
+        )
+    return LocalStorage(settings.STORAGE_LOCAL_DIR)
+
+
+storage = storage_from_settings()
@@ -0,0 +1,89 @@
+from typing import AsyncIterable, AsyncIterator
+import asyncio
+import mimetypes
+import os
+import uuid
+
+from .base import CHUNK_SIZE, ObjectInfo, ObjectNotFound, Storage
+
+
+class LocalStorage(Storage):
+    """
+    Stockage sur système de fichiers : un fichier par objet sous `root`.
+
+    Pour le développement, les tests et une instance unique : le disque
+    n'est pas partagé entre réplicas (utiliser alors le backend S3).
+    L'ETag dérive de la date de modification et de la taille (comme nginx),
+    le type MIME de l'extension.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        parts = key.split("/")
+        if not key or any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Invalid object key: {key!r}")
+        return os.path.join(self.root, *parts)
+
+    def _info(self, key: str, st: os.stat_result) -> ObjectInfo:
+        content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        return ObjectInfo(key, st.st_size, f"{st.st_mtime_ns:x}-{st.st_size:x}", content_type)
+
+    async def ensure_bucket(self) -> None:
+        await asyncio.to_thread(os.makedirs, self.root, exist_ok=True)
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream") -> ObjectInfo:
+        async def once():
+            yield data
+        return await self.upload(key, once(), content_type)
+
+    async def upload(
+        self, key: str, chunks: AsyncIterable[bytes], content_type: str = "application/octet-stream"
+    ) -> ObjectInfo:
+        path = self._path(key)
+        # Écriture atomique : un lecteur ne voit jamais un fichier partiel
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+
+        def open_tmp():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return open(tmp, "wb")
+
+        f = await asyncio.to_thread(open_tmp)
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+            await asyncio.to_thread(f.close)
+            await asyncio.to_thread(os.replace, tmp, path)
+        except BaseException:
+            f.close()
+            await asyncio.to_thread(_remove, tmp)
+            raise
+        return self._info(key, await asyncio.to_thread(os.stat, path))
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        try:
+            return self._info(key, await asyncio.to_thread(os.stat, self._path(key)))
+        except FileNotFoundError:
+            return None
+
+    async def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        try:
+            f = await asyncio.to_thread(open, self._path(key), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(key) from None
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(_remove, self._path(key))
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,208 @@
+from contextlib import AsyncExitStack
+from typing import AsyncIterable, AsyncIterator
+import asyncio
+import logging
+
+from aiobotocore.session import get_session
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from .base import CHUNK_SIZE, ObjectInfo, ObjectNotFound, Storage
+
+logger = logging.getLogger("baggage-storage")
+
+# Minimum imposé par S3 pour toutes les parties sauf la dernière
+MIN_PART_SIZE = 5 * 1024 * 1024
+NOT_FOUND_CODES = {"404", "NoSuchKey", "NoSuchBucket", "NotFound"}
+
+
+def _not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in NOT_FOUND_CODES
+
+
+class S3Storage(Storage):
+    """
+    Stockage compatible S3 (MinIO, AWS S3) via aiobotocore : signature,
+    réessais et pool de connexions sont ceux de botocore.
+
+    - adressage par chemin (`/<bucket>/<clé>`), supporté par MinIO ;
+    - le client est ouvert au premier usage et le bucket vérifié (créé au
+      besoin) à ce moment-là : un S3 injoignable au démarrage n'empêche pas
+      le service de démarrer, l'appel suivant réessaie ;
+    - `upload` : un simple PUT si l'objet tient dans une partie, sinon envoi
+      multipart avec au plus `concurrency` parties en vol (mémoire bornée à
+      `concurrency x part_size`) ; l'envoi est annulé (abort) en cas d'erreur ;
+    - `stream` : corps de la réponse relayé par blocs, jamais chargé en entier.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        part_size: int = 8 * 1024 * 1024,
+        concurrency: int = 4,
+        client=None,
+    ):
+        self.endpoint = endpoint
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.concurrency = max(1, concurrency)
+        self._client = client
+        self._bucket_ready = False
+        self._exit_stack = AsyncExitStack()
+        self._lock = asyncio.Lock()
+
+    async def _s3(self):
+        """
+        Client S3 prêt à l'emploi (ouvert et bucket vérifié une seule fois).
+        """
+        if self._client is not None and self._bucket_ready:
+            return self._client
+        async with self._lock:
+            if self._client is None:
+                self._client = await self._exit_stack.enter_async_context(get_session().create_client(
+                    "s3",
+                    endpoint_url=self.endpoint,
+                    region_name=self.region,
+                    aws_access_key_id=self.access_key,
+                    aws_secret_access_key=self.secret_key,
+                    config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+                ))
+            if not self._bucket_ready:
+                await self._create_bucket()
+                self._bucket_ready = True
+        return self._client
+
+    async def _create_bucket(self) -> None:
+        try:
+            await self._client.head_bucket(Bucket=self.bucket)
+            return
+        except ClientError as e:
+            if not _not_found(e):
+                raise
+        kwargs = {}
+        if self.region != "us-east-1":
+            kwargs["CreateBucketConfiguration"] = {"LocationConstraint": self.region}
+        await self._client.create_bucket(Bucket=self.bucket, **kwargs)
+        logger.info("Bucket %s créé", self.bucket)
+
+    async def ensure_bucket(self) -> None:
+        await self._s3()
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream") -> ObjectInfo:
+        s3 = await self._s3()
+        response = await s3.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+        return ObjectInfo(key, len(data), response["ETag"].strip('"'), content_type)
+
+    async def upload(
+        self, key: str, chunks: AsyncIterable[bytes], content_type: str = "application/octet-stream"
+    ) -> ObjectInfo:
+        parts = self._parts(chunks)
+        first = await anext(parts)
+        second = await anext(parts, None)
+        if second is None:
+            return await self.put(key, first, content_type)
+
+        s3 = await self._s3()
+        upload_id = (await s3.create_multipart_upload(Bucket=self.bucket, Key=key, ContentType=content_type))["UploadId"]
+        etags: dict[int, str] = {}
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: list[asyncio.Task] = []
+        size = 0
+
+        async def send_part(number: int, data: bytes) -> None:
+            try:
+                part = await s3.upload_part(
+                    Bucket=self.bucket, Key=key, PartNumber=number, UploadId=upload_id, Body=data
+                )
+                etags[number] = part["ETag"]
+            finally:
+                slots.release()
+
+        async def all_parts():
+            yield first
+            yield second
+            async for part in parts:
+                yield part
+
+        try:
+            number = 0
+            async for part in all_parts():
+                number += 1
+                size += len(part)
+                await slots.acquire()
+                tasks.append(asyncio.create_task(send_part(number, part)))
+            await asyncio.gather(*tasks)
+
+            response = await s3.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etags[n]} for n in sorted(etags)]},
+            )
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await s3.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return ObjectInfo(key, size, response["ETag"].strip('"'), content_type)
+
+    async def _parts(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+        """
+        Redécoupe le flux en parties de `part_size` octets (la dernière plus
+        courte) ; un flux vide donne une partie vide.
+        """
+        buffer = bytearray()
+        sent = False
+        async for chunk in chunks:
+            buffer += chunk
+            while len(buffer) >= self.part_size:
+                yield bytes(buffer[:self.part_size])
+                del buffer[:self.part_size]
+                sent = True
+        if buffer or not sent:
+            yield bytes(buffer)
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        s3 = await self._s3()
+        try:
+            response = await s3.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if _not_found(e):
+                return None
+            raise
+        return ObjectInfo(
+            key,
+            response["ContentLength"],
+            response["ETag"].strip('"'),
+            response.get("ContentType", "application/octet-stream"),
+        )
+
+    async def stream(self, key: str, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        s3 = await self._s3()
+        try:
+            response = await s3.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if _not_found(e):
+                raise ObjectNotFound(key) from None
+            raise
+        body = response["Body"]
+        try:
+            async for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str) -> None:
+        s3 = await self._s3()
+        await s3.delete_object(Bucket=self.bucket, Key=key)
+
+    async def close(self) -> None:
+        await self._exit_stack.aclose()
+        self._client = None
+        self._bucket_ready = False
@@ -1,29 +1,213 @@
-import aio_pika
+from collections import deque
+from datetime import datetime, timezone
 import asyncio
-import json
-import aioredis
+import logging
+import os
+import zlib
+
+import aio_pika
+import orjson
+from prometheus_client import start_http_server
 
 from libs.common.config import settings
+from services.baggage.core.event import EXCHANGE_NAME
+from services.baggage.core.stream import append_event
+from services.baggage.core.transport import connect_broker, MEMORY
+from services.baggage.redis.redis_c import redis_client, from_settings
+from services.baggage.metrics import CONSUMER_MESSAGES, CONSUMER_BATCH_SIZE, CONSUMER_BACKLOG, CONSUMER_EVENT_AGE
 
-async def main():
-    redis = await aioredis.from_url(settings.REDIS_URL)
-    connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
-    channel = await connection.channel()
+# File durable du relais temps réel : un seul processus la consomme (ordre par tag)
+QUEUE_NAME = "baggage.events.realtime"
+BACKLOG_POLL_SECONDS = 5.0
+RETRY_DELAY_SECONDS = 0.5
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+logger = logging.getLogger("baggage-event-consumer")
+
+
+class AckTracker:
+    """
+    Suit les messages reçus dans l'ordre de livraison pour les acquitter par lots.
+
+    Les handlers terminent leurs lots dans le désordre ; un ack `multiple=True`
+    n'est envoyé que jusqu'au dernier message dont tous les prédécesseurs sont
+    traités (filigrane contigu).
+    """
+
+    def __init__(self):
+        self._order: deque = deque()
+        self._done: set[int] = set()
+
+    def track(self, message) -> None:
+        self._order.append(message)
+
+    def complete(self, messages):
+        """
+        Marque des messages comme traités ; retourne le message jusqu'auquel
+        acquitter (ou None si le filigrane n'a pas avancé).
+        """
+        self._done |= {message.delivery_tag for message in messages}
+        last = None
+        while self._order and self._order[0].delivery_tag in self._done:
+            last = self._order.popleft()
+            self._done.discard(last.delivery_tag)
+        return last
+
+
+class EventConsumer:
+    """
+    Relais RabbitMQ -> flux Redis des événements temps réel.
+
+    - file durable `QUEUE_NAME` liée à `baggage.*`, consommée par un seul
+      processus : le broker répartirait sinon les messages d'un même bagage
+      entre processus ;
+    - `prefetch` borne le nombre de messages non acquittés ;
+    - `concurrency` handlers, chacun avec sa file d'entrée : un message va
+      au handler choisi par le hash de son `tag` (seul champ décodé, le corps
+      est écrit tel quel). Les événements d'un même bagage sont donc écrits
+      dans leur ordre de livraison, ceux de bagages différents en parallèle ;
+    - chaque handler prend des micro-lots (jusqu'à `batch_size` messages ou
+      `batch_window` secondes) et les écrit dans un seul pipeline Redis ;
+    - un lot dont l'écriture Redis échoue est réessayé sur place (délai
+      croissant) avant le lot suivant de ce handler : le remettre en file
+      laisserait passer les messages suivants du même tag ;
+    - acquittement par lots via `AckTracker`.
 
-    exchange = await channel.declare_exchange("baggage.events", aio_pika.ExchangeType.TOPIC)
-    queue = await channel.declare_queue("", exclusive=True)
-    await queue.bind(exchange, routing_key="baggage.*")
+    Les doublons (lot réessayé après une écriture partielle, relais de
+    l'outbox republiant après confirmation) sont écrits tels quels : le
+    `message_id` n'est pas dédupliqué. Après un réessai du publisher ordonné,
+    c'est la dernière copie de chaque message qui respecte l'ordre de
+    l'outbox ; ne garder que la première pourrait inverser deux statuts d'un
+    même bagage. Les clients appliquent donc les événements comme des états
+    (idempotents).
+    """
 
-    async with queue.iterator() as queue_iter:
-        async for message in queue_iter:
-            async with message.process():
-                data = json.loads(message.body)
-                event_type = message.routing_key.split(".")[-1]
+    def __init__(
+        self,
+        redis_client,
+        url: str | None = None,
+        prefetch: int | None = None,
+        concurrency: int | None = None,
+        batch_size: int | None = None,
+        batch_window: float | None = None,
+    ):
+        self.redis = redis_client
+        self.url = url or settings.RABBITMQ_URL
+        self.prefetch = prefetch or settings.CONSUMER_PREFETCH
+        self.concurrency = concurrency or settings.CONSUMER_CONCURRENCY
+        self.batch_size = batch_size or settings.CONSUMER_BATCH_SIZE
+        self.batch_window = batch_window if batch_window is not None else settings.CONSUMER_BATCH_WINDOW_MS / 1000
+        self._inboxes: list[asyncio.Queue] = [asyncio.Queue() for _ in range(self.concurrency)]
+        self._acks = AckTracker()
 
-                
-                await redis.publish(f"baggage.{event_type}", json.dumps(data))
+    def inbox_for(self, message) -> asyncio.Queue:
+        """
+        File du handler chargé du bagage du message (même tag, même handler).
+        """
+        try:
+            tag = orjson.loads(message.body).get("tag")
+        except (ValueError, AttributeError):
+            tag = None
+        return self._inboxes[zlib.crc32(str(tag).encode()) % len(self._inboxes)]
 
-                print(f"[EVENT] Forwarded {event_type} to Redis pubsub")
+    async def on_message(self, message) -> None:
+        self._acks.track(message)
+        self.inbox_for(message).put_nowait(message)
+
+    async def _take_batch(self, inbox: asyncio.Queue) -> list:
+        batch = [await inbox.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_window
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(inbox.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(inbox.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def forward(self, batch) -> None:
+        """
+        Écrit un micro-lot dans le flux Redis (un pipeline), en réessayant
+        jusqu'au succès, puis l'acquitte.
+        """
+        delay = RETRY_DELAY_SECONDS
+        while True:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for message in batch:
+                        append_event(pipe, message.routing_key, message.body)
+                    await pipe.execute()
+                break
+            except Exception:
+                logger.exception(f"Redis forward failed, retrying {len(batch)} messages in {delay}s")
+                CONSUMER_MESSAGES.labels("retried").inc(len(batch))
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+        CONSUMER_MESSAGES.labels("forwarded").inc(len(batch))
+        CONSUMER_BATCH_SIZE.observe(len(batch))
+        now = datetime.now(timezone.utc)
+        for message in batch:
+            if message.timestamp is not None:
+                CONSUMER_EVENT_AGE.observe((now - message.timestamp.astimezone(timezone.utc)).total_seconds())
+
+        last = self._acks.complete(batch)
+        if last is not None:
+            await last.ack(multiple=True)
+
+    async def _handler(self, inbox: asyncio.Queue) -> None:
+        while True:
+            batch = await self._take_batch(inbox)
+            await self.forward(batch)
+
+    async def _watch_backlog(self, channel) -> None:
+        while True:
+            try:
+                queue = await channel.declare_queue(QUEUE_NAME, passive=True)
+                CONSUMER_BACKLOG.set(queue.declaration_result.message_count)
+            except Exception as e:
+                logger.warning(f"Could not read queue backlog: {e}")
+            await asyncio.sleep(BACKLOG_POLL_SECONDS)
+
+    async def run(self) -> None:
+        connection = await connect_broker(self.url)
+        async with connection:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=self.prefetch)
+            exchange = await channel.declare_exchange(EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True)
+            queue = await channel.declare_queue(QUEUE_NAME, durable=True)
+            await queue.bind(exchange, routing_key="baggage.*")
+
+            tasks = [asyncio.create_task(self._handler(inbox)) for inbox in self._inboxes]
+            tasks.append(asyncio.create_task(self._watch_backlog(channel)))
+            await queue.consume(self.on_message)
+            logger.info(f"Consuming {QUEUE_NAME} (prefetch={self.prefetch}, handlers={self.concurrency})")
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+
+def redis_from_settings():
+    if settings.BAGGAGE_TRANSPORT == MEMORY:
+        # Même instance que le hub : consommateur et API dans un seul processus
+        return redis_client
+    return from_settings()
+
+
+async def main():
+    # Port de métriques décalé de CONSUMER_INSTANCE (supervisord : %(process_num)d)
+    start_http_server(settings.CONSUMER_METRICS_PORT + int(os.environ.get("CONSUMER_INSTANCE", "0")))
+    await EventConsumer(redis_from_settings()).run()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime, timedelta
+import logging
+
+from libs.common.config import settings
+from libs.common.database import AsyncSessionLocal
+from services.baggage.core.counters import reconcile_counters
+
+logger = logging.getLogger("baggage-counters")
+
+
+def seconds_until(hour: int, now: datetime) -> float:
+    """
+    Délai jusqu'à la prochaine occurrence de `hour`:00 UTC.
+    """
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+async def reconcile_once():
+    try:
+        async with AsyncSessionLocal() as db:
+            await reconcile_counters(db)
+    except Exception:
+        logger.exception("Baggage counters reconciliation failed")
+
+
+async def main():
+    # Au démarrage (amorce les compteurs d'un déploiement neuf), puis chaque nuit
+    await reconcile_once()
+    while True:
+        await asyncio.sleep(seconds_until(settings.COUNTERS_RECONCILE_HOUR, datetime.utcnow()))
+        await reconcile_once()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
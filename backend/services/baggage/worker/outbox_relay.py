@@ -0,0 +1,40 @@
+from datetime import timedelta
+import asyncio
+import logging
+import time
+
+from libs.common.config import settings
+from services.baggage.core.event import EventPublisher
+from services.baggage.core.outbox import relay_once, purge_sent
+
+logger = logging.getLogger("baggage-outbox-relay")
+
+
+async def main():
+    # Canal unique : les événements sont publiés dans l'ordre de l'outbox
+    publisher = EventPublisher(ordered=True)
+    publisher.start()
+    last_purge = 0.0
+    try:
+        while True:
+            try:
+                relayed = await relay_once(publisher, batch_size=settings.OUTBOX_BATCH_SIZE)
+            except Exception:
+                logger.exception("Outbox relay failed")
+                relayed = 0
+            if time.monotonic() - last_purge > settings.OUTBOX_PURGE_INTERVAL_SECONDS:
+                try:
+                    purged = await purge_sent(older_than=timedelta(hours=settings.OUTBOX_RETENTION_HOURS))
+                    logger.info(f"Purged {purged} sent outbox events")
+                except Exception:
+                    logger.exception("Outbox purge failed")
+                last_purge = time.monotonic()
+            # Lot plein : il reste probablement des événements, on enchaîne
+            if relayed < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+    finally:
+        await publisher.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime
+import logging
+
+from libs.common.config import settings
+from libs.common.database import engine
+from services.baggage.core.position_history import run_maintenance
+from services.baggage.core.position_buffer import expire_latest_positions
+
+logger = logging.getLogger("baggage-position-history")
+
+
+async def main():
+    while True:
+        try:
+            await run_maintenance(
+                engine,
+                today=datetime.utcnow().date(),
+                ahead_days=settings.POSITIONS_PARTITIONS_AHEAD_DAYS,
+                raw_days=settings.POSITIONS_RAW_RETENTION_DAYS,
+                retention_days=settings.POSITIONS_RETENTION_DAYS,
+            )
+        except Exception:
+            logger.exception("Position history maintenance failed")
+        try:
+            expired = await expire_latest_positions(settings.GPS_LATEST_POSITION_TTL_HOURS * 3600)
+            if expired:
+                logger.info(f"Expired {expired} cached latest positions")
+        except Exception:
+            logger.exception("Latest positions expiry failed")
+        await asyncio.sleep(settings.POSITIONS_MAINTENANCE_INTERVAL_SECONDS)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,11 @@
+import pytest
+
+from services.baggage.redis.memory import MemoryRedis
+
+
+@pytest.fixture(autouse=True)
+def counters_redis(monkeypatch):
+    # Compteurs admin mis à jour à chaque écriture de bagage : Redis en mémoire
+    redis = MemoryRedis()
+    monkeypatch.setattr("services.baggage.core.counters.redis_client", redis)
+    return redis
@@ -1,6 +1,8 @@
 import os
 import uuid
+from datetime import datetime, timedelta
 import pytest
+from sqlalchemy import func, select
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,6 +14,10 @@ from services.auth.core.hashing import hash_password
 from services.auth.core.jwt import create_access_token
 from services.baggage.models.bag import Baggage
 from services.baggage.models.scan_log import ScanLog
+from services.baggage.core.qr import qr_key, qr_renderer
+from services.baggage.core import counters
+from services.baggage.core.counters import CREATED_PREFIX, STATUS_KEY, read_counters, reconcile_counters
+from services.baggage.storage.local import LocalStorage
 
 
 # -------------------------
@@ -206,3 +212,218 @@ async def test_admin_list_detail_metrics(baggage_client: AsyncClient, create_use
     # metrics = resp.json()
     # print(metrics)
     # assert "created_last_24h" in metrics and "scans_last_24h" in metrics and "by_status" in metrics
+
+
+@pytest.mark.asyncio
+async def test_admin_metrics_from_incremental_counters(baggage_client: AsyncClient, create_users):
+    tokens = create_users["tokens"]
+    pax = create_users["users"]["pax"]
+    bag = await create_baggage_for_test(baggage_client, tokens["company"], pax.id, create_users["company"].id)
+    await baggage_client.post(
+        f"/baggages/{bag['tag']}/scan",
+        headers={"Authorization": f"Bearer {tokens['atc']}"},
+        json={"location": "NIM:GateA"},
+    )
+    await baggage_client.post(
+        f"/baggages/{bag['tag']}/status",
+        headers={"Authorization": f"Bearer {tokens['company']}"},
+        json={"status": "LOADED", "location": "Ramp1"},
+    )
+
+    resp = await baggage_client.get("/admin/baggages/metrics", headers={"Authorization": f"Bearer {tokens['admin']}"})
+    assert resp.status_code == 200
+    assert resp.json() == {"created_last_24h": 1, "scans_last_24h": 1, "by_status": {"LOADED": 1}}
+
+
+@pytest.mark.asyncio
+async def test_counters_reconciliation_recomputes_from_source(
+    baggage_client: AsyncClient, create_users, db_session: AsyncSession, counters_redis
+):
+    tokens = create_users["tokens"]
+    pax = create_users["users"]["pax"]
+    await create_baggage_for_test(baggage_client, tokens["company"], pax.id, create_users["company"].id)
+    # Incréments perdus ou en trop (Redis indisponible, redémarrage…)
+    await counters_redis.hset(STATUS_KEY, mapping={"CHECKED_IN": 999, "LOST": 3})
+    await counters_redis.delete(*[key for key in list(counters_redis._data) if key.startswith(CREATED_PREFIX)])
+
+    drift = await reconcile_counters(db_session)
+    assert drift["created_last_24h"] > 0
+
+    day_start = datetime.utcnow() - timedelta(days=1)
+    by_status = dict((await db_session.execute(
+        select(Baggage.status, func.count()).group_by(Baggage.status)
+    )).all())
+    created = (await db_session.execute(
+        select(func.count()).select_from(Baggage).where(Baggage.created_at >= day_start)
+    )).scalar()
+    counters = await read_counters()
+    assert counters["by_status"] == {status.value: count for status, count in by_status.items()}
+    assert counters["created_last_24h"] == created
+    assert await reconcile_counters(db_session) == {"created_last_24h": 0, "scans_last_24h": 0}
+
+
+@pytest.mark.asyncio
+async def test_counters_reconciliation_keeps_concurrent_increments(db_session: AsyncSession, monkeypatch):
+    minute_counts = counters._minute_counts
+
+    async def scan_during_reconciliation(db, column, since):
+        # Scan validé pendant la requête SQL, invisible pour celle-ci
+        if column is ScanLog.timestamp:
+            await counters.record_scan(datetime.utcnow())
+        return await minute_counts(db, column, since)
+
+    monkeypatch.setattr(counters, "_minute_counts", scan_during_reconciliation)
+    await reconcile_counters(db_session)
+
+    day_start = datetime.utcnow() - timedelta(days=1)
+    scans = (await db_session.execute(
+        select(func.count()).select_from(ScanLog).where(ScanLog.timestamp >= day_start)
+    )).scalar()
+    assert (await read_counters())["scans_last_24h"] == scans + 1
+
+
+@pytest.mark.asyncio
+async def test_counters_read_hourly_rollups_and_edge_minutes(counters_redis):
+    now = datetime(2026, 10, 18, 12, 30)
+    for at in (
+        now - timedelta(hours=25),
+        now - timedelta(hours=24),  # première minute hors fenêtre
+        now - timedelta(hours=23, minutes=59),  # heure de début, partielle
+        now - timedelta(hours=23, minutes=45),
+        now - timedelta(hours=10),  # heure complète : lue en cumul
+        now,
+    ):
+        await counters.record_scan(at)
+
+    assert (await read_counters(now))["scans_last_24h"] == 4
+    _, edges, hours = counters._window(counters.minute_index(now))
+    assert len(edges) + len(hours) < 150
+
+
+@pytest.mark.asyncio
+async def test_admin_list_keyset_pagination(baggage_client: AsyncClient, create_users):
+    tokens = create_users["tokens"]
+    company = create_users["company"]
+    pax = create_users["users"]["pax"]
+    headers = {"Authorization": f"Bearer {tokens['admin']}"}
+    # Enregistrement groupé : même created_at pour tous, départage par id
+    bags = [{"owner_id": str(pax.id), "company_id": str(company.id)} for _ in range(25)]
+    resp = await baggage_client.post(
+        "/baggages/bulk", headers={"Authorization": f"Bearer {tokens['company']}"}, json={"bags": bags}
+    )
+    assert resp.status_code == 200
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = f"/admin/v2/baggages/?company_id={company.id}&size=10" + (f"&cursor={cursor}" if cursor else "")
+        resp = await baggage_client.get(query, headers=headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] == 25
+        seen += [bag["tag"] for bag in data["items"]]
+        pages += 1
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 25
+
+    resp = await baggage_client.get(
+        f"/admin/v2/baggages/?company_id={company.id}&size=10&exact_total=true", headers=headers
+    )
+    assert resp.json()["total_exact"] is True
+
+    resp = await baggage_client.get("/admin/v2/baggages/?cursor=not-a-cursor", headers=headers)
+    assert resp.status_code == 400
+
+    # v1 : contrat d'origine (page, total exact)
+    resp = await baggage_client.get(f"/admin/baggages/?company_id={company.id}&page=3&size=10", headers=headers)
+    data = resp.json()
+    assert (data["total"], data["page"], len(data["items"])) == (25, 3, 5)
+    assert "next_cursor" not in data
+
+
+@pytest.mark.asyncio
+async def test_bulk_checkin_assigns_tags(baggage_client: AsyncClient, create_users, db_session: AsyncSession):
+    tokens = create_users["tokens"]
+    company = create_users["company"]
+    pax = create_users["users"]["pax"]
+    bags = [
+        {"owner_id": str(pax.id), "company_id": str(company.id), "description": f"Bag {i}", "weight": "20kg"}
+        for i in range(25)
+    ]
+
+    resp = await baggage_client.post(
+        "/baggages/bulk",
+        headers={"Authorization": f"Bearer {tokens['company']}"},
+        json={"bags": bags},
+    )
+    assert resp.status_code == 200
+    created = resp.json()
+    assert [bag["description"] for bag in created] == [f"Bag {i}" for i in range(25)]
+    assert len({bag["tag"] for bag in created}) == 25
+    assert all(bag["status"] == "CHECKED_IN" for bag in created)
+
+    q = await db_session.execute(
+        Baggage.__table__.select().where(Baggage.tag.in_([bag["tag"] for bag in created]))
+    )
+    assert len(q.all()) == 25
+
+
+@pytest.mark.asyncio
+async def test_qr_code_rendered_on_first_download(
+    baggage_client: AsyncClient, create_users, db_session: AsyncSession, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(qr_renderer, "storage", LocalStorage(str(tmp_path)))
+    tokens = create_users["tokens"]
+    pax = create_users["users"]["pax"]
+    created = await create_baggage_for_test(baggage_client, tokens["company"], pax.id, create_users["company"].id)
+    tag = created["tag"]
+
+    try:
+        resp = await baggage_client.get(f"/baggages/{tag}/qr", headers={"Authorization": f"Bearer {tokens['pax']}"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "image/png"
+        assert resp.content.startswith(b"\x89PNG")
+        assert resp.headers["etag"] == f'"{qr_key(tag)}"'
+        assert "immutable" in resp.headers["cache-control"]
+        assert resp.headers["content-length"] == str(len(resp.content))
+        assert (tmp_path / "qr" / qr_key(tag)[:2] / f"{qr_key(tag)}.png").exists()
+
+        # Revalidation : 304 sans corps
+        resp = await baggage_client.get(
+            f"/baggages/{tag}/qr",
+            headers={"Authorization": f"Bearer {tokens['pax']}", "If-None-Match": resp.headers["etag"]},
+        )
+        assert resp.status_code == 304
+        assert resp.content == b""
+
+        # Un autre passager n'a pas accès au QR code
+        other = User(
+            email=f"pax_{uuid.uuid4().hex[:6]}@test.com", hashed_password=hash_password("paxpass"),
+            role=UserRole.PASSAGER, is_active=True,
+        )
+        db_session.add(other)
+        await db_session.commit()
+        other_token = create_access_token(str(other.id), other.role.value)
+        resp = await baggage_client.get(f"/baggages/{tag}/qr", headers={"Authorization": f"Bearer {other_token}"})
+        assert resp.status_code == 403
+    finally:
+        qr_renderer.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_bulk_checkin_rejects_empty_and_pax(baggage_client: AsyncClient, create_users):
+    tokens = create_users["tokens"]
+    resp = await baggage_client.post(
+        "/baggages/bulk", headers={"Authorization": f"Bearer {tokens['company']}"}, json={"bags": []}
+    )
+    assert resp.status_code == 422
+
+    pax = create_users["users"]["pax"]
+    resp = await baggage_client.post(
+        "/baggages/bulk",
+        headers={"Authorization": f"Bearer {tokens['pax']}"},
+        json={"bags": [{"owner_id": str(pax.id), "company_id": str(create_users["company"].id)}]},
+    )
+    assert resp.status_code == 403
@@ -0,0 +1,84 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+import pytest
+
+from services.baggage.worker.consumer import EventConsumer
+from services.baggage.redis.memory import MemoryRedis
+from tests.utils.redis import stream_events
+
+
+class FakeMessage:
+    def __init__(self, delivery_tag, routing_key, payload):
+        self.delivery_tag = delivery_tag
+        self.routing_key = routing_key
+        self.body = json.dumps(payload).encode()
+        self.timestamp = datetime.now(timezone.utc)
+        self.acked = None
+
+    async def ack(self, multiple=False):
+        self.acked = multiple
+
+
+@pytest.mark.asyncio
+async def test_consumer_forwards_micro_batches_and_acks_contiguous_watermark():
+    fake = MemoryRedis()
+    consumer = EventConsumer(fake, url="amqp://test", batch_size=10, batch_window=0.01)
+    messages = [FakeMessage(tag, "baggage.status", {"tag": f"T{tag}", "status": "LOADED"}) for tag in range(1, 6)]
+    for message in messages:
+        await consumer.on_message(message)
+
+    # Un lot traité avant ses prédécesseurs n'est pas acquitté
+    await consumer.forward(messages[3:])
+    assert all(message.acked is None for message in messages)
+
+    await consumer.forward(messages[:3])
+    assert messages[-1].acked is True
+    assert [channel for channel, _ in stream_events(fake)] == ["baggage.status"] * 5
+    assert json.loads(stream_events(fake)[0][1]) == {"tag": "T4", "status": "LOADED"}
+
+
+@pytest.mark.asyncio
+async def test_consumer_routes_each_tag_to_a_single_handler():
+    consumer = EventConsumer(MemoryRedis(), url="amqp://test", concurrency=4)
+    messages = [FakeMessage(n, "baggage.status", {"tag": f"T{n % 3}"}) for n in range(1, 31)]
+    for message in messages:
+        await consumer.on_message(message)
+
+    inboxes = {}
+    for message in messages:
+        inboxes.setdefault(json.loads(message.body)["tag"], set()).add(id(consumer.inbox_for(message)))
+    assert all(len(queues) == 1 for queues in inboxes.values())
+    # Chaque file garde l'ordre de livraison de ses tags
+    for inbox in consumer._inboxes:
+        delivered = [inbox.get_nowait().delivery_tag for _ in range(inbox.qsize())]
+        assert delivered == sorted(delivered)
+
+
+@pytest.mark.asyncio
+async def test_consumer_retries_failed_batch_in_place(monkeypatch):
+    monkeypatch.setattr("services.baggage.worker.consumer.RETRY_DELAY_SECONDS", 0)
+    fake = MemoryRedis()
+    failures = [ConnectionError("redis down")] * 2
+    xadd = fake.xadd
+
+    async def flaky_xadd(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await xadd(*args, **kwargs)
+
+    monkeypatch.setattr(fake, "xadd", flaky_xadd)
+    consumer = EventConsumer(fake, url="amqp://test", concurrency=1, batch_size=3, batch_window=0.01)
+    messages = [FakeMessage(n, "baggage.status", {"tag": "A", "n": n}) for n in range(1, 5)]
+    for message in messages:
+        await consumer.on_message(message)
+
+    batch = await consumer._take_batch(consumer._inboxes[0])
+    assert batch == messages[:3]
+    await consumer.forward(batch)
+    assert not failures
+    assert batch[-1].acked is True
+    assert await asyncio.wait_for(consumer._take_batch(consumer._inboxes[0]), 1) == messages[3:]
+
+    await consumer.forward(messages[3:])
+    assert [json.loads(data)["n"] for _, data in stream_events(fake)] == [1, 2, 3, 4]
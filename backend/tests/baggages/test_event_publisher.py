@@ -0,0 +1,74 @@
+import asyncio
+import json
+import orjson
+import pytest
+from unittest.mock import patch
+
+from services.baggage.core import event
+from services.baggage.core.event import EventPublisher, PublishTimeout, PublisherStopped
+from tests.utils.amqp import FakeBroker
+
+
+@pytest.fixture
+def fast_reconnect():
+    with patch.object(event, "RECONNECT_DELAY_SECONDS", 0.01):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_publisher_reuses_connection_and_declares_exchange_once(fast_reconnect):
+    broker = FakeBroker()
+    with patch("aio_pika.connect_robust", broker.connect_robust):
+        publisher = EventPublisher(url="amqp://test", pool_size=2, batch_size=50, buffer_size=1000)
+        confirmations = [await publisher.publish("scan", {"tag": f"T{i}"}) for i in range(250)]
+        await asyncio.wait_for(asyncio.gather(*confirmations), 2)
+        await publisher.stop()
+
+    assert broker.connections == 1
+    assert broker.channels == 2
+    assert broker.declared == ["baggage.events"]
+    assert len(broker.published) == 250
+    assert broker.published[0] == ("baggage.scan", orjson.dumps({"tag": "T0"}))
+    assert broker.closed
+
+
+@pytest.mark.asyncio
+async def test_publisher_buffers_while_broker_is_down_and_retries(fast_reconnect):
+    broker = FakeBroker(unavailable=3, failures=2)
+    with patch("aio_pika.connect_robust", broker.connect_robust):
+        publisher = EventPublisher(url="amqp://test", pool_size=1, batch_size=10, buffer_size=100)
+        confirmations = [await publisher.publish("status", {"tag": "A", "status": status}) for status in ("LOADED", "IN_TRANSIT")]
+        await asyncio.wait_for(asyncio.gather(*confirmations), 2)
+        await publisher.stop()
+
+    # Lot republié après l'échec : livraison au moins une fois, dans l'ordre
+    assert [json.loads(body)["status"] for _, body in broker.published] == ["LOADED", "IN_TRANSIT"]
+
+
+@pytest.mark.asyncio
+async def test_publisher_applies_backpressure_when_buffer_is_full(fast_reconnect):
+    broker = FakeBroker(unavailable=1000)
+    with patch("aio_pika.connect_robust", broker.connect_robust):
+        publisher = EventPublisher(url="amqp://test", pool_size=1, buffer_size=2, publish_timeout=0.05)
+        await publisher.publish("scan", {"tag": "A"})
+        await publisher.publish("scan", {"tag": "B"})
+        with pytest.raises(PublishTimeout):
+            await publisher.publish("scan", {"tag": "C"})
+        await publisher.stop()
+
+
+@pytest.mark.asyncio
+async def test_publisher_stop_fails_pending_confirmations(fast_reconnect):
+    broker = FakeBroker(unavailable=1000)
+    with patch("aio_pika.connect_robust", broker.connect_robust):
+        publisher = EventPublisher(url="amqp://test", pool_size=1, buffer_size=10)
+        confirmed = await publisher.publish("scan", {"tag": "A"})
+        waiter = asyncio.create_task(publisher.publish("scan", {"tag": "B"}, wait=True))
+        await asyncio.sleep(0.01)
+        await publisher.stop(drain_timeout=0.01)
+
+    with pytest.raises(PublisherStopped):
+        await confirmed
+    with pytest.raises(PublisherStopped):
+        await asyncio.wait_for(waiter, 1)
+    assert publisher.pending == 0
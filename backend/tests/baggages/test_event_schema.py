@@ -0,0 +1,66 @@
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from services.baggage.core.event_schema import (
+    GpsEvent, StatusEvent, SCHEMA_VERSION, decode_event, encode_payload,
+)
+from services.baggage.core.enums import BaggageStatus
+from services.baggage.core.hub import build_message
+
+
+def test_events_encode_once_with_type_and_version():
+    company_id = uuid.uuid4()
+    event = GpsEvent(
+        tag="ABC123", company_id=company_id, latitude=6.13, longitude=1.22,
+        timestamp=datetime(2026, 10, 18, 12, 30, 5, 250000), device_id="dev-1",
+    )
+    encoded = event.encode()
+
+    assert encoded is event.encode()
+    assert json.loads(encoded) == {
+        "type": "gps",
+        "v": SCHEMA_VERSION,
+        "tag": "ABC123",
+        "company_id": str(company_id),
+        "latitude": 6.13,
+        "longitude": 1.22,
+        "timestamp": "2026-10-18T12:30:05.250000",
+        "device_id": "dev-1",
+    }
+    with pytest.raises(AttributeError):
+        event.unknown = 1
+
+
+def test_decode_round_trip_keeps_original_bytes():
+    event = StatusEvent(tag="ABC123", status=BaggageStatus.LOADED, timestamp=datetime(2026, 10, 18), location="Ramp1")
+    decoded = decode_event(event.encode())
+
+    assert isinstance(decoded, StatusEvent)
+    assert decoded.status == "LOADED"
+    assert decoded.encode() == event.encode()
+    assert encode_payload(event) == encode_payload(event.encode())
+
+
+def test_decode_rejects_unknown_type_and_newer_version():
+    with pytest.raises(ValueError):
+        decode_event(b'{"type": "weather", "v": 1}')
+    with pytest.raises(ValueError):
+        decode_event(json.dumps({"type": "status", "v": SCHEMA_VERSION + 1, "tag": "A", "status": "LOST", "timestamp": "x"}))
+    with pytest.raises(ValueError):
+        decode_event(b'{"type": "gps", "v": 1, "tag": "A"}')
+
+
+def test_hub_adds_event_id_to_encoded_event():
+    event = GpsEvent(tag="A", latitude=1.0, longitude=2.0, timestamp=datetime(2026, 10, 18))
+    message = build_message(GpsEvent.channel, event.encode().decode(), "5-0")
+
+    assert message.data == '{"event_id":"5-0",' + event.encode().decode()[1:]
+    assert json.loads(message.data)["type"] == "gps"
+    assert message.event["tag"] == "A"
+
+    # `event_id` de l'émetteur remplacé, pas dupliqué
+    message = build_message(GpsEvent.channel, ' {"event_id": "forged", "tag": "A"}', "6-0")
+    assert message.data == '{"event_id":"6-0","tag":"A"}'
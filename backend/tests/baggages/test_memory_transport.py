@@ -0,0 +1,91 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+
+from services.baggage.core.event import EventPublisher, EXCHANGE_NAME
+from services.baggage.core.hub import EventHub
+from services.baggage.core.transport import MemoryBroker, topic_matches
+from services.baggage.redis.memory import MemoryRedis
+from services.baggage.worker.consumer import EventConsumer, QUEUE_NAME
+
+
+def test_topic_matching():
+    assert topic_matches("baggage.*", "baggage.status")
+    assert not topic_matches("baggage.*", "baggage.status.extra")
+    assert topic_matches("baggage.#", "baggage.status.extra")
+    assert topic_matches("#", "baggage.gps")
+    assert not topic_matches("baggage.*", "flight.status")
+
+
+@pytest.mark.asyncio
+async def test_memory_stream_blocking_read_and_ranges():
+    redis = MemoryRedis()
+    first = await redis.xadd("s", {"n": "1"})
+    reader = asyncio.create_task(redis.xread({"s": first}, block=1000))
+    await asyncio.sleep(0.01)
+    second = await redis.xadd("s", {"n": "2"})
+
+    assert await asyncio.wait_for(reader, 1) == [["s", [(second, {"n": "2"})]]]
+    assert await redis.xrange("s", min=f"({first}") == [(second, {"n": "2"})]
+    assert await redis.xrevrange("s", count=1) == [(second, {"n": "2"})]
+    assert await redis.xread({"s": second}, block=10) == []
+
+
+@pytest.mark.asyncio
+async def test_memory_broker_shares_queue_and_requeues_unacked():
+    broker = MemoryBroker()
+    connection = await broker.connect_robust()
+    channel = await connection.channel()
+    await channel.set_qos(prefetch_count=2)
+    exchange = await channel.declare_exchange(EXCHANGE_NAME)
+    queue = await channel.declare_queue("q", durable=True)
+    await queue.bind(exchange, routing_key="baggage.*")
+    received = []
+
+    async def on_message(message):
+        received.append(message)
+
+    await queue.consume(on_message)
+    for index in range(3):
+        broker.route(EXCHANGE_NAME, "baggage.scan", str(index).encode())
+    broker.route(EXCHANGE_NAME, "flight.status", b"ignored")
+    await asyncio.sleep(0.01)
+
+    # Prefetch atteint : le troisième message attend un ack
+    assert [m.body for m in received] == [b"0", b"1"]
+    assert queue.declaration_result.message_count == 1
+    await received[1].ack(multiple=True)
+    await asyncio.sleep(0.01)
+    assert [m.body for m in received] == [b"0", b"1", b"2"]
+
+    # Non acquitté à la fermeture : remis en file, dans l'ordre
+    await connection.close()
+    assert queue.declaration_result.message_count == 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_end_to_end_in_memory():
+    broker = MemoryBroker()
+    redis = MemoryRedis()
+    with patch("services.baggage.core.event.connect_broker", broker.connect_robust), \
+            patch("services.baggage.worker.consumer.connect_broker", broker.connect_robust), \
+            patch("services.baggage.core.hub.redis_client", redis):
+        hub = EventHub()
+        subscription = hub.subscribe(tags=["A"])
+        consumer = asyncio.create_task(EventConsumer(redis, batch_window=0.001).run())
+        publisher = EventPublisher(url="memory://")
+        await asyncio.sleep(0.02)
+
+        await publisher.publish("status", {"tag": "B", "status": "LOADED"})
+        await publisher.publish("status", {"tag": "A", "status": "LOADED"}, wait=True)
+        message = await asyncio.wait_for(subscription.get(), 1)
+
+        assert message.channel == "baggage.status"
+        assert json.loads(message.data)["tag"] == "A"
+        assert broker.queues[QUEUE_NAME].declaration_result.message_count == 0
+
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await publisher.stop()
+        await hub.stop()
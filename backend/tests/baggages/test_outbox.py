@@ -0,0 +1,159 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.baggage.main import app as baggage_app
+from services.baggage.core import event
+from services.baggage.core.event import EventPublisher, PublishTimeout
+from services.baggage.core.outbox import relay_once
+from services.baggage.models.event_outbox import EventOutbox
+from libs.common.database import get_db
+from tests.utils.amqp import FakeBroker
+from tests.utils.db import AsyncTestingSessionLocal
+
+
+@pytest.fixture
+async def baggage_client(db_session: AsyncSession):
+    baggage_app.dependency_overrides[get_db] = lambda: db_session
+    transport = ASGITransport(app=baggage_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    baggage_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def fast_reconnect():
+    with patch.object(event, "RECONNECT_DELAY_SECONDS", 0.01):
+        yield
+
+
+async def change_status(client: AsyncClient, create_users, status: str) -> str:
+    tokens = create_users["tokens"]
+    resp = await client.post(
+        "/baggages/",
+        headers={"Authorization": f"Bearer {tokens['company']}"},
+        json={
+            "owner_id": str(create_users["users"]["pax"].id),
+            "company_id": str(create_users["company"].id),
+            "description": "Outbox bag",
+            "weight": "12kg",
+        },
+    )
+    assert resp.status_code in (200, 201)
+    tag = resp.json()["tag"]
+    resp = await client.post(
+        f"/baggages/{tag}/status",
+        headers={"Authorization": f"Bearer {tokens['company']}"},
+        json={"status": status, "location": "Ramp2"},
+    )
+    assert resp.status_code == 200
+    return tag
+
+
+async def outbox_rows(tag: str) -> list[EventOutbox]:
+    async with AsyncTestingSessionLocal() as db:
+        rows = (await db.execute(select(EventOutbox).order_by(EventOutbox.id))).scalars().all()
+    return [row for row in rows if json.loads(row.payload)["tag"] == tag]
+
+
+@pytest.mark.asyncio
+async def test_status_change_writes_outbox_event(baggage_client: AsyncClient, create_users):
+    tag = await change_status(baggage_client, create_users, "LOADED")
+
+    rows = await outbox_rows(tag)
+    assert len(rows) == 1
+    assert rows[0].event_type == "status"
+    payload = json.loads(rows[0].payload)
+    assert payload["type"] == "status"
+    assert payload["status"] == "LOADED"
+    assert payload["company_id"] == str(create_users["company"].id)
+    assert rows[0].sent_at is None
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_and_marks_events_sent(baggage_client: AsyncClient, create_users, fast_reconnect):
+    tag = await change_status(baggage_client, create_users, "IN_TRANSIT")
+
+    broker = FakeBroker()
+    with patch("aio_pika.connect_robust", broker.connect_robust):
+        publisher = EventPublisher(url="amqp://test", pool_size=1)
+        while await relay_once(publisher, AsyncTestingSessionLocal, batch_size=2):
+            pass
+        await publisher.stop()
+
+    published = [body for key, body in broker.published if key == "baggage.status"]
+    mine = [body for body in published if json.loads(body)["tag"] == tag]
+    assert len(mine) == 1
+    assert json.loads(mine[0])["status"] == "IN_TRANSIT"
+    row = (await outbox_rows(tag))[0]
+    # Publié tel qu'encodé à l'écriture, sans re-sérialisation
+    assert mine[0] == row.payload.encode()
+    assert row.sent_at is not None
+    # Relancer le relais ne republie rien
+    assert await relay_once(publisher, AsyncTestingSessionLocal) == 0
+
+
+@pytest.mark.asyncio
+async def test_relay_keeps_events_pending_when_publish_fails(baggage_client: AsyncClient, create_users):
+    tag = await change_status(baggage_client, create_users, "DELIVERED")
+
+    class FailingPublisher:
+        async def publish(self, event_type, payload, message_id=None):
+            raise ConnectionError("broker down")
+
+    with pytest.raises(ConnectionError):
+        await relay_once(FailingPublisher(), AsyncTestingSessionLocal)
+
+    assert (await outbox_rows(tag))[0].sent_at is None
+
+
+@pytest.mark.asyncio
+async def test_relay_gives_up_on_unconfirmed_publish(baggage_client: AsyncClient, create_users):
+    tag = await change_status(baggage_client, create_users, "UNLOADED")
+    pending = []
+
+    class StalledPublisher:
+        async def publish(self, event_type, payload, message_id=None):
+            confirmed = asyncio.get_running_loop().create_future()
+            pending.append(confirmed)
+            return confirmed
+
+    with pytest.raises(PublishTimeout):
+        await relay_once(StalledPublisher(), AsyncTestingSessionLocal, publish_timeout=0.05)
+
+    # Confirmations annulées, lignes relâchées et toujours en attente
+    assert pending and all(confirmed.cancelled() for confirmed in pending)
+    assert (await outbox_rows(tag))[0].sent_at is None
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_in_outbox_order_across_retries(baggage_client: AsyncClient, create_users, fast_reconnect):
+    # Vide l'outbox des tests précédents
+    with patch("aio_pika.connect_robust", FakeBroker().connect_robust):
+        publisher = EventPublisher(url="amqp://test", pool_size=1)
+        while await relay_once(publisher, AsyncTestingSessionLocal):
+            pass
+        await publisher.stop()
+
+    tags = [await change_status(baggage_client, create_users, s) for s in ("LOADED", "IN_TRANSIT", "DELIVERED")]
+    ids = [str((await outbox_rows(tag))[0].id) for tag in tags]
+
+    # Broker joignable au second essai : les trois événements attendent dans le
+    # buffer et partent en lots de deux. Premier message perdu, second confirmé.
+    broker = FakeBroker(unavailable=1, fail_on={1})
+    with patch("aio_pika.connect_robust", broker.connect_robust):
+        publisher = EventPublisher(url="amqp://test", batch_size=2, ordered=True)
+        while await relay_once(publisher, AsyncTestingSessionLocal):
+            pass
+        await publisher.stop()
+
+    assert broker.channels == 1
+    # Le lot est republié à partir du message perdu : la dernière copie de
+    # chaque message (celle qui fait foi côté consommateur) suit l'ordre de l'outbox
+    assert broker.message_ids == [ids[1], ids[0], ids[1], ids[2]]
+    for tag in tags:
+        assert (await outbox_rows(tag))[0].sent_at is not None
@@ -0,0 +1,172 @@
+import hashlib
+
+import pytest
+from botocore.exceptions import ClientError
+
+from services.baggage.storage.base import ObjectNotFound
+from services.baggage.storage.local import LocalStorage
+from services.baggage.storage.s3 import S3Storage
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def read_all(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+class FakeS3:
+    """
+    Stand-in minimal du client S3 aiobotocore (bucket, objets, multipart).
+    """
+
+    def __init__(self):
+        self.buckets: set[str] = set()
+        self.objects: dict[str, tuple[bytes, str]] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.calls: list[str] = []
+
+    @staticmethod
+    def _missing(operation: str) -> ClientError:
+        return ClientError({"Error": {"Code": "404"}, "ResponseMetadata": {"HTTPStatusCode": 404}}, operation)
+
+    async def head_bucket(self, Bucket):
+        if Bucket not in self.buckets:
+            raise self._missing("HeadBucket")
+
+    async def create_bucket(self, Bucket, **kwargs):
+        self.buckets.add(Bucket)
+
+    async def put_object(self, Bucket, Key, Body, ContentType):
+        self.calls.append("put_object")
+        self.objects[Key] = (Body, ContentType)
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    async def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.uploads["u1"] = {}
+        return {"UploadId": "u1"}
+
+    async def upload_part(self, Bucket, Key, PartNumber, UploadId, Body):
+        self.calls.append("upload_part")
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f'"{hashlib.md5(Body).hexdigest()}"'}
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = (b"".join(parts[p["PartNumber"]] for p in MultipartUpload["Parts"]), "")
+        return {"ETag": '"abc-2"'}
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    async def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._missing("HeadObject")
+        data, content_type = self.objects[Key]
+        return {"ContentLength": len(data), "ETag": '"x"', "ContentType": content_type}
+
+    async def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._missing("GetObject")
+        return {"Body": FakeBody(self.objects[Key][0])}
+
+    async def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+class FakeBody:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    async def iter_chunks(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_checks_bucket_again_after_startup_failure():
+    fake = FakeS3()
+    failures = [ConnectionError("minio down")]
+    head_bucket = fake.head_bucket
+
+    async def flaky_head_bucket(Bucket):
+        if failures:
+            raise failures.pop()
+        return await head_bucket(Bucket)
+
+    fake.head_bucket = flaky_head_bucket
+    storage = S3Storage("http://minio:9000", "bags", "key", "secret", client=fake)
+    with pytest.raises(ConnectionError):
+        await storage.ensure_bucket()
+
+    await storage.put("qr/ab/abc.png", b"png", "image/png")
+    assert fake.buckets == {"bags"}
+
+
+@pytest.mark.asyncio
+async def test_local_storage_roundtrip(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    info = await storage.put("qr/ab/abc.png", b"png-bytes")
+    assert (info.size, info.content_type) == (9, "image/png")
+    assert (await storage.stat("qr/ab/abc.png")).etag == info.etag
+
+    await storage.upload("docs/tag.bin", chunks(b"a" * 10, b"b" * 5))
+    assert await read_all(storage.stream("docs/tag.bin", chunk_size=4)) == b"a" * 10 + b"b" * 5
+
+    await storage.delete("qr/ab/abc.png")
+    assert await storage.stat("qr/ab/abc.png") is None
+    with pytest.raises(ObjectNotFound):
+        await read_all(storage.stream("qr/ab/abc.png"))
+    with pytest.raises(ValueError):
+        await storage.stat("../etc/passwd")
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_multipart_upload_and_stream():
+    fake = FakeS3()
+    storage = S3Storage("http://minio:9000", "bags", "key", "secret", part_size=0, client=fake)
+    part = storage.part_size
+    data = b"x" * part + b"y" * part + b"z" * 10
+
+    info = await storage.upload("docs/manifest.bin", chunks(data[:1000], data[1000:]))
+    assert (info.size, info.etag) == (len(data), "abc-2")
+    assert fake.calls == ["upload_part"] * 3
+    assert await read_all(storage.stream("docs/manifest.bin", chunk_size=part)) == data
+
+    # Objet tenant dans une partie : simple PUT
+    fake.calls.clear()
+    await storage.upload("qr/ab/abc.png", chunks(b"png"), "image/png")
+    assert fake.calls == ["put_object"]
+    assert (await storage.stat("qr/ab/abc.png")).size == 3
+
+    await storage.delete("qr/ab/abc.png")
+    assert await storage.stat("qr/ab/abc.png") is None
+    with pytest.raises(ObjectNotFound):
+        await read_all(storage.stream("qr/ab/abc.png"))
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_aborts_failed_multipart_upload():
+    fake = FakeS3()
+    upload_part = fake.upload_part
+
+    async def failing_upload_part(Bucket, Key, PartNumber, UploadId, Body):
+        if PartNumber == 2:
+            raise ConnectionError("minio down")
+        return await upload_part(Bucket, Key, PartNumber, UploadId, Body)
+
+    fake.upload_part = failing_upload_part
+    storage = S3Storage("http://minio:9000", "bags", "key", "secret", part_size=0, client=fake)
+    data = b"x" * (storage.part_size * 2 + 1)
+
+    with pytest.raises(ConnectionError):
+        await storage.upload("docs/manifest.bin", chunks(data))
+    # Envoi annulé : aucune partie orpheline ni objet partiel
+    assert fake.uploads == {}
+    assert "docs/manifest.bin" not in fake.objects
@@ -0,0 +1,100 @@
+import uuid
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.baggage.main import app as baggage_app
+from libs.common.database import get_db
+from services.baggage.core.stream_access import StreamScope, stream_scope
+from services.baggage.schemas.stream import StreamSubscription
+
+
+@pytest.fixture
+async def baggage_client(db_session: AsyncSession):
+    baggage_app.dependency_overrides[get_db] = lambda: db_session
+    transport = ASGITransport(app=baggage_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    baggage_app.dependency_overrides.clear()
+
+
+async def create_bag(client: AsyncClient, create_users) -> str:
+    resp = await client.post(
+        "/baggages/",
+        headers={"Authorization": f"Bearer {create_users['tokens']['company']}"},
+        json={
+            "owner_id": str(create_users["users"]["pax"].id),
+            "company_id": str(create_users["company"].id),
+            "description": "Stream bag",
+        },
+    )
+    assert resp.status_code == 200
+    return resp.json()["tag"]
+
+
+@pytest.mark.asyncio
+async def test_sse_requires_authentication(baggage_client: AsyncClient):
+    resp = await baggage_client.get("/sse/baggages/stream")
+    assert resp.status_code == 401
+
+    resp = await baggage_client.get("/sse/baggages/stream", params={"access_token": "invalid"})
+    assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_sse_refuses_tags_of_other_passengers(baggage_client: AsyncClient, create_users):
+    await create_bag(baggage_client, create_users)
+
+    resp = await baggage_client.get(
+        "/sse/baggages/stream",
+        params={"tag": "BAG-NOT-MINE", "access_token": create_users["tokens"]["pax"]},
+    )
+    assert resp.status_code == 403
+
+    resp = await baggage_client.get(
+        "/sse/baggages/stream",
+        params={"company_id": str(uuid.uuid4())},
+        headers={"Authorization": f"Bearer {create_users['tokens']['company']}"},
+    )
+    assert resp.status_code == 403
+
+
+def test_ws_closes_unauthenticated_connections():
+    client = TestClient(baggage_app)
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/ws/baggages/stream"):
+            pass
+    assert exc.value.code == 1008
+
+
+@pytest.mark.asyncio
+async def test_stream_scope_by_role(baggage_client: AsyncClient, create_users, db_session: AsyncSession):
+    users = create_users["users"]
+    company = create_users["company"]
+    tag = await create_bag(baggage_client, create_users)
+    everything = StreamSubscription()
+
+    # Admin : aucun filtre imposé
+    assert await stream_scope(db_session, users["admin"]) == StreamScope()
+    assert StreamScope().apply(everything) == everything
+
+    # Compagnie : limitée à sa compagnie
+    scope = await stream_scope(db_session, users["company"])
+    assert scope.apply(everything).company_ids == [company.id]
+    with pytest.raises(HTTPException):
+        scope.apply(StreamSubscription(company_ids=[uuid.uuid4()]))
+
+    # Passager : limité à ses bagages
+    scope = await stream_scope(db_session, users["pax"])
+    assert tag in scope.apply(everything).tags
+    assert scope.apply(StreamSubscription(tags=[tag])).tags == [tag]
+    with pytest.raises(HTTPException) as exc:
+        scope.apply(StreamSubscription(tags=[tag, "BAG-NOT-MINE"]))
+    assert exc.value.status_code == 403
+
+    # Passager sans bagage : rien à suivre
+    with pytest.raises(HTTPException):
+        StreamScope(tags=frozenset()).apply(everything)
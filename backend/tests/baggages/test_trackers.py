@@ -0,0 +1,492 @@
+import asyncio
+import json
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.baggage.main import app as baggage_app
+from libs.common.database import get_db
+from services.baggage.models.bag import Baggage
+from services.baggage.models.tracker_device import TrackerDevice
+from services.baggage.models.baggage_position import BaggagePosition
+from services.baggage.core.position_buffer import (
+    PositionFlusher, DIRTY_KEY, POSITIONS_KEY, expire_latest_positions, get_latest_position, queue_positions,
+)
+from services.baggage.metrics import GPS_FLUSH_LAG, GPS_PENDING_POSITIONS
+from services.baggage.core.tracker_frame import encode_frame, decode_frames, FrameError
+from services.baggage.core.udp_ingest import UdpIngestServer
+from services.baggage.core.rate_limit import IngestThrottled, TokenBucketLimiter
+from services.baggage.redis.memory import MemoryRedis
+from libs.common.config import settings
+from tests.utils.db import AsyncTestingSessionLocal
+from tests.utils.redis import stream_events
+
+
+@pytest.fixture
+async def baggage_client(db_session: AsyncSession):
+    baggage_app.dependency_overrides[get_db] = lambda: db_session
+    transport = ASGITransport(app=baggage_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    baggage_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def memory_redis():
+    redis = MemoryRedis()
+    with patch("services.baggage.core.ingest.redis_client", redis), \
+            patch("services.baggage.core.position_buffer.redis_client", redis), \
+            patch("services.baggage.core.device_cache.redis_client", redis), \
+            patch("services.baggage.core.rate_limit.redis_client", redis):
+        yield redis
+
+
+async def create_tracked_baggage(db_session: AsyncSession, create_users, device_id: str) -> Baggage:
+    baggage = Baggage(
+        tag=f"BG-{uuid.uuid4().hex[:10].upper()}",
+        owner_id=create_users["users"]["pax"].id,
+        company_id=create_users["company"].id,
+    )
+    db_session.add(baggage)
+    await db_session.flush()
+    db_session.add(TrackerDevice(device_id=device_id, baggage_id=baggage.id))
+    await db_session.commit()
+    return baggage
+
+
+@pytest.mark.asyncio
+async def test_batch_ingest_updates_known_devices(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    baggage = await create_tracked_baggage(db_session, create_users, device_id)
+    start = datetime.utcnow() - timedelta(minutes=5)
+
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": device_id, "lat": 6.10, "lon": 1.20, "ts": f"{start.isoformat()}Z"},
+        {"device_id": "unknown-device", "lat": 6.0, "lon": 1.0},
+        {"device_id": device_id, "lat": 6.17, "lon": 1.25, "ts": f"{(start + timedelta(seconds=30)).isoformat()}Z"},
+    ])
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["accepted"] == 2 and data["rejected"] == 1
+    assert [r["status"] for r in data["results"]] == ["ok", "unknown_device", "ok"]
+    assert data["results"][0]["baggage_tag"] == baggage.tag
+
+    await db_session.refresh(baggage)
+    assert baggage.last_latitude == 6.17
+    assert baggage.last_longitude == 1.25
+
+    history = await db_session.execute(
+        select(BaggagePosition).where(BaggagePosition.baggage_id == baggage.id).order_by(BaggagePosition.recorded_at)
+    )
+    assert [p.latitude for p in history.scalars().all()] == [6.10, 6.17]
+
+    assert len(stream_events(memory_redis)) == 2
+    channel, payload = stream_events(memory_redis)[-1]
+    assert channel == "baggage.gps"
+    assert json.loads(payload)["tag"] == baggage.tag
+
+
+@pytest.mark.asyncio
+async def test_older_fix_does_not_overwrite_newer_position(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    baggage = await create_tracked_baggage(db_session, create_users, device_id)
+    now = datetime.utcnow()
+
+    await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": device_id, "lat": 6.30, "lon": 1.40, "ts": f"{now.isoformat()}Z"},
+    ])
+    # Fix bufferisé par la passerelle, livré après le plus récent
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": device_id, "lat": 6.10, "lon": 1.20, "ts": f"{(now - timedelta(minutes=2)).isoformat()}Z"},
+    ])
+    assert resp.json()["accepted"] == 1
+
+    await db_session.refresh(baggage)
+    assert (baggage.last_latitude, baggage.last_longitude) == (6.30, 1.40)
+    history = (await db_session.execute(
+        select(BaggagePosition).where(BaggagePosition.baggage_id == baggage.id)
+    )).scalars().all()
+    assert sorted(p.latitude for p in history) == [6.10, 6.30]
+
+
+@pytest.mark.asyncio
+async def test_batch_ingest_all_unknown_does_not_fail(baggage_client, memory_redis):
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": "ghost-1", "lat": 1.0, "lon": 2.0},
+    ])
+    assert resp.status_code == 200
+    assert resp.json()["accepted"] == 0
+    assert stream_events(memory_redis) == []
+
+
+@pytest.mark.asyncio
+async def test_write_behind_buffers_then_flushes(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    baggage = await create_tracked_baggage(db_session, create_users, device_id)
+
+    with patch("services.baggage.core.ingest.settings.GPS_WRITE_BEHIND", True):
+        resp = await baggage_client.post("/trackers/ingest", json={"device_id": device_id, "lat": 48.85, "lon": 2.35})
+        assert resp.status_code == 200
+
+        # Lisible immédiatement, avant toute écriture en base
+        headers = {"Authorization": f"Bearer {create_users['tokens']['pax']}"}
+        loc = await baggage_client.get(f"/baggages/{baggage.tag}/location", headers=headers)
+        assert loc.json()["latitude"] == 48.85
+        assert (await baggage_client.get(f"/baggages/{baggage.tag}/location")).status_code == 401
+        await db_session.refresh(baggage)
+        assert baggage.last_latitude is None
+        assert await memory_redis.hget(DIRTY_KEY, str(baggage.id)) is not None
+
+        flusher = PositionFlusher(session_factory=AsyncTestingSessionLocal)
+        await flusher.update_metrics()
+        assert GPS_PENDING_POSITIONS._value.get() == 1
+        assert GPS_FLUSH_LAG._value.get() > 0
+        flushed = await flusher.flush_once()
+
+    assert flushed == 2  # une position + un point d'historique
+    assert await memory_redis.hlen(DIRTY_KEY) == 0
+    await flusher.update_metrics()
+    assert GPS_PENDING_POSITIONS._value.get() == 0
+    assert GPS_FLUSH_LAG._value.get() == 0
+    await db_session.refresh(baggage)
+    assert baggage.last_latitude == 48.85
+    history = await db_session.execute(select(BaggagePosition).where(BaggagePosition.baggage_id == baggage.id))
+    assert len(history.scalars().all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_latest_position_keeps_newest_fix(memory_redis):
+    baggage_id = uuid.uuid4()
+    now = datetime.utcnow()
+
+    async def write(lat: float, seen_at: datetime, tag: str = "BG-ORDER") -> None:
+        async with memory_redis.pipeline(transaction=False) as pipe:
+            queue_positions(pipe, [(baggage_id, tag, lat, 2.0, seen_at)])
+            await pipe.execute()
+
+    with patch("services.baggage.core.position_buffer.settings.GPS_WRITE_BEHIND", True):
+        await write(1.0, now)
+        # Fix plus ancien arrivé après (autre worker, retransmission) : ignoré
+        await write(9.0, now - timedelta(seconds=30))
+
+    assert (await get_latest_position("BG-ORDER"))["latitude"] == 1.0
+    assert json.loads(await memory_redis.hget(DIRTY_KEY, str(baggage_id)))["latitude"] == 1.0
+
+    # Bagage sans fix depuis la rétention : retiré, relu en base ensuite
+    await write(3.0, now - timedelta(hours=1), tag="BG-IDLE")
+    assert await expire_latest_positions(max_age_seconds=7200) == 0
+    assert await expire_latest_positions(max_age_seconds=600) == 1
+    assert await memory_redis.hget(POSITIONS_KEY, "BG-IDLE") is None
+    assert await get_latest_position("BG-ORDER") is not None
+
+
+@pytest.mark.asyncio
+async def test_pair_and_unpair_invalidate_device_cache(baggage_client, create_users, db_session, memory_redis):
+    tokens = create_users["tokens"]
+    headers = {"Authorization": f"Bearer {tokens['company']}"}
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    baggage = Baggage(
+        tag=f"BG-{uuid.uuid4().hex[:10].upper()}",
+        owner_id=create_users["users"]["pax"].id,
+        company_id=create_users["company"].id,
+    )
+    db_session.add(baggage)
+    await db_session.commit()
+
+    # Device inconnu : mis en cache négatif
+    resp = await baggage_client.post("/trackers/ingest", json={"device_id": device_id, "lat": 1.0, "lon": 2.0})
+    assert resp.status_code == 404
+
+    resp = await baggage_client.post("/trackers/devices", headers=headers, json={"device_id": device_id, "tag": baggage.tag})
+    assert resp.status_code == 200
+    assert resp.json()["baggage_id"] == str(baggage.id)
+
+    resp = await baggage_client.post("/trackers/devices", headers=headers, json={"device_id": device_id, "tag": baggage.tag})
+    assert resp.status_code == 409
+
+    resp = await baggage_client.post("/trackers/ingest", json={"device_id": device_id, "lat": 1.0, "lon": 2.0})
+    assert resp.status_code == 200
+    assert resp.json()["baggage_tag"] == baggage.tag
+
+    resp = await baggage_client.delete(f"/trackers/devices/{device_id}", headers=headers)
+    assert resp.status_code == 200
+
+    resp = await baggage_client.post("/trackers/ingest", json={"device_id": device_id, "lat": 1.0, "lon": 2.0})
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_resolve_skips_stale_write_back(memory_redis):
+    from services.baggage.core.device_cache import DeviceCache, KEY_PREFIX
+
+    cache = DeviceCache()
+    stale = (uuid.uuid4(), "BG-STALE", uuid.uuid4())
+
+    async def unpaired_while_reading(db, device_ids):
+        # Dissociation validée pendant la lecture en base
+        await cache.invalidate("dev-race")
+        return {"dev-race": stale}
+
+    with patch("services.baggage.core.device_cache.get_baggages_by_devices", unpaired_while_reading):
+        assert await cache.resolve(None, ["dev-race"]) == {"dev-race": stale}
+    assert await memory_redis.get(KEY_PREFIX + "dev-race") is None
+    assert "dev-race" not in cache._local
+
+    async def unpaired(db, device_ids):
+        return {}
+
+    with patch("services.baggage.core.device_cache.get_baggages_by_devices", unpaired):
+        assert await cache.resolve(None, ["dev-race"]) == {}
+    assert await memory_redis.get(KEY_PREFIX + "dev-race") == ""
+
+
+@pytest.mark.asyncio
+async def test_stationary_fixes_are_suppressed(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    await create_tracked_baggage(db_session, create_users, device_id)
+    start = datetime.utcnow() - timedelta(minutes=5)
+
+    def ts(seconds: int) -> str:
+        return f"{(start + timedelta(seconds=seconds)).isoformat()}Z"
+
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": device_id, "lat": 6.1300, "lon": 1.2200, "ts": ts(0)},
+        {"device_id": device_id, "lat": 6.1300, "lon": 1.2200, "ts": ts(10)},
+        {"device_id": device_id, "lat": 6.1301, "lon": 1.2200, "ts": ts(20)},  # ~11 m
+        {"device_id": device_id, "lat": 6.1310, "lon": 1.2200, "ts": ts(30)},  # ~110 m
+        {"device_id": device_id, "lat": 6.1310, "lon": 1.2200, "ts": ts(120)},  # intervalle dépassé
+    ])
+    data = resp.json()
+    assert [r["status"] for r in data["results"]] == ["ok", "suppressed", "suppressed", "ok", "ok"]
+    assert data["accepted"] == 3 and data["suppressed"] == 2 and data["rejected"] == 0
+    assert len(stream_events(memory_redis)) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_move_filter_reference(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    await create_tracked_baggage(db_session, create_users, device_id)
+    fix = {"device_id": device_id, "lat": 6.13, "lon": 1.22}
+
+    with patch("services.baggage.core.ingest.store_positions", side_effect=RuntimeError("db down")):
+        with pytest.raises(RuntimeError):
+            await baggage_client.post("/trackers/ingest/batch", json=[fix])
+
+    # Le renvoi par la passerelle n'est pas supprimé
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[fix])
+    assert [r["status"] for r in resp.json()["results"]] == ["ok"]
+
+
+
+@pytest.mark.asyncio
+async def test_out_of_window_timestamps_are_bounded(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    baggage = await create_tracked_baggage(db_session, create_users, device_id)
+    now = datetime.utcnow()
+
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": device_id, "lat": 6.10, "lon": 1.20, "ts": "1970-01-01T00:00:00Z"},  # horloge remise à zéro
+        {"device_id": device_id, "lat": 6.20, "lon": 1.30, "ts": f"{(now + timedelta(days=400)).isoformat()}Z"},
+    ])
+    data = resp.json()
+    assert [r["status"] for r in data["results"]] == ["stale", "ok"]
+    assert data["accepted"] == 1 and data["rejected"] == 1
+
+    # Le fix daté du futur est ramené à l'heure de réception
+    history = (await db_session.execute(
+        select(BaggagePosition).where(BaggagePosition.baggage_id == baggage.id)
+    )).scalars().all()
+    assert [p.latitude for p in history] == [6.20]
+    assert now <= history[0].recorded_at <= datetime.utcnow()
+
+def test_frame_roundtrip():
+    ts = datetime(2025, 1, 1, 10, 0, 0)
+    frames = encode_frame("lora-01", [(6.1319, 1.2228, ts, 87), (-33.9249, 18.4241, 1735725630, None)])
+    frames += encode_frame("lora-02", [(48.8566, 2.3522, ts, 12)])
+    assert len(frames) == 2 * (5 + 7) + 3 * 13
+
+    fixes = decode_frames(frames)
+    assert [f.device_id for f in fixes] == ["lora-01", "lora-01", "lora-02"]
+    assert fixes[0].lat == 6.1319 and fixes[0].lon == 1.2228
+    assert fixes[0].ts == ts and fixes[0].battery == 87
+    assert fixes[1].lat == -33.9249 and fixes[1].battery is None
+
+
+def test_frame_rejects_out_of_range_coordinates():
+    with pytest.raises(FrameError):
+        decode_frames(encode_frame("lora-01", [(91.0, 1.22, 1735725600, 90)]))
+    with pytest.raises(FrameError):
+        decode_frames(encode_frame("lora-01", [(6.13, -180.5, 1735725600, 90)]))
+
+
+@pytest.mark.asyncio
+async def test_ingest_rejects_invalid_coordinates(baggage_client, memory_redis):
+    for lat, lon in ((91.0, 2.0), (1.0, 181.0)):
+        resp = await baggage_client.post("/trackers/ingest", json={"device_id": "ghost-1", "lat": lat, "lon": lon})
+        assert resp.status_code == 400
+    # NaN / Infinity : jetons acceptés par le décodeur JSON de Python
+    resp = await baggage_client.post(
+        "/trackers/ingest/batch",
+        content=b'[{"device_id": "ghost-1", "lat": NaN, "lon": Infinity}]',
+        headers={"content-type": "application/json"},
+    )
+    assert resp.status_code == 422
+    assert stream_events(memory_redis) == []
+
+
+@pytest.mark.asyncio
+async def test_binary_frame_ingest(baggage_client, create_users, db_session, memory_redis):
+    device_id = f"dev-{uuid.uuid4().hex[:8]}"
+    baggage = await create_tracked_baggage(db_session, create_users, device_id)
+    body = encode_frame(device_id, [(6.20, 1.30, datetime.utcnow().replace(microsecond=0), 55)])
+
+    resp = await baggage_client.post(
+        "/trackers/ingest", content=body, headers={"Content-Type": "application/octet-stream"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["results"][0]["baggage_tag"] == baggage.tag
+    assert json.loads(stream_events(memory_redis)[-1][1])["battery"] == 55
+
+    await db_session.refresh(baggage)
+    assert baggage.last_latitude == 6.20
+
+    resp = await baggage_client.post(
+        "/trackers/ingest", content=body[:-1], headers={"Content-Type": "application/octet-stream"}
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_udp_listener_feeds_handler():
+    received = []
+
+    async def handler(fixes):
+        received.extend(fixes)
+
+    server = UdpIngestServer(handler=handler, queue_size=10, limiter=TokenBucketLimiter(MemoryRedis()))
+    host, port = await server.start("127.0.0.1", 0)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.sendto(encode_frame("lora-01", [(6.13, 1.22, 1735725600, 90)]), (host, port))
+        sock.sendto(json.dumps({"device_id": "gsm-01", "lat": 6.14, "lon": 1.23}).encode(), (host, port))
+        sock.sendto(b"garbage", (host, port))
+        for _ in range(50):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        sock.close()
+        await server.stop()
+
+    assert sorted(f.device_id for f in received) == ["gsm-01", "lora-01"]
+
+
+@pytest.mark.asyncio
+async def test_udp_non_object_json_does_not_drop_batch():
+    received = []
+
+    async def handler(fixes):
+        received.extend(fixes)
+
+    server = UdpIngestServer(handler=handler, limiter=TokenBucketLimiter(MemoryRedis()))
+    await server._process([
+        (json.dumps({"device_id": "gsm-01", "lat": 6.14, "lon": 1.23}).encode(), "10.0.0.1"),
+        (b"5", "10.0.0.1"),
+        (b"null", "10.0.0.1"),
+        (json.dumps([{"device_id": "gsm-02", "lat": 6.15, "lon": 1.24}]).encode(), "10.0.0.1"),
+    ])
+    assert [f.device_id for f in received] == ["gsm-01", "gsm-02"]
+
+
+@pytest.mark.asyncio
+async def test_udp_stop_finishes_in_flight_batch_then_drains():
+    received = []
+    running = []
+
+    async def handler(fixes):
+        running.append(1)
+        assert len(running) == 1  # jamais deux lots en parallèle
+        await asyncio.sleep(0.02)
+        received.extend(fixes)
+        running.pop()
+
+    server = UdpIngestServer(handler=handler, batch_size=2, limiter=TokenBucketLimiter(MemoryRedis()))
+    await server.start("127.0.0.1", 0)
+    for i in range(5):
+        server.queue.put_nowait((json.dumps({"device_id": f"gsm-{i}", "lat": 6.14, "lon": 1.23}).encode(), "10.0.0.1"))
+    await asyncio.sleep(0.01)  # premier lot en cours
+    await server.stop()
+
+    assert [f.device_id for f in received] == [f"gsm-{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_udp_batch_charges_each_datagram(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_DEVICE_BURST", 2)
+    monkeypatch.setattr(settings, "INGEST_IP_BURST", 1)
+    received = []
+
+    async def handler(fixes):
+        received.extend(fixes)
+
+    redis = MemoryRedis()
+    server = UdpIngestServer(handler=handler, limiter=TokenBucketLimiter(redis))
+    frame = encode_frame("lora-01", [(6.13, 1.22, 1735725600, 90)])
+    # Trois datagrammes du même device dans un lot : trois jetons, pas un seul
+    await server._process([(frame, "10.0.0.1"), (frame, "10.0.0.2"), (frame, "10.0.0.3")])
+    assert received == []
+    assert float(redis._hash("ratelimit:device:lora-01")["t"]) == pytest.approx(2, abs=0.1)
+
+    # Deux datagrammes de la même IP pour une capacité de 1 : tout le lot de l'IP est refusé
+    await server._process([(frame, "10.0.0.4"), (frame, "10.0.0.4"), (frame, "10.0.0.5")])
+    assert len(received) == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_device_and_ip(baggage_client, create_users, db_session, memory_redis, monkeypatch):
+    noisy = f"dev-{uuid.uuid4().hex[:8]}"
+    quiet = f"dev-{uuid.uuid4().hex[:8]}"
+    await create_tracked_baggage(db_session, create_users, noisy)
+    await create_tracked_baggage(db_session, create_users, quiet)
+    # Bucket du device bruyant vide, rechargé trop lentement pour le test
+    monkeypatch.setattr(settings, "INGEST_DEVICE_RATE_PER_SECOND", 0.001)
+    await memory_redis.hset(f"ratelimit:device:{noisy}", mapping={"t": 0, "ts": time.time() * 1000})
+
+    resp = await baggage_client.post("/trackers/ingest", json={"device_id": noisy, "lat": 1.0, "lon": 2.0})
+    assert resp.status_code == 429
+
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[
+        {"device_id": noisy, "lat": 1.0, "lon": 2.0},
+        {"device_id": quiet, "lat": 1.0, "lon": 2.0},
+    ])
+    assert [r["status"] for r in resp.json()["results"]] == ["throttled", "ok"]
+
+    monkeypatch.setattr(settings, "INGEST_IP_BURST", 0)
+    resp = await baggage_client.post("/trackers/ingest/batch", json=[{"device_id": quiet, "lat": 3.0, "lon": 4.0}])
+    assert resp.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_limiter_charges_one_token_per_device_and_checks_ip_first(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_IP_BURST", 1)
+    redis = MemoryRedis()
+    limiter = TokenBucketLimiter(redis)
+
+    # Trame de 255 fixes : un seul jeton, jamais au-delà de la capacité
+    assert await limiter.check({"frame-01": 255}, "10.0.0.1") == set()
+    assert float(redis._hash("ratelimit:device:frame-01")["t"]) == pytest.approx(settings.INGEST_DEVICE_BURST - 1, abs=0.1)
+
+    # IP refusée : aucun jeton device consommé
+    with pytest.raises(IngestThrottled):
+        await limiter.check({"frame-01": 255}, "10.0.0.1")
+    assert float(redis._hash("ratelimit:device:frame-01")["t"]) == pytest.approx(settings.INGEST_DEVICE_BURST - 1, abs=0.1)
+
+    for _ in range(settings.INGEST_DEVICE_BURST - 1):
+        assert await limiter.check({"frame-01": 255}) == set()
+    assert await limiter.check({"frame-01": 255}) == {"frame-01"}
@@ -1,54 +1,317 @@
 import asyncio
+import json
 import pytest
-import redis.asyncio as redis
 from fastapi import FastAPI
-from services.baggage.routers.ws import router
-import websockets
-import uvicorn
+from starlette.datastructures import QueryParams
+from services.baggage.routers.ws import baggage_stream
 
-app = FastAPI()
-app.include_router(router)
+from services.baggage.redis.memory import MemoryRedis
 
 from unittest.mock import AsyncMock, patch
 
-# Sans le serveur Redis
+# Sans le serveur Redis : flux en mémoire, authentification simulée
+
+class FakeWebSocket:
+    def __init__(self, query: str):
+        self.query_params = QueryParams(query)
+        self.scope = {}
+        self.sent: asyncio.Queue = asyncio.Queue()
+        self.incoming: asyncio.Queue = asyncio.Queue()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        await self.sent.put(text)
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_ws_streams_events_within_user_scope():
+    from services.baggage.core.hub import EventHub
+    from services.baggage.core.stream import append_event
+    from services.baggage.core.stream_access import StreamScope
+
+    fake = MemoryRedis()
+    last_id = await append_event(fake, "baggage.scan", json.dumps({"tag": "MINE"}))
+    await append_event(fake, "baggage.scan", json.dumps({"tag": "OTHER"}))
+    await append_event(fake, "baggage.scan", json.dumps({"tag": "MINE"}))
+
+    hub = EventHub()
+    scope = StreamScope(tags=frozenset({"MINE"}))
+    with patch("services.baggage.core.hub.redis_client", fake), \
+            patch("services.baggage.routers.ws.hub", hub), \
+            patch("services.baggage.routers.ws.stream_user", AsyncMock()), \
+            patch("services.baggage.routers.ws.stream_scope", AsyncMock(return_value=scope)):
+        ws = FakeWebSocket(f"last_id={last_id}")
+        task = asyncio.create_task(baggage_stream(ws, db=AsyncMock()))
+
+        # Événements manqués rejoués, limités aux bagages de l'utilisateur
+        assert json.loads(await asyncio.wait_for(ws.sent.get(), 1))["tag"] == "MINE"
+        assert ws.sent.empty()
+
+        # Changement de filtres hors périmètre : ignoré
+        await ws.incoming.put({"type": "websocket.receive", "text": json.dumps({"tags": ["OTHER"]})})
+        await asyncio.sleep(0.01)
+        (subscription,) = hub._subscribers
+        assert subscription.tags == {"MINE"}
+
+        await ws.incoming.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(task, 1)
+        assert hub.subscriber_count == 0
+        await hub.stop()
+
+
+# Hub partagé : une seule lecture du flux Redis pour toutes les connexions
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_single_stream_reader():
+    from services.baggage.core.hub import EventHub
+    from services.baggage.core.stream import append_event
+
+    fake = MemoryRedis()
+    with patch("services.baggage.core.hub.redis_client", fake):
+        hub = EventHub()
+        first = hub.subscribe()
+        second = hub.subscribe()
+        await asyncio.sleep(0.02)
+
+        await append_event(fake, "baggage.scan", json.dumps({"tag": "A"}))
+        message = await asyncio.wait_for(first.get(), 1)
+        assert message.channel == "baggage.scan"
+        assert json.loads(message.data) == {"event_id": message.id, "tag": "A"}
+        assert (await asyncio.wait_for(second.get(), 1)) is message
+
+        hub.unsubscribe(first)
+        await append_event(fake, "baggage.status", json.dumps({"tag": "A", "status": "LOADED"}))
+        assert (await asyncio.wait_for(second.get(), 1)).channel == "baggage.status"
+        assert first.queue.empty()
+        assert hub.subscriber_count == 1
+
+        await hub.stop()
+
 
-@patch("services.baggage.routers.ws.redis.Redis")
 @pytest.mark.asyncio
-async def test_ws_with_mock(mock_redis):
-    # Simule pubsub et publish
-    pubsub_mock = AsyncMock()
-    pubsub_mock.get_message.side_effect = [
-        {"data": "Scan 1"}, {"data": "Status OK"}, None
+async def test_hub_resume_replays_missed_events_without_duplicates():
+    from services.baggage.core.hub import EventHub
+    from services.baggage.core.stream import append_event
+
+    fake = MemoryRedis()
+    with patch("services.baggage.core.hub.redis_client", fake), \
+            patch("services.baggage.core.stream.settings.STREAM_MAXLEN", 5):
+        seen = await append_event(fake, "baggage.gps", json.dumps({"tag": "A", "latitude": 1}))
+        await append_event(fake, "baggage.gps", json.dumps({"tag": "B", "latitude": 1}))
+        missed = await append_event(fake, "baggage.gps", json.dumps({"tag": "A", "latitude": 2}))
+
+        hub = EventHub()
+        hub.start = lambda: None
+        subscription = hub.subscribe(tags=["A"])
+        # Événement déjà reçu en direct pendant la relecture : pas de doublon
+        hub.dispatch("baggage.gps", json.dumps({"tag": "A", "latitude": 2}), missed)
+        live = await append_event(fake, "baggage.gps", json.dumps({"tag": "A", "latitude": 3}))
+        hub.dispatch("baggage.gps", json.dumps({"tag": "A", "latitude": 3}), live)
+
+        assert await hub.resume(subscription, seen)
+        ids = [subscription.queue.get_nowait().id for _ in range(subscription.queue.qsize())]
+        assert ids == [missed, live]
+
+        # Au-delà de MAXLEN, le début du flux est perdu : le client doit se resynchroniser
+        for index in range(5):
+            await append_event(fake, "baggage.scan", json.dumps({"tag": "A", "index": index}))
+        assert not await hub.resume(subscription, seen)
+        assert json.loads(subscription.queue.get_nowait().data) == {"type": "resync"}
+
+
+def test_hub_routes_by_filters():
+    from services.baggage.core.hub import EventHub
+
+    hub = EventHub()
+    hub.start = lambda: None
+    everything = hub.subscribe()
+    by_tag = hub.subscribe(tags=["TAG-1", "TAG-2"])
+    by_company = hub.subscribe(company_ids=["c1"])
+    tag_and_status = hub.subscribe(tags=["TAG-1"], statuses=["LOADED"])
+
+    def received(event):
+        hub.dispatch("baggage.gps", json.dumps(event))
+        subscriptions = {"everything": everything, "by_tag": by_tag, "by_company": by_company, "tag_and_status": tag_and_status}
+        names = {name for name, sub in subscriptions.items() if not sub.queue.empty()}
+        for sub in subscriptions.values():
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+        return names
+
+    assert received({"tag": "TAG-1", "company_id": "c1"}) == {"everything", "by_tag", "by_company"}
+    assert received({"tag": "TAG-1", "company_id": "c2", "status": "LOADED"}) == {"everything", "by_tag", "tag_and_status"}
+    assert received({"tag": "TAG-9", "company_id": "c2"}) == {"everything"}
+
+    # Changement de filtres sans reconnexion : la file est conservée
+    hub.update(by_company, tags=["TAG-9"])
+    assert received({"tag": "TAG-9", "company_id": "c2"}) == {"everything", "by_company"}
+    assert received({"tag": "TAG-1", "company_id": "c1"}) == {"everything", "by_tag"}
+
+    hub.unsubscribe(by_tag)
+    assert received({"tag": "TAG-2"}) == {"everything"}
+    assert not any(hub._indexes["tag"].get("TAG-2", ()))
+
+
+@pytest.mark.asyncio
+async def test_batch_keeps_latest_gps_per_tag_and_every_status():
+    from services.baggage.core.hub import EventHub
+    from services.baggage.core.coalesce import next_batch
+
+    hub = EventHub()
+    hub.start = lambda: None
+    subscription = hub.subscribe()
+    published = [
+        ("baggage.gps", {"tag": "A", "latitude": 1}),
+        ("baggage.status", {"tag": "A", "status": "LOADED"}),
+        ("baggage.gps", {"tag": "B", "latitude": 1}),
+        ("baggage.gps", {"tag": "A", "latitude": 2}),
+        ("baggage.status", {"tag": "A", "status": "IN_TRANSIT"}),
+    ]
+    for channel, event in published:
+        hub.dispatch(channel, json.dumps(event))
+
+    batch = await next_batch(subscription, 0.01, 100)
+    assert json.loads(batch.frame()) == [
+        {"tag": "A", "status": "LOADED"},
+        {"tag": "B", "latitude": 1},
+        {"tag": "A", "latitude": 2},
+        {"tag": "A", "status": "IN_TRANSIT"},
     ]
-    mock_redis.return_value.pubsub.return_value = pubsub_mock
+    assert subscription.queue.empty()
+
+    # Plafond d'entrées par trame : le reste part dans la trame suivante
+    for index in range(5):
+        hub.dispatch("baggage.scan", json.dumps({"tag": f"T{index}"}))
+    assert len(await next_batch(subscription, 1.0, 3)) == 3
+    assert len(await next_batch(subscription, 0.01, 3)) == 2
 
-# Avec Redis qui tourne: ça va marcher seulement si redis est accessible
 
-# @pytest.mark.asyncio
-# async def test_ws_baggage_stream_multiple_messages():
-#     # Démarrage serveur FastAPI
-#     config = uvicorn.Config(app, host="127.0.0.1", port=8001, log_level="critical")
-#     server = uvicorn.Server(config)
-#     server_task = asyncio.create_task(server.serve())
-#     await asyncio.sleep(0.5)  # Laisser le serveur démarrer
+@pytest.mark.asyncio
+async def test_msgpack_encoded_once_and_batched_without_reencoding():
+    import msgpack
+    from services.baggage.core.hub import EventHub, MSGPACK
+    from services.baggage.core.coalesce import next_batch
+
+    hub = EventHub()
+    hub.start = lambda: None
+    first = hub.subscribe()
+    second = hub.subscribe()
+    hub.dispatch("baggage.gps", json.dumps({"tag": "A", "latitude": 1.5}), "1-0")
+
+    message = first.queue.get_nowait()
+    assert second.queue.get_nowait() is message
+    assert msgpack.unpackb(message.encode(MSGPACK)) == {"event_id": "1-0", "tag": "A", "latitude": 1.5}
+    assert message.encode(MSGPACK) is message.encode(MSGPACK)
+
+    for index in range(20):
+        hub.dispatch("baggage.scan", json.dumps({"tag": f"T{index}"}))
+    batch = await next_batch(first, 0.01, 100)
+    assert msgpack.unpackb(batch.frame(MSGPACK)) == json.loads(batch.frame())
+
+
+# Server-Sent Events : même hub, mêmes filtres, reprise par Last-Event-ID
+
+@pytest.mark.asyncio
+async def test_sse_stream_encodes_events_and_keepalive():
+    from services.baggage.core.hub import EventHub
+    from services.baggage.routers import sse
+    from services.baggage.schemas.stream import StreamSubscription
 
-#     # Connexion WebSocket
-#     ws_url = "ws://127.0.0.1:8001/ws/baggages/stream"
-#     async with websockets.connect(ws_url) as ws:
-#         r = redis.Redis(host="localhost", port=6379, decode_responses=True)
+    hub = EventHub()
+    hub.start = lambda: None
+    with patch.object(sse, "hub", hub):
+        events = sse.sse_events(StreamSubscription(tags=["A"]), None, keepalive=0.01)
+        # Abonnement pris au démarrage du flux seulement
+        assert hub.subscriber_count == 0
+        assert (await events.__anext__()).startswith("retry: ")
+        assert hub.subscriber_count == 1
+        assert await events.__anext__() == ": keepalive\n\n"
 
-#         messages = [("baggage.scan", "Scan 1"), ("baggage.scan", "Scan 2"),
-#                     ("baggage.status", "Status OK"), ("baggage.status", "Status Delayed")]
+        hub.dispatch("baggage.gps", json.dumps({"tag": "B"}), "1-0")
+        hub.dispatch("baggage.gps", json.dumps({"tag": "A"}), "2-0")
+        assert await events.__anext__() == 'id: 2-0\nevent: baggage.gps\ndata: {"event_id":"2-0","tag":"A"}\n\n'
 
-#         for channel, msg in messages:
-#             await r.publish(channel, msg)
-#             received = await asyncio.wait_for(ws.recv(), timeout=1.0)
-#             assert received == msg
+        await events.aclose()
+        assert hub.subscriber_count == 0
 
-#         await r.close()
+        # Client parti avant le début du flux : aucun abonnement orphelin
+        await sse.sse_events(StreamSubscription(), None, keepalive=0.01).aclose()
+        assert hub.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_sse_rejects_invalid_resume_id():
+    from types import SimpleNamespace
+    from httpx import AsyncClient, ASGITransport
+    from libs.common.database import get_db
+    from services.auth.core.roles import UserRole
+    from services.baggage.core.stream_access import stream_user
+    from services.baggage.routers.sse import router as sse_router
+
+    sse_app = FastAPI()
+    sse_app.include_router(sse_router)
+    sse_app.dependency_overrides[get_db] = lambda: None
+    sse_app.dependency_overrides[stream_user] = lambda: SimpleNamespace(role=UserRole.ADMIN)
+    async with AsyncClient(transport=ASGITransport(app=sse_app), base_url="http://test") as client:
+        response = await client.get("/sse/baggages/stream", headers={"Last-Event-ID": "not-an-id"})
+        assert response.status_code == 400
+        response = await client.get("/sse/baggages/stream", params={"status": "NOT_A_STATUS"})
+        assert response.status_code == 422
+
+
+# Files sortantes bornées : client lent
+
+def test_full_queue_drops_oldest_gps_but_keeps_status():
+    from prometheus_client import REGISTRY
+    from services.baggage.core.hub import EventHub
+
+    hub = EventHub()
+    hub.start = lambda: None
+    subscription = hub.subscribe()
+    subscription.queue.maxsize = 3
+    subscription.queue.policy = "drop_gps"
+
+    hub.dispatch("baggage.gps", json.dumps({"tag": "A", "latitude": 1}))
+    hub.dispatch("baggage.status", json.dumps({"tag": "A", "status": "LOADED"}))
+    hub.dispatch("baggage.gps", json.dumps({"tag": "B", "latitude": 1}))
+    hub.dispatch("baggage.status", json.dumps({"tag": "B", "status": "LOADED"}))
+    hub.dispatch("baggage.status", json.dumps({"tag": "C", "status": "LOADED"}))
+
+    received = [subscription.queue.get_nowait().event for _ in range(subscription.queue.qsize())]
+    assert [event.get("status", event.get("latitude")) for event in received] == ["LOADED", "LOADED", "LOADED"]
+    assert subscription.queue.dropped == 2
+    labels = {"transport": "ws", "connection": subscription.connection_id}
+    assert REGISTRY.get_sample_value("baggage_stream_dropped_messages_total", labels) == 2
+
+    # Plus aucune position à écarter : un statut de plus ferme la connexion
+    for tag in "DEFG":
+        hub.dispatch("baggage.status", json.dumps({"tag": tag, "status": "LOADED"}))
+    assert subscription.queue.closed.is_set()
+
+    hub.unsubscribe(subscription)
+    assert REGISTRY.get_sample_value("baggage_stream_queue_depth", labels) is None
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_closes_lagging_subscription():
+    from services.baggage.core.hub import EventHub, SlowConsumer
 
-#     # Arrêt du serveur
-#     server.should_exit = True
-#     await server_task
+    hub = EventHub()
+    hub.start = lambda: None
+    subscription = hub.subscribe()
+    subscription.queue.maxsize = 2
+    subscription.queue.policy = "disconnect"
 
+    for index in range(3):
+        hub.dispatch("baggage.gps", json.dumps({"tag": "A", "latitude": index}))
+    assert subscription.queue.closed.is_set()
+    with pytest.raises(SlowConsumer):
+        await subscription.get()
@@ -0,0 +1,69 @@
+# tests/utils/amqp.py
+
+
+class FakeExchange:
+    def __init__(self, broker, name):
+        self.broker = broker
+        self.name = name
+
+    async def publish(self, message, routing_key, mandatory=True, timeout=None):
+        self.broker.calls += 1
+        if self.broker.failures or self.broker.calls in self.broker.fail_on:
+            self.broker.failures = max(0, self.broker.failures - 1)
+            raise ConnectionError("connection lost")
+        self.broker.published.append((routing_key, message.body))
+        self.broker.message_ids.append(message.message_id)
+
+
+class FakeChannel:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def declare_exchange(self, name, type=None, durable=False):
+        self.broker.declared.append(name)
+        return FakeExchange(self.broker, name)
+
+    async def get_exchange(self, name, ensure=True):
+        return FakeExchange(self.broker, name)
+
+
+class FakeConnection:
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def channel(self, publisher_confirms=True):
+        self.broker.channels += 1
+        return FakeChannel(self.broker)
+
+    async def close(self):
+        self.broker.closed = True
+
+
+class FakeBroker:
+    """
+    Stand-in minimal d'aio_pika pour `EventPublisher` : remplace
+    `aio_pika.connect_robust` et enregistre les messages publiés.
+
+    - `unavailable` : nombre de tentatives de connexion refusées
+    - `failures` : nombre de publications qui échouent (perte de connexion)
+    - `fail_on` : numéros (à partir de 1) des appels de publication qui échouent
+    """
+
+    def __init__(self, unavailable: int = 0, failures: int = 0, fail_on: set[int] | None = None):
+        self.unavailable = unavailable
+        self.failures = failures
+        self.fail_on = fail_on or set()
+        self.calls = 0
+        self.message_ids = []
+        self.connections = 0
+        self.channels = 0
+        self.declared = []
+        self.published = []
+        self.closed = False
+
+    async def connect_robust(self, url, **kwargs):
+        if self.unavailable:
+            self.unavailable -= 1
+            raise ConnectionError("broker unavailable")
+        self.connections += 1
+        return FakeConnection(self)
@@ -0,0 +1,9 @@
+# tests/utils/redis.py
+from services.baggage.core.stream import STREAM_KEY
+
+
+def stream_events(redis, name: str = STREAM_KEY) -> list[tuple[str, str]]:
+    """
+    (canal, données) des entrées du flux d'un `MemoryRedis`, dans l'ordre.
+    """
+    return [(fields["channel"], fields["data"]) for _, fields in redis._range(name, "-", "+")]